@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+
+class ModuleDocFragment(object):
+    # Option diff_detail of the modules which report their changes with DeepDiff
+    DOCUMENTATION = r'''
+options:
+  diff_detail:
+    description:
+      - "Level of detail of the changes reported in I(original_message)"
+      - "C(none): Changes are not reported"
+      - "C(summary): Count of the changes per change type"
+      - "C(paths): Changed paths per change type without the old and new values"
+      - "C(full): Complete DeepDiff output including the old and new values"
+    type: str
+    required: false
+    default: summary
+    choices:
+      - none
+      - summary
+      - paths
+      - full
+'''
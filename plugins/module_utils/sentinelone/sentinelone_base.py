@@ -6,10 +6,11 @@ from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
 from ansible.module_utils.basic import AnsibleModule
+import hashlib
 import json
 import traceback
-import copy
 import time
+from concurrent.futures import ThreadPoolExecutor
 from ansible.module_utils.six.moves.urllib.parse import quote_plus
 import ansible.module_utils.six.moves.urllib.error as urllib_error
 
@@ -24,7 +25,40 @@ except ImportError:
     lib_imp_errors['lib_imp_err'] = traceback.format_exc()
 
 
+class WorkerError(Exception):
+    pass
+
+
+class WorkerModule:
+    def __init__(self, module: AnsibleModule):
+        """
+        Wrapper of the AnsibleModule for API calls in worker threads. fail_json and exit_json of the AnsibleModule
+        end the process, which must only happen in the main thread. The wrapper raises WorkerError instead so the
+        errors of all workers can be collected. All other attributes are passed to the AnsibleModule
+
+        :param module: The AnsibleModule of the main thread
+        :type module: AnsibleModule
+        """
+
+        self.module = module
+
+    def fail_json(self, msg: str, **kwargs):
+        raise WorkerError(msg)
+
+    def exit_json(self, msg: str = "", **kwargs):
+        raise WorkerError(msg)
+
+    def __getattr__(self, name):
+        return getattr(self.module, name)
+
+
 class SentineloneBase:
+    # Keys of the group objects which are kept by get_group_index. All other keys returned by the API are dropped when
+    # the groups are listed. Subclasses which need more keys override it
+    group_keys = ['id', 'name', 'type', 'inherits']
+    # Empty DeepDiff object which compare returns for all equal dictionaries. Built on first use. Must not be changed
+    empty_diff = None
+
     def __init__(self, module: AnsibleModule):
         """
         Initialization of the base super class
@@ -59,6 +93,11 @@ class SentineloneBase:
         self.site_name = module.params["site_name"]
         self.state = module.params.get("state", None)
         self.group_names = module.params.get("groups", [])
+        self.diff_detail = module.params.get("diff_detail", "summary")
+        # Modules without the option send their requests one by one
+        self.parallel_requests = module.params.get("parallel_requests", 1)
+        if self.parallel_requests < 1:
+            module.fail_json(msg="parallel_requests needs to be 1 or higher")
 
         # Get AccountID by name
         self.current_account = self.get_account_obj(module)
@@ -71,10 +110,12 @@ class SentineloneBase:
         else:
             self.site_id = self.current_site["id"]
 
-        # Get GroupIDs by Name
+        # Get GroupIDs by Name. The group objects are kept in group_index
         if self.group_names:
-            self.current_group_ids_names = self.get_group_ids_names(self.group_names, module)
+            self.group_index = self.get_group_index(module)
+            self.current_group_ids_names = self.get_group_ids_names(self.group_names, module, self.group_index)
         else:
+            self.group_index = {}
             self.current_group_ids_names = []
 
         self.module = module
@@ -162,6 +203,110 @@ class SentineloneBase:
 
         return response
 
+    def get_paginated(self, module: AnsibleModule, api_url: str, error_msg: str = "API call failed.",
+                      page_size: int = 100, data_key: str = None):
+        """
+        Generator which yields all items of a list API endpoint page by page. Only one page is kept in memory at a time,
+        so the memory usage depends on page_size and not on the count of items
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :param api_url: URL of the list API endpoint including the query parameters
+        :type api_url: str
+        :param error_msg: Start of error message in case of a failed API call
+        :type error_msg: str
+        :param page_size: Count of items requested per API call
+        :type page_size: int
+        :param data_key: Optional parameter. Key of the list in the response data if data is no list (e.g. 'sites')
+        :type data_key: str
+        :return: Generator of the items
+        :rtype: Iterator[dict]
+        """
+
+        separator = '&' if '?' in api_url else '?'
+        cursor = None
+        while True:
+            page_url = f"{api_url}{separator}limit={page_size}"
+            if cursor:
+                page_url += f"&cursor={quote_plus(cursor)}"
+            response = self.api_call(module, page_url, error_msg=error_msg)
+            items = response['data'] if data_key is None else response['data'][data_key]
+            for item in items:
+                yield item
+
+            cursor = response['pagination'].get('nextCursor')
+            if not cursor:
+                break
+
+    def run_parallel_results(self, module: AnsibleModule, func, items: list):
+        """
+        Calls func(worker_module, item) for every item with at most parallel_requests calls at the same time. func gets
+        a WorkerModule instead of the AnsibleModule, so a failing call does not stop the other calls. Errors are
+        returned per item instead of being reported, so the caller can report the successful calls too
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :param func: Function which is called with the WorkerModule and one item. Usually does one API call
+        :type func: Callable
+        :param items: Items which are passed to func
+        :type items: list
+        :return: Tuples of the return value of func and the error message (None if the call succeeded) in the order of
+        items
+        :rtype: list
+        """
+
+        worker_module = WorkerModule(module)
+        with ThreadPoolExecutor(max_workers=self.parallel_requests) as executor:
+            futures = [executor.submit(func, worker_module, item) for item in items]
+
+        results = []
+        for future in futures:
+            try:
+                results.append((future.result(), None))
+            except WorkerError as err:
+                results.append((None, str(err)))
+            except Exception as err:
+                results.append((None, f"{type(err).__name__}: {err}"))
+
+        return results
+
+    @staticmethod
+    def get_parallel_error_msg(errors: list, count: int):
+        """
+        Returns the message which reports the errors of parallel calls
+
+        :param errors: Error messages of the failed calls
+        :type errors: list
+        :param count: Count of all calls
+        :type count: int
+        :rtype: str
+        """
+
+        return f"{len(errors)} of {count} API calls failed. Errors: {' | '.join(errors)}"
+
+    def run_parallel(self, module: AnsibleModule, func, items: list):
+        """
+        Calls func(worker_module, item) for every item with at most parallel_requests calls at the same time. func gets
+        a WorkerModule instead of the AnsibleModule, so a failing call does not stop the other calls. After all calls
+        are finished the errors of all failed calls are reported with one fail_json
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :param func: Function which is called with the WorkerModule and one item. Usually does one API call
+        :type func: Callable
+        :param items: Items which are passed to func
+        :type items: list
+        :return: Return values of func in the order of items
+        :rtype: list
+        """
+
+        results = self.run_parallel_results(module, func, items)
+        errors = [error for result, error in results if error is not None]
+        if errors:
+            module.fail_json(msg=self.get_parallel_error_msg(errors, len(items)))
+
+        return [result for result, error in results]
+
     def get_account_obj(self, module: AnsibleModule):
         """
         Returns the account obj
@@ -211,7 +356,63 @@ class SentineloneBase:
             module.fail_json(msg=f"Site {site_name} not found")
         return site_obj
 
-    def get_group_ids_names(self, group_names: list, module: AnsibleModule):
+    def get_sites(self, site_names: list, module: AnsibleModule):
+        """
+        Returns the active site objects of the account with one paginated listing. The sites are compared by their
+        exact name
+
+        :param site_names: Names of the sites. None returns all active sites
+        :type site_names: list
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Site objects in the order of site_names or of the API listing if site_names is None
+        :rtype: list
+        """
+
+        api_url = f"{self.api_endpoint_sites}?state=active&accountIds={quote_plus(self.account_id)}"
+        error_msg = "Failed to get sites."
+        site_index = {}
+        for site in self.get_paginated(module, api_url, error_msg=error_msg, data_key='sites'):
+            site_index.setdefault(site['name'], site)
+
+        if site_names is None:
+            return list(site_index.values())
+
+        missing_site_names = [site_name for site_name in site_names if site_name not in site_index]
+        if missing_site_names:
+            module.fail_json(msg=f"Sites not found: {', '.join(missing_site_names)}")
+
+        return [site_index[site_name] for site_name in site_names]
+
+    def get_group_index(self, module: AnsibleModule, site_id: str = None, group_keys: list = None):
+        """
+        Returns all groups of the site indexed by their exact name. The API parameter "name" also matches substrings,
+        so the groups are listed once and compared here
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :param site_id: Optional parameter. Id of another site than site_name
+        :type site_id: str
+        :param group_keys: Optional parameter. Keys of the group objects which are kept. Defaults to group_keys
+        :type group_keys: list
+        :return: Dictionary with the group name as key and the group object reduced to group_keys as value
+        :rtype: dict
+        """
+
+        if site_id is None:
+            site_id = self.site_id
+        if group_keys is None:
+            group_keys = self.group_keys
+        api_url = f"{self.api_endpoint_groups}?siteIds={quote_plus(site_id)}"
+        error_msg = f"Failed to get groups of site with id {site_id}."
+        group_index = {}
+        for group in self.get_paginated(module, api_url, error_msg=error_msg):
+            if group['name'] not in group_index:
+                group_index[group['name']] = {key: group[key] for key in group_keys if key in group}
+
+        return group_index
+
+    def get_group_ids_names(self, group_names: list, module: AnsibleModule, group_index: dict = None):
         """
         Returns group_ids_names for given group_names
 
@@ -219,21 +420,19 @@ class SentineloneBase:
         :type group_names: list
         :param module: Ansible module for error handling
         :type module: AnsibleModule
+        :param group_index: Optional parameter. Groups of the site returned by get_group_index. Read from API if not set
+        :type group_index: dict
         :return: List with tuples of group_id and group_name
         :rtype: list
         """
 
+        if group_index is None:
+            group_index = self.get_group_index(module)
         group_ids_names = []
         for group_name in group_names:
-            api_url = f"{self.api_endpoint_groups}?name={quote_plus(group_name)}&siteIds={quote_plus(self.site_id)}"
-            error_msg = f"Failed to get group {group_name}."
-            response = self.api_call(module, api_url, error_msg=error_msg)
-
-            if response["pagination"]["totalItems"] == 1:
-                group_id = response["data"][0]["id"]
-                group_ids_names.append((group_id, group_name))
-            else:
+            if group_name not in group_index:
                 module.fail_json(msg=f"Group {group_name} not found")
+            group_ids_names.append((group_index[group_name]['id'], group_name))
 
         return group_ids_names
 
@@ -277,20 +476,34 @@ class SentineloneBase:
         :type desired_state_data: dict
         :param exclude_path: Optional parameter. You can exclude some (nested) keys from comparison
         :type exclude_path: str
-        :return: Returns a tuple of diff (DeepDiff object) and the merged_dict (dictionary object)
+        :return: Returns a tuple of diff (DeepDiff object) and the merged_dict (dictionary object). merged_dict shares
+        the unchanged nested objects with current_data (see merge_copy)
         :rtype: tuple
         """
 
         if exclude_path is None:
             exclude_path = []
-        # Python does not create new objects by assigning one variable to another. It only copies the reference to the
-        # same memory address (copies the pointer). You have to use copy oder deepcopy. Deepcopy creates new objects
-        # of the nested objects as well
-        merged_dict = copy.deepcopy(current_data)
-        self.merge(merged_dict, desired_state_data)
-        diff = DeepDiff(current_data, merged_dict, exclude_paths=exclude_path)
+        # current_data must not be changed because it is needed for the comparison. merge_copy only copies the nested
+        # dictionaries which are changed by desired_state_data instead of deep copying the whole (maybe huge) object
+        merged_dict = self.merge_copy(current_data, desired_state_data)
+        diff = self.compare(current_data, merged_dict, exclude_path)
         return diff, merged_dict
 
+    @staticmethod
+    def get_fingerprint(settings: dict):
+        """
+        Returns the content address of the settings. Equal settings have the same fingerprint regardless of the key
+        order
+
+        :param settings: Settings without metadata
+        :type settings: dict
+        :return: sha256 hash of the canonical JSON of the settings
+        :rtype: str
+        """
+
+        canonical_json = json.dumps(settings, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical_json.encode('utf-8')).hexdigest()
+
     @staticmethod
     def compare(dict1: dict, dict2: dict, exclude_path: list = None):
         """
@@ -302,14 +515,199 @@ class SentineloneBase:
         :type dict2: dict
         :param exclude_path: Optional parameter. You can exclude some (nested) keys from comparison
         :type exclude_path: str
-        :return: DeepDiff object with the differences of the two dictioniaries
+        :return: DeepDiff object with the differences of the two dictioniaries. The shared empty_diff if they are equal
         :rtype: DeepDiff
         """
 
+        if not SentineloneBase.values_differ(dict1, dict2, exclude_path):
+            # Most module runs do not change anything. Skip the expensive DeepDiff analysis if the dictionaries are equal
+            if SentineloneBase.empty_diff is None:
+                SentineloneBase.empty_diff = DeepDiff({}, {})
+            return SentineloneBase.empty_diff
+
         diff = DeepDiff(dict1, dict2, exclude_paths=exclude_path)
 
         return diff
 
+    def format_diff(self, diff):
+        """
+        Reduce the DeepDiff object to the level of detail set by the diff_detail module parameter. Keeps the module
+        result small if big objects are changed in many scopes.
+        none: Nothing is returned.
+        summary: Count of changes per change type.
+        paths: Changed paths per change type. Old and new values are omitted.
+        full: The complete DeepDiff object as dictionary.
+
+        :param diff: DeepDiff object returned by compare or merge_compare
+        :type diff: DeepDiff
+        :return: The changes in the selected level of detail
+        :rtype: dict or None
+        """
+
+        if self.diff_detail == "none":
+            return None
+
+        if self.diff_detail == "full":
+            return dict(diff)
+
+        # The values are either dictionaries with the paths as keys or sets/lists of paths
+        changed_paths = {change_type: sorted(changes) for change_type, changes in dict(diff).items()}
+        if self.diff_detail == "paths":
+            return changed_paths
+
+        return {change_type: len(paths) for change_type, paths in changed_paths.items()}
+
+    @staticmethod
+    def get_changed_subtree(current_data: dict, merged_data: dict, exclude_path: list = None, path: str = "root"):
+        """
+        Build a minimal update body out of merged_data. Only the keys whose values differ from current_data are kept.
+        Nested dictionaries are reduced to their changed keys. All other values (e.g. lists) are kept as a whole
+        because the API can not update parts of them. Excluded keys inside these values are removed as well
+
+        :param current_data: Currently set settings
+        :type current_data: dict
+        :param merged_data: Current settings merged with the desired state settings (see merge_compare)
+        :type merged_data: dict
+        :param exclude_path: Optional parameter. Keys in DeepDiff path notation which should never be part of the body
+        :type exclude_path: list
+        :param path: DeepDiff path of the passed dictionaries. Only needed for the recursion
+        :type path: str
+        :return: Dictionary which only contains the changed subtrees of merged_data
+        :rtype: dict
+        """
+
+        if exclude_path is None:
+            exclude_path = []
+
+        changed_subtree = {}
+        for key, value in merged_data.items():
+            key_path = f"{path}[{key!r}]"
+            if key_path in exclude_path:
+                continue
+
+            if key not in current_data:
+                changed_subtree[key] = SentineloneBase.remove_excluded_paths(value, exclude_path, key_path)
+            elif isinstance(value, dict) and isinstance(current_data[key], dict):
+                changed_nested = SentineloneBase.get_changed_subtree(current_data[key], value, exclude_path, key_path)
+                if changed_nested:
+                    changed_subtree[key] = changed_nested
+            elif SentineloneBase.values_differ(current_data[key], value, exclude_path, key_path):
+                changed_subtree[key] = SentineloneBase.remove_excluded_paths(value, exclude_path, key_path)
+
+        return changed_subtree
+
+    @staticmethod
+    def remove_excluded_paths(value, exclude_path: list, path: str):
+        """
+        Returns value without the keys in exclude_path, e.g. read-only keys of the list items. Only the dictionaries and
+        lists which contain excluded keys are copied. All other values are returned unchanged
+
+        :param value: Value which is sent to the API
+        :type value: any
+        :param exclude_path: Keys in DeepDiff path notation which should never be part of the body
+        :type exclude_path: list
+        :param path: DeepDiff path of value
+        :type path: str
+        :return: Value without the excluded keys
+        :rtype: any
+        """
+
+        if not any(excluded.startswith(path + "[") for excluded in exclude_path):
+            return value
+
+        if isinstance(value, dict):
+            return {key: SentineloneBase.remove_excluded_paths(nested, exclude_path, f"{path}[{key!r}]")
+                    for key, nested in value.items() if f"{path}[{key!r}]" not in exclude_path}
+        if isinstance(value, list):
+            return [SentineloneBase.remove_excluded_paths(item, exclude_path, f"{path}[{index}]")
+                    for index, item in enumerate(value)]
+
+        return value
+
+    @staticmethod
+    def get_changed_paths(dict1: dict, dict2: dict, exclude_path: list = None):
+        """
+        Fast alternative to compare if only the changed paths are needed. Returns the paths in DeepDiff notation.
+        Lists are compared as a whole, so a change inside a list is reported with the path of the list
+
+        :param dict1: First dict
+        :type dict1: dict
+        :param dict2: Second dict
+        :type dict2: dict
+        :param exclude_path: Optional parameter. You can exclude some (nested) keys from comparison
+        :type exclude_path: list
+        :return: Sorted list of the changed paths
+        :rtype: list
+        """
+
+        if exclude_path is None:
+            exclude_path = []
+
+        changed_paths = []
+        # Iterative depth-first search. Every item is a tuple of the two values to compare and their path
+        stack = [(dict1, dict2, "root")]
+        while stack:
+            value1, value2, path = stack.pop()
+            if isinstance(value1, dict) and type(value1) is type(value2):
+                for key in value1.keys() | value2.keys():
+                    key_path = f"{path}[{key!r}]"
+                    if key_path in exclude_path:
+                        continue
+                    if key not in value1 or key not in value2:
+                        changed_paths.append(key_path)
+                    else:
+                        stack.append((value1[key], value2[key], key_path))
+            elif SentineloneBase.values_differ(value1, value2, exclude_path, path):
+                changed_paths.append(path)
+
+        return sorted(changed_paths)
+
+    @staticmethod
+    def values_differ(value1, value2, exclude_path: list = None, path: str = "root"):
+        """
+        Recursively check if two values differ. Behaves like DeepDiff without options: Different types (e.g. 1 and 1.0)
+        are treated as a change and lists are compared in order
+
+        :param value1: First value
+        :param value2: Second value
+        :param exclude_path: Optional parameter. You can exclude some (nested) keys from comparison
+        :type exclude_path: list
+        :param path: DeepDiff path of the passed values. Only needed for the recursion
+        :type path: str
+        :return: True if the values differ
+        :rtype: bool
+        """
+
+        if exclude_path is None:
+            exclude_path = []
+
+        if path in exclude_path:
+            return False
+
+        if type(value1) is not type(value2):
+            return True
+
+        if isinstance(value1, dict):
+            for key in value1.keys() | value2.keys():
+                key_path = f"{path}[{key!r}]"
+                if key_path in exclude_path:
+                    continue
+                if key not in value1 or key not in value2:
+                    return True
+                if SentineloneBase.values_differ(value1[key], value2[key], exclude_path, key_path):
+                    return True
+            return False
+
+        if isinstance(value1, (list, tuple)):
+            if len(value1) != len(value2):
+                return True
+            for index, (item1, item2) in enumerate(zip(value1, value2)):
+                if SentineloneBase.values_differ(item1, item2, exclude_path, f"{path}[{index}]"):
+                    return True
+            return False
+
+        return value1 != value2
+
     def merge(self, parent: dict, child: dict):
         """
         Merges nested dictionaries as recursive method. It updates the parent dict with items from the child dict.
@@ -327,6 +725,64 @@ class SentineloneBase:
             else:
                 parent[key] = child[key]
 
+    def merge_copy(self, parent: dict, child: dict):
+        """
+        Same as merge but parent is not changed. Returns a new dictionary instead. Only the nested dictionaries which are
+        changed by child are copied. All other nested objects are shared with parent, so the returned dictionary must
+        not be changed in place below its first level
+
+        :param parent: Parent dictionary which will be updated by child dictionary
+        :type parent: dict
+        :param child: Child dictionary which updates parent dictionary
+        :type child: dict
+        :return: The merged dictionary
+        :rtype: dict
+        """
+
+        merged = dict(parent)
+        for key in child:
+            if key in merged and isinstance(merged[key], dict) and isinstance(child[key], dict):
+                merged[key] = self.merge_copy(merged[key], child[key])
+            else:
+                merged[key] = child[key]
+
+        return merged
+
+    def remove_dict_copy(self, current_dict: dict, remove_dict: dict):
+        """
+        Same as remove_dict_from_dict but current_dict is not changed. Returns a new dictionary instead. Only the nested
+        dictionaries from which keys are removed are copied. All other nested objects are shared with current_dict
+
+        :param current_dict: The dictionary from which the keys should be removed
+        :type current_dict: dict
+        :param remove_dict: The dictionary which should be removed from current_dict
+        :type remove_dict: dict
+        :return: current_dict without the keys of remove_dict. current_dict itself if nothing was removed
+        :rtype: dict
+        """
+
+        result = current_dict
+        for key in remove_dict.keys():
+            if current_dict.get(key) is None:
+                continue
+            if isinstance(current_dict[key], dict) and isinstance(remove_dict[key], dict):
+                new_value = self.remove_dict_copy(current_dict[key], remove_dict[key])
+                if new_value is current_dict[key]:
+                    continue
+                if result is current_dict:
+                    result = dict(current_dict)
+                if new_value in ('', None, {}):
+                    del result[key]
+                else:
+                    result[key] = new_value
+            elif not isinstance(remove_dict[key], dict):
+                # Covers case 2 and 3 of remove_dict_from_dict
+                if result is current_dict:
+                    result = dict(current_dict)
+                del result[key]
+
+        return result
+
     def remove_dict_from_dict(self, current_dict: dict, remove_dict: dict):
         """
         Remove nested dictionary keys from current_dict if they exist in remove_dict.
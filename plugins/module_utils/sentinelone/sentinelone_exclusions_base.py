@@ -0,0 +1,418 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+import re
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six.moves.urllib.parse import quote_plus
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+
+
+class SentineloneExclusionsBase(SentineloneBase):
+    # Keys of the exclusion objects which are compared with the desired state. All other keys returned by the API are
+    # dropped when the exclusions are listed
+    exclusion_keys = ['id', 'scope', 'type', 'value', 'mode', 'source', 'pathExclusionType', 'description', 'actions',
+                      'osType']
+
+    @staticmethod
+    def get_mode_name(mode: str, os_type: str, state: str, module: AnsibleModule):
+        """
+        Map the web UI exclusion mode names to API names
+
+        :param mode: The mode which should be set for the exclusion
+        :type mode: str
+        :param os_type: The os for which the exclusion will be created
+        :type os_type: str
+        :param state: Present or absent
+        :type state: str
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: API mapping of the exclusion mode
+        :rtype: str
+        """
+
+        if mode == "suppress_alerts":
+            return "suppress"
+        elif mode == "interoperability" and os_type == "windows":
+            return "disable_in_process_monitor"
+        elif mode == "interoperability_extended" and os_type == "windows":
+            return "disable_in_process_monitor_deep"
+        elif mode == "performance_focus":
+            return "disable_all_monitors"
+        elif mode == "performance_focus_extended":
+            return "disable_all_monitors_deep"
+        elif state == "present":
+            module.fail_json(msg=f"The mode {mode} is not compatible with os {os_type}")
+
+    @staticmethod
+    def get_path_exclusion_type(include_subfolders: bool, exclusion_path: str):
+        """
+        Set path exclusion type. If trailing slash or backslash is present path is handled as a folder. Here you can
+        optionally enable recursive exclusion with include_subfolders. If trailing slash or backslash is not present it
+        is automatically handeled as file type exclusion
+
+        :param include_subfolders: True if exclusion should match subfolders. False if not
+        :type include_subfolders: bool
+        :param exclusion_path: Path wich should be excluded
+        :type exclusion_path: str
+        :return: API mapping for the exclusion type
+        :rtype: str
+        """
+
+        # Get path type (folder or file)
+        if re.search(r"[/\\]$", exclusion_path) and not include_subfolders:
+            path_exclusion_type = "folder"
+        elif re.search(r"[/\\]$", exclusion_path) and include_subfolders:
+            path_exclusion_type = "subfolders"
+        else:
+            path_exclusion_type = "file"
+
+        return path_exclusion_type
+
+    @staticmethod
+    def get_actions(ef_alerts_mitigation: bool, ef_binary_vault: bool):
+        """
+        Set actions for Exclusion Function
+
+        :param ef_alerts_mitigation: Enable or disable exclusion for alerts and mitigation
+        :type ef_alerts_mitigation:  bool
+        :param ef_binary_vault: Enable or disable Binary Vault uploads
+        :type ef_binary_vault: bool
+        :return: API mapping for exclusion functions
+        :rtype: list
+        """
+
+        actions = []
+        if ef_alerts_mitigation:
+            actions.append("detect")
+        if ef_binary_vault:
+            actions.append("upload")
+
+        return actions
+
+    @staticmethod
+    def get_delete_exclusion_body(current_exclusion_ids: list):
+        """
+        Delete API object
+
+        :param current_exclusion_ids: Ids of the exclsions which schould be deleted
+        :type current_exclusion_ids: list
+        :return: API body for delete request
+        :rtype: dict
+        """
+
+        delete_body = {
+            "data": {
+                "ids": current_exclusion_ids,
+                "type": "path"
+            }
+        }
+
+        return delete_body
+
+    @staticmethod
+    def check_sanity(ef_alerts_mitigation: bool, ef_binary_vault: bool, module: AnsibleModule):
+        """
+        Check if the passed module arguments are contradicting each other
+
+        :param ef_alerts_mitigation: Enable or disable exclusion for alerts and mitigation
+        :type ef_alerts_mitigation: bool
+        :param ef_binary_vault: Enable or disable Binary Vault uploads
+        :type ef_binary_vault: bool
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        """
+
+        # Check if at least one of ef_alerts_mitigation and ef_binary_vault is true
+        if not ef_alerts_mitigation and not ef_binary_vault:
+            module.fail_json(msg="One of the following options needs to be true: ef_alerts_mitigation, ef_binary_vault")
+
+    @staticmethod
+    def normalize_path(exclusion_path: str, os_type: str):
+        """
+        Normalize a path the way the os compares paths. Windows paths are case insensitive and accept / and \\ as
+        separator. Repeated separators are collapsed (except the leading \\\\ of UNC paths) and trailing separators are
+        removed
+
+        :param exclusion_path: Path of the exclusion
+        :type exclusion_path: str
+        :param os_type: The os of the exclusion
+        :type os_type: str
+        :return: Normalized path
+        :rtype: str
+        """
+
+        if os_type == "windows":
+            path = exclusion_path.replace("/", "\\")
+            prefix = "\\\\" if path.startswith("\\\\") else ""
+            path = prefix + re.sub(r"\\+", r"\\", path[len(prefix):])
+            return path.rstrip("\\").casefold() or "\\"
+
+        path = re.sub(r"/+", "/", exclusion_path)
+        return path.rstrip("/") or "/"
+
+    @staticmethod
+    def get_path_filter(exclusion_path: str):
+        """
+        Returns the last component of the path. Every path with the same exclusion key (see get_exclusion_key)
+        contains it, so it can be used as value__contains filter of the exclusion listing
+
+        :param exclusion_path: Path of the exclusion
+        :type exclusion_path: str
+        :return: Last path component. Empty for the root path
+        :rtype: str
+        """
+
+        components = [component for component in re.split(r"[\\/]", exclusion_path) if component]
+        return components[-1] if components else ""
+
+    @staticmethod
+    def get_exclusion_key(exclusion_path: str, os_type: str):
+        """
+        Returns the key which identifies an exclusion inside of a scope. Paths which only differ in case (windows),
+        separators or trailing separators get the same key. A trailing separator marks a folder like in
+        get_path_exclusion_type, so a file and a folder with the same path get different keys. folder and subfolders
+        exclusions get the same key because include_subfolders is a setting of the exclusion
+
+        :param exclusion_path: Path of the exclusion
+        :type exclusion_path: str
+        :param os_type: The os of the exclusion
+        :type os_type: str
+        :return: Tuple of normalized path, os type and path kind (file or folder)
+        :rtype: tuple
+        """
+
+        if SentineloneExclusionsBase.get_path_exclusion_type(False, exclusion_path) == "file":
+            path_kind = "file"
+        else:
+            path_kind = "folder"
+
+        return SentineloneExclusionsBase.normalize_path(exclusion_path, os_type), os_type, path_kind
+
+    @staticmethod
+    def get_create_journal_key(exclusion_key: tuple, scope_id: str):
+        """
+        Returns the journal key of the creation of an exclusion in one scope. The key does not depend on the other
+        scopes where the exclusion is missing, so it stays the same if a failed run created the exclusion in some of
+        them
+
+        :param exclusion_key: Key of the exclusion (see get_exclusion_key)
+        :type exclusion_key: tuple
+        :param scope_id: Group or site id
+        :type scope_id: str
+        :return: Journal key
+        :rtype: str
+        """
+
+        return f"create:{json.dumps(list(exclusion_key) + [scope_id])}"
+
+    def get_exclusion_data(self, exclusion: dict, state: str, module: AnsibleModule):
+        """
+        Check the options of one exclusion and build its API data object
+
+        :param exclusion: Options of the exclusion. Keys os_path, os_type, mode, include_subfolders,
+        ef_alerts_mitigation, ef_binary_vault and description
+        :type exclusion: dict
+        :param state: Present or absent. mode is only required if state is present
+        :type state: str
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: API data object of the exclusion
+        :rtype: dict
+        """
+
+        exclusion_path = exclusion["os_path"]
+        os_type = exclusion["os_type"]
+        if state == "present":
+            if exclusion["mode"] is None:
+                module.fail_json(msg=f"mode is required for exclusion {exclusion_path} if state is present")
+            self.check_sanity(exclusion["ef_alerts_mitigation"], exclusion["ef_binary_vault"], module)
+
+        return {
+            "type": "path",
+            "value": exclusion_path,
+            "mode": self.get_mode_name(exclusion["mode"], os_type, state, module),
+            "source": "user",
+            "pathExclusionType": self.get_path_exclusion_type(exclusion["include_subfolders"], exclusion_path),
+            "description": exclusion["description"],
+            "actions": self.get_actions(exclusion["ef_alerts_mitigation"], exclusion["ef_binary_vault"]),
+            "osType": os_type
+        }
+
+    def get_scope_filter(self, group_ids: list):
+        """
+        Returns the filter of a create or update request for the site or for the passed groups
+
+        :param group_ids: Group ids of the scope. If empty the scope is the site
+        :type group_ids: list
+        :return: API filter
+        :rtype: dict
+        """
+
+        scope_filter = {"siteIds": [self.site_id]}
+        if group_ids:
+            scope_filter["groupIds"] = group_ids
+
+        return scope_filter
+
+    def get_scope_id(self, exclusion: dict):
+        """
+        Returns the id of the group the exclusion is attached to. For exclusions in site scope the site id is returned
+
+        :param exclusion: Exclusion object from the API
+        :type exclusion: dict
+        :return: Group or site id
+        :rtype: str
+        """
+
+        scope = exclusion.get('scope') or {}
+        if scope.get('groupIds'):
+            return scope['groupIds'][0]
+        return self.site_id
+
+    def get_exclusion_index(self, group_ids: list, module: AnsibleModule, wanted_keys: set = None,
+                            value_contains: str = None, os_types: list = None):
+        """
+        Lists the path exclusions of the site or of the passed groups with one paginated query and builds an index with
+        the exclusion key (see get_exclusion_key) as key and a list of the matching exclusions as value. Exclusions of
+        other scopes returned by the API are skipped
+
+        :param group_ids: Group ids of the scope. If empty the scope is the site
+        :type group_ids: list
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :param wanted_keys: Optional parameter. Only exclusions with these keys are kept. All exclusions are kept if
+        not set
+        :type wanted_keys: set
+        :param value_contains: Optional parameter. Only the exclusions whose value contains this string are listed by
+        the API
+        :type value_contains: str
+        :param os_types: Optional parameter. Only the exclusions of these os types are listed by the API
+        :type os_types: list
+        :return: Index of the exclusions in scope. Exclusions are reduced to the keys in exclusion_keys
+        :rtype: dict
+        """
+
+        api_url = self.api_endpoint_exclusions + f"?siteIds={quote_plus(self.site_id)}&type=path"
+        if group_ids:
+            api_url += f"&groupIds={quote_plus(','.join(group_ids))}"
+        if value_contains:
+            api_url += f"&value__contains={quote_plus(value_contains)}"
+        if os_types:
+            api_url += f"&osTypes={quote_plus(','.join(os_types))}"
+        scope_ids = group_ids if group_ids else [self.site_id]
+
+        error_msg = "Failed to get current exclusions."
+        exclusion_index = {}
+        for exclusion in self.get_paginated(module, api_url, error_msg):
+            if self.get_scope_id(exclusion) not in scope_ids:
+                continue
+            exclusion_key = self.get_exclusion_key(exclusion['value'], exclusion['osType'])
+            if wanted_keys is not None and exclusion_key not in wanted_keys:
+                continue
+            trimmed_exclusion = {key: exclusion[key] for key in self.exclusion_keys if key in exclusion}
+            exclusion_index.setdefault(exclusion_key, []).append(trimmed_exclusion)
+
+        return exclusion_index
+
+    def get_exclusion_changes(self, exclusion_data: dict, current_exclusions: list, scope_ids: list):
+        """
+        Compare the desired state of one exclusion with the existing exclusions of the same key
+
+        :param exclusion_data: API data object of the desired exclusion
+        :type exclusion_data: dict
+        :param current_exclusions: Existing exclusions with the key of the desired exclusion (see get_exclusion_index)
+        :type current_exclusions: list
+        :param scope_ids: Ids of the groups (or the site) where the exclusion has to exist
+        :type scope_ids: list
+        :return: Tuple of a list of tuples of drifted exclusion and diff and the list of the scope ids where the
+        exclusion is missing
+        :rtype: tuple
+        """
+
+        drifted_exclusions = []
+        for current_exclusion in current_exclusions:
+            diff = self.merge_compare(current_exclusion, exclusion_data)[0]
+            if diff:
+                drifted_exclusions.append((current_exclusion, diff))
+
+        existing_scope_ids = set(map(self.get_scope_id, current_exclusions))
+        missing_scope_ids = [scope_id for scope_id in scope_ids if scope_id not in existing_scope_ids]
+
+        return drifted_exclusions, missing_scope_ids
+
+    def create_exclusion(self, exclusion_data: dict, group_ids: list, module: AnsibleModule):
+        """
+        Create one exclusion in the site or in all passed groups with one request
+
+        :param exclusion_data: API data object of the exclusion
+        :type exclusion_data: dict
+        :param group_ids: Groups where the exclusion is missing. Empty list for site scope
+        :type group_ids: list
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: API response of the create query
+        :rtype: dict
+        """
+
+        api_url = self.api_endpoint_exclusions
+        create_body = {"filter": self.get_scope_filter(group_ids), "data": exclusion_data}
+        error_msg = f"Failed to create exclusion {exclusion_data['value']}."
+        response = self.api_call(module, api_url, "POST", body=create_body, error_msg=error_msg)
+
+        if len(response['data']) == 0:
+            module.fail_json(msg=f"Exclusion {exclusion_data['value']} could not be created - API result was empty")
+
+        return response
+
+    def update_exclusion(self, exclusion_data: dict, exclusion_id: str, module: AnsibleModule):
+        """
+        Update one existing exclusion
+
+        :param exclusion_data: API data object of the exclusion
+        :type exclusion_data: dict
+        :param exclusion_id: Id of the exclusion which should be updated
+        :type exclusion_id: str
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: API response of the update query
+        :rtype: dict
+        """
+
+        api_url = self.api_endpoint_exclusions
+        update_body = {"filter": self.get_scope_filter(self.current_group_ids),
+                       "data": dict(exclusion_data, id=exclusion_id)}
+        error_msg = f"Failed to update exclusion {exclusion_data['value']}."
+        response = self.api_call(module, api_url, "PUT", body=update_body, error_msg=error_msg)
+
+        if len(response['data']) == 0:
+            module.fail_json(msg=f"Exclusion {exclusion_data['value']} could not be updated - API result was empty")
+
+        return response
+
+    def delete_exclusions_by_id(self, exclusion_ids: list, module: AnsibleModule):
+        """
+        Delete all passed exclusions with one request
+
+        :param exclusion_ids: Ids of the exclusions which should be deleted
+        :type exclusion_ids: list
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: API response of the delete query
+        :rtype: dict
+        """
+
+        api_url = self.api_endpoint_exclusions
+        delete_body = self.get_delete_exclusion_body(exclusion_ids)
+        error_msg = "Failed to delete exclusions."
+        response = self.api_call(module, api_url, "DELETE", body=delete_body, error_msg=error_msg)
+
+        if response['data']['affected'] == 0:
+            module.fail_json(msg="Exclusions should have been deleted via API but API result was empty")
+
+        return response
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import hashlib
+import json
+import os
+import threading
+
+from ansible.module_utils.basic import AnsibleModule
+
+
+class SentineloneJournal:
+    def __init__(self, path: str, run_id: str, resume: bool, module: AnsibleModule):
+        """
+        Journal file which records the completed operations of a bulk run by their idempotency key. A failed run can be
+        resumed with the same options and skips the recorded operations. The journal is removed by complete() when the
+        run finished successfully. Without path the journal records nothing
+
+        :param path: Path of the journal file or None
+        :type path: str
+        :param run_id: Id of the run (see get_run_id). A journal of a run with another id is not resumed
+        :type run_id: str
+        :param resume: True if the operations of an existing journal should be skipped
+        :type resume: bool
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        """
+
+        self.path = path
+        self.run_id = run_id
+        self.completed_keys = set()
+        self.resumed = False
+        self.lock = threading.Lock()
+        self.journal_file = None
+
+        if path is None:
+            return
+
+        if resume and os.path.exists(path):
+            self.resumed = self.load(module)
+            if not self.resumed:
+                module.warn(f"Journal {path} belongs to a run with other options. Starting from the beginning")
+
+        try:
+            if self.resumed:
+                self.journal_file = open(path, "a", encoding="utf-8")
+            else:
+                self.journal_file = open(path, "w", encoding="utf-8")
+                self.write({"run_id": run_id})
+        except OSError as err:
+            module.fail_json(msg=f"Failed to open journal {path}: {err}")
+
+    @staticmethod
+    def get_run_id(*values):
+        """
+        Returns an id for the passed options of a run
+
+        :param values: JSON serializable values which identify the run
+        :return: sha256 hash of the values
+        :rtype: str
+        """
+
+        return hashlib.sha256(json.dumps(values, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def load(self, module: AnsibleModule):
+        """
+        Read the completed keys of the existing journal. Incomplete lines of a killed run are ignored
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: True if the journal belongs to the same run
+        :rtype: bool
+        """
+
+        try:
+            with open(self.path, encoding="utf-8") as journal_file:
+                lines = iter(journal_file)
+                try:
+                    header = json.loads(next(lines))
+                except (StopIteration, ValueError):
+                    return False
+                if header.get("run_id") != self.run_id:
+                    return False
+
+                for line in lines:
+                    try:
+                        self.completed_keys.add(json.loads(line)["key"])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        except OSError as err:
+            module.fail_json(msg=f"Failed to read journal {self.path}: {err}")
+
+        return True
+
+    def write(self, entry: dict):
+        """
+        Append one entry to the journal
+
+        :param entry: JSON serializable entry
+        :type entry: dict
+        """
+
+        self.journal_file.write(json.dumps(entry) + "\n")
+        # The entry has to be on disk before the next operation starts
+        self.journal_file.flush()
+        os.fsync(self.journal_file.fileno())
+
+    def is_done(self, key: str):
+        """
+        Check if the operation was completed in the resumed run
+
+        :param key: Idempotency key of the operation
+        :type key: str
+        :rtype: bool
+        """
+
+        return key in self.completed_keys
+
+    def mark_done(self, key: str):
+        """
+        Record a completed operation. Can be called from worker threads
+
+        :param key: Idempotency key of the operation
+        :type key: str
+        """
+
+        if self.journal_file is None:
+            return
+
+        with self.lock:
+            if key not in self.completed_keys:
+                self.completed_keys.add(key)
+                self.write({"key": key})
+
+    def complete(self):
+        """
+        The run finished successfully. Remove the journal
+        """
+
+        if self.journal_file is None:
+            return
+
+        self.journal_file.close()
+        self.journal_file = None
+        os.remove(self.path)
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+
+
+class SentinelonePoliciesBase(SentineloneBase):
+    # Keys of the policy objects which describe where the policy comes from and not how the agents are configured.
+    # They are ignored when policies of different scopes are compared
+    policy_metadata_keys = ['id', 'inheritedFrom', 'createdAt', 'updatedAt']
+
+    def __init__(self, module: AnsibleModule):
+        """
+        Initialization of the policies base object
+
+        :param module: Requires the AnsibleModule Object for parsing the parameters
+        :type module: AnsibleModule
+        """
+
+        # self.token, self.console_url, self.site_name, self.state, self.api_endpoint_*, self.group_names will be set in
+        # super Class
+        super().__init__(module)
+
+        # Policy objects which were read from the API by tuple of scope type and scope id
+        self.policy_cache = {}
+
+    def get_policy_api_url(self, scope_type: str, scope_id: str, action: str = "policy"):
+        """
+        Returns the URL of the policy endpoint of a scope
+
+        :param scope_type: account, site or group
+        :type scope_type: str
+        :param scope_id: Id of the account, site or group
+        :type scope_id: str
+        :param action: policy or revert-policy
+        :type action: str
+        :return: API URL
+        :rtype: str
+        """
+
+        api_endpoints = {
+            'account': self.api_endpoint_accounts,
+            'site': self.api_endpoint_sites,
+            'group': self.api_endpoint_groups
+        }
+        return f"{api_endpoints[scope_type]}/{scope_id}/{action}"
+
+    def get_scope_policy(self, scope_type: str, scope_id: str, module: AnsibleModule):
+        """
+        Get the policy of a scope from API. Every policy is only read once
+
+        :param scope_type: account, site or group
+        :type scope_type: str
+        :param scope_id: Id of the account, site or group
+        :type scope_id: str
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Policy object
+        :rtype: dict
+        """
+
+        cache_key = (scope_type, scope_id)
+        if cache_key not in self.policy_cache:
+            api_url = self.get_policy_api_url(scope_type, scope_id)
+            error_msg = f"Failed to get current policy for {scope_type} with id {scope_id}."
+            response = self.api_call(module, api_url, error_msg=error_msg)
+            self.policy_cache[cache_key] = response['data']
+
+        return self.policy_cache[cache_key]
+
+    def update_policy(self, scope_type: str, scope_id: str, update_body: dict, module: AnsibleModule):
+        """
+        API call to update the policy. Can be used on site or group level
+
+        :param scope_type: site or group
+        :type scope_type: str
+        :param scope_id: Site or group id
+        :type scope_id: str
+        :param update_body: Dictionary object which is used for updating the existing policy object
+        :type update_body: dict
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: API response
+        :rtype: dict
+        """
+
+        api_url = self.get_policy_api_url(scope_type, scope_id)
+
+        error_msg = f"Failed to update policy with {scope_type} id {scope_id}."
+        response = self.api_call(module, api_url, "PUT", body=update_body, error_msg=error_msg)
+
+        if not response['data']:
+            module.fail_json(msg=(f"Error in update_policy with {scope_type} id {scope_id}: Policy should have "
+                                  "been updated via API but result was empty"))
+
+        return response
+
+    def revert_policy(self, scope_type: str, scope_id: str, module: AnsibleModule):
+        """
+        API-call to enable policy inheritance. Can be used on site or group level
+
+        :param scope_type: site or group
+        :type scope_type: str
+        :param scope_id: site or group id
+        :type scope_id: str
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: API response
+        :rtype: dict
+        """
+
+        api_url = self.get_policy_api_url(scope_type, scope_id, "revert-policy")
+        error_msg = f"Failed to revert policy with {scope_type} id {scope_id}."
+        response = self.api_call(module, api_url, "PUT", error_msg=error_msg)
+
+        if not response['data']['success']:
+            module.fail_json(msg=(f"Error in revert_policy with {scope_type} id {scope_id}: Policy should have "
+                                  "been updated via API but result was empty"))
+
+        return response
+
+    @staticmethod
+    def get_update_body(policy_settings: dict):
+        """
+        Prepare the changed policy settings for the put request. The API accepts partial policy objects, so only the
+        changed settings are sent
+
+        :param policy_settings: changed policy settings (see get_changed_subtree)
+        :type policy_settings: dict
+        :return: update body for API
+        :rtype: dict
+        """
+
+        # Remove deprecated policy settings. The module would not work correctly in some circumstances
+        policy_settings.pop('agentNotification', None)
+        policy_settings.pop('agentUiOn', None)
+
+        policy_object = {'data': policy_settings}
+
+        return policy_object
+
+    def get_policy_settings(self, policy: dict):
+        """
+        Returns the policy without the keys in policy_metadata_keys
+
+        :param policy: Policy object
+        :type policy: dict
+        :return: Settings of the policy
+        :rtype: dict
+        """
+
+        return {key: value for key, value in policy.items() if key not in self.policy_metadata_keys}
+
+    def policies_equal(self, policy: dict, other_policy: dict):
+        """
+        Check if two policies configure the agents the same way. Values of different types (e.g. 1 and True) are not
+        equal, like in the comparisons of the other policy modules
+
+        :param policy: First policy object
+        :type policy: dict
+        :param other_policy: Second policy object
+        :type other_policy: dict
+        :rtype: bool
+        """
+
+        return not self.values_differ(self.get_policy_settings(policy), self.get_policy_settings(other_policy))
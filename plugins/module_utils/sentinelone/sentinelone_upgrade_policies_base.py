@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from datetime import datetime
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six.moves.urllib.parse import quote_plus
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+
+
+class SentineloneUpgradePoliciesBase(SentineloneBase):
+    # Keys of the upgrade policy objects which describe who changed the upgrade policy and not how the agents are
+    # upgraded. They are not available in the update API endpoint and are removed before upgrade policies are compared
+    upgrade_policy_metadata_keys = ['concurrencyConfigUpdatedAt', 'concurrencyConfigUpdatedBy',
+                                    'maintenanceConfigUpdatedAt', 'maintenanceConfigUpdatedBy',
+                                    'parentMaxConcurrent', 'taskType']
+    # Timezones which can be set in upgrade policies
+    valid_timezones = ["-11:00", "-10:00", "-09:30", "-09:00", "-08:00", "-07:00", "-06:00", "-05:00", "-04:00",
+                       "-03:30", "-03:00", "-02:00", "-01:00", "+00:00", "+01:00", "+02:00", "+03:00", "+03:30",
+                       "+04:00", "+04:30", "05:00", "+05:30", "+05:45", "+06:00", "+06:30", "+07:00", "+08:00",
+                       "+08:45", "+09:00", "+09:30", "+10:00", "+10:30", "+11:00", "+12:00", "+13:00", "+13:45",
+                       "+14:00"]
+    # Format of the from and to values of maintenance windows, e.g. "8:00 am"
+    maintenance_time_format = "%I:%M %p"
+    # Keys of maintenanceWindowsByDay in the order of the week
+    week_days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+    def get_upgrade_policy(self, scope_type: str, scope_id: str, module: AnsibleModule):
+        """
+        Get the upgrade policy which is currently set from API. Can be used on site or group scope
+
+        :param scope_type: site or group
+        :type scope_type: str
+        :param scope_id: Site or group id
+        :type scope_id: str
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Upgrade Policy object
+        :rtype: dict
+        """
+
+        scope_filter = "groupIds" if scope_type == "group" else "siteIds"
+        api_url = f"{self.api_endpoint_upgrade_policy}?taskType=agents_upgrade&{scope_filter}={quote_plus(scope_id)}"
+
+        error_msg = f"Failed to get current upgrade policy for {scope_type} with id {scope_id}."
+        response = self.api_call(module, api_url, error_msg=error_msg)
+
+        return response
+
+    def get_upgrade_policies(self, scope_type: str, scope_ids: list, module: AnsibleModule):
+        """
+        Get the upgrade policies of several sites or groups from API. The requests are sent in parallel
+
+        :param scope_type: site or group
+        :type scope_type: str
+        :param scope_ids: Site or group ids
+        :type scope_ids: list
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Upgrade Policy objects in the order of scope_ids
+        :rtype: list
+        """
+
+        return self.run_parallel(module, lambda worker_module, scope_id: self.get_upgrade_policy(
+            scope_type, scope_id, worker_module), scope_ids)
+
+    def update_upgrade_policy(self, site_group_ids: list, update_body: dict, module: AnsibleModule):
+        """
+        API call to update the upgrade policy. Can be used on site or group level
+
+        :param site_group_ids: Site id or group ids in the filter of update_body
+        :type site_group_ids: list
+        :param update_body: Dictionary object which is used for updating the existing upgrade policy object
+        :type update_body: dict
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: API response
+        :rtype: dict
+        """
+
+        api_url = self.api_endpoint_upgrade_policy
+
+        site_group_ids_str = ', '.join(site_group_ids)
+        error_msg = f"Failed to update the upgrade policy with site or group ids {site_group_ids_str}."
+        response = self.api_call(module, api_url, "PUT", body=update_body, error_msg=error_msg)
+
+        if not response['data']:
+            module.fail_json(msg=(f"Error in update_upgrade_policy with site or group ids {site_group_ids_str}: "
+                                  f"Upgrade policy should have been updated via API but result was empty"))
+
+        return response
+
+    def clean_current_upgrade_policy_object(self, upgrade_policy_object: dict):
+        """
+        Remove unnecessary keys from object for comparision with the desired state object
+
+        :param upgrade_policy_object: object from which the keys should be removed
+        :type upgrade_policy_object: dict
+        """
+
+        # Some items in current_upgrade_policy are not necessary to compare and these keys make the comparison unusable.
+        # They are not available in the update the upgrade policy API endpoint and needs to be removed
+        for key in self.upgrade_policy_metadata_keys:
+            upgrade_policy_object["data"].pop(key, None)
+
+    @classmethod
+    def parse_maintenance_time(cls, time_value: str):
+        """
+        Convert the from or to value of a maintenance window to minutes since midnight
+
+        :param time_value: Time in the format of maintenance windows, e.g. "8:00 am"
+        :type time_value: str
+        :return: Minutes since midnight
+        :rtype: int
+        """
+
+        parsed_time = datetime.strptime(time_value, cls.maintenance_time_format)
+        return parsed_time.hour * 60 + parsed_time.minute
+
+    @staticmethod
+    def get_timezone_offset(timezone_gmt: str):
+        """
+        Convert the timezoneGmt value of an upgrade policy to the offset to UTC in minutes
+
+        :param timezone_gmt: Timezone as returned by the API, e.g. "GMT+05:30"
+        :type timezone_gmt: str
+        :return: Offset to UTC in minutes
+        :rtype: int
+        """
+
+        timezone = timezone_gmt[3:] if timezone_gmt.startswith("GMT") else timezone_gmt
+        sign = -1 if timezone.startswith("-") else 1
+        hours, minutes = timezone.lstrip("+-").split(":")
+        return sign * (int(hours) * 60 + int(minutes))
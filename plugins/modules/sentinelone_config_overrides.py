@@ -18,6 +18,7 @@ description:
   - "These three parameters are the identifiers of the config override"
   - "If I(state=present) you can create or update the override object."
   - "If you update an existing override your config_overide settings will be merged into the existing data."
+  - "Existing overrides are updated in place. Only the changed keys are sent, the config is sent as a whole."
   - "You can also rename the config override or change the description."
   - "If I(state=absent) the data specified via the config_override parameter will be removed from the current override object."
   - "If I(state=prune) the whole override object will be deleted."
@@ -96,6 +97,8 @@ options:
     type: str
     required: false
     default: ""
+extends_documentation_fragment:
+  - sva.sentinelone.diff_detail
 author:
   - "Marco Wester (@mwester117) <marco.wester@sva.de>"
 requirements:
@@ -158,10 +161,13 @@ EXAMPLES = r'''
 RETURN = r'''
 ---
 original_message:
-    description: Get detailed infos about the changes made
-    type: str
+    description:
+      - Get detailed infos about the changes made
+      - The changes are reported in the level of detail set by I(diff_detail). The sample shows the default C(summary).
+        The old and new values are only returned with I(diff_detail=full)
+    type: dict
     returned: on success
-    sample: {"changes": "Creating non existing site level config override: test", "siteId": "99999999999999"}
+    sample: {"changes": {"values_changed": 1, "dictionary_item_added": 2}, "siteId": "99999999999999"}
 message:
     description: Get basic infos about the changes made
     type: list
@@ -172,10 +178,13 @@ message:
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase, lib_imp_errors
 from ansible.module_utils.six.moves.urllib.parse import quote_plus
-import copy
 
 
 class SentineloneConfigOverrides(SentineloneBase):
+    # Keys of the config override object which can not be changed by the update API endpoint. If one of them changes
+    # the config override is deleted and created again
+    immutable_keys = ['osType', 'scope', 'site', 'group', 'account', 'versionOption', 'agentVersion']
+
     def __init__(self, module: AnsibleModule):
         """
         Initialization of the ConfigOverrides object
@@ -378,6 +387,82 @@ class SentineloneConfigOverrides(SentineloneBase):
 
         return basic_message, diffs
 
+    def update_config_override(self, current_config_override_id: str, update_body: dict, module: AnsibleModule):
+        """
+        API call to update the existing config override in place
+
+        :param current_config_override_id: id of the config override which should be updated
+        :type current_config_override_id: str
+        :param update_body: Body for the update API call
+        :type update_body: dict
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: API response
+        :rtype: dict
+        """
+
+        api_url = f"{self.api_endpoint_config_overrides}/{current_config_override_id}"
+        error_msg = "Failed to update config override."
+        response = self.api_call(module, api_url, "PUT", body=update_body, error_msg=error_msg)
+
+        if not response['data']:
+            module.fail_json(msg=("Error in update_config_override: config override should have been updated via API "
+                                  "but API result was empty"))
+
+        return response
+
+    def get_update_body(self, current_config_override_obj: dict, new_config_override_obj: dict):
+        """
+        Create the body for the update API call. Only the changed top level keys are sent. The config is always sent
+        as a whole because the API replaces it
+
+        :param current_config_override_obj: object containing the current config override
+        :type current_config_override_obj: dict
+        :param new_config_override_obj: object of the new config override
+        :type new_config_override_obj: dict
+        :return: Update body or None if an immutable key changed and the config override needs to be recreated
+        :rtype: dict
+        """
+
+        update_data = {}
+        for key, value in new_config_override_obj.items():
+            current_value = current_config_override_obj.get(key)
+            if key == 'id' or not self.values_differ(current_value, value):
+                continue
+            if key in self.immutable_keys:
+                if current_value is None:
+                    # Not returned by the API. The current config override was queried with the desired scope, os
+                    # type and agent version, so it already has the desired value
+                    continue
+                return None
+            update_data[key] = value
+
+        return {'data': update_data}
+
+    def apply_config_override(self, current_config_override_obj: dict, new_config_override_obj: dict,
+                              module: AnsibleModule):
+        """
+        Creates the config override if it does not exist yet. Otherwise, it is updated in place. It is only recreated
+        if an immutable key changed
+
+        :param current_config_override_obj: object containing the current config override. Empty if it does not exist
+        :type current_config_override_obj: dict
+        :param new_config_override_obj: object of the new config override
+        :type new_config_override_obj: dict
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        """
+
+        current_config_override_id = current_config_override_obj.get('id', None)
+        update_body = None
+        if current_config_override_id:
+            update_body = self.get_update_body(current_config_override_obj, new_config_override_obj)
+
+        if update_body is None:
+            self.recreate_config_override(current_config_override_id, new_config_override_obj, module)
+        else:
+            self.update_config_override(current_config_override_id, update_body, module)
+
     def recreate_config_override(self, current_config_override_id: str, new_config_override_obj: dict,
                                  module: AnsibleModule):
         """
@@ -410,7 +495,8 @@ def run_module():
         os_type=dict(type='str', required=True, choices=['windows', 'linux']),
         agent_version=dict(type='str', required=False, default="ALL"),
         config_override=dict(type='dict', required=False),
-        description=dict(type='str', required=False, default="")
+        description=dict(type='str', required=False, default=""),
+        diff_detail=dict(type='str', required=False, default='summary', choices=['none', 'summary', 'paths', 'full']),
     )
 
     module = AnsibleModule(
@@ -447,7 +533,7 @@ def run_module():
             if current_config_override_obj:
                 if diff:
                     # if group config override is different from desired state, update it
-                    diffs = {'changes': dict(diff), 'groupId': group_id}
+                    diffs = {'changes': config_override_obj.format_diff(diff), 'groupId': group_id}
                     basic_message = f"Config override {override_name} for group {group_name} updated"
             else:
                 diffs = {'changes': f"Non existing config override {override_name} created",
@@ -465,7 +551,7 @@ def run_module():
             if current_config_override_obj:
                 if diff:
                     # if site config override is different from desired state, update it
-                    diffs = {'changes': dict(diff), 'SiteId': site_id}
+                    diffs = {'changes': config_override_obj.format_diff(diff), 'SiteId': site_id}
                     basic_message = f"Config override {override_name} for site {site_name} updated"
             else:
                 diffs = {'changes': f"Non existing config override {override_name} created",
@@ -473,19 +559,17 @@ def run_module():
                 basic_message = f"Non existing config override {override_name} for site {site_name} created"
 
         if diffs:
-            # Delete and recreate the config override object if changes were made to the object
-            config_override_obj.recreate_config_override(current_config_override_id, merged_config_override, module)
+            # Create or update the config override object if changes were made to the object
+            config_override_obj.apply_config_override(current_config_override_obj, merged_config_override, module)
 
     elif state == "absent":
         if current_config_override_obj:
-            # DeepCopy to be able to check if changes were made
-            new_config_override_obj = copy.deepcopy(current_config_override_obj)
             current_config_override = current_config_override_obj['config']
-            # Pointer to the subobject in 'config'.
-            # Updates in new_config_override will also affect new_config_override_obj['config']
-            new_config_override = new_config_override_obj['config']
             delete_config_override = config_override_obj.config_override
-            config_override_obj.remove_dict_from_dict(new_config_override, delete_config_override)
+            # remove_dict_copy leaves current_config_override untouched to be able to check if changes were made. Only
+            # the changed parts of the config are copied instead of deep copying the whole config override object
+            new_config_override = config_override_obj.remove_dict_copy(current_config_override, delete_config_override)
+            new_config_override_obj = dict(current_config_override_obj, config=new_config_override)
             diff = config_override_obj.compare(current_config_override, new_config_override)
             if not new_config_override:
                 # Delete the whole config override object if new_config_override is empty. This meens the passed
@@ -493,17 +577,17 @@ def run_module():
                 basic_message, diffs = config_override_obj.prune_config_override(current_config_override_id,
                                                                                  current_config_override_obj, module)
             elif diff:
-                # Delete and recreate the config override object if changes were made to the object
-                config_override_obj.recreate_config_override(current_config_override_id, new_config_override_obj,
-                                                             module)
+                # Update the config override object if changes were made to the object
+                config_override_obj.apply_config_override(current_config_override_obj, new_config_override_obj,
+                                                          module)
                 if group_id:
-                    diffs = {'changes': dict(diff), 'groupId': group_id}
+                    diffs = {'changes': config_override_obj.format_diff(diff), 'groupId': group_id}
                     basic_message = f"Config override settings from existing config override for " \
                                     f"group {group_id} removed"
                 else:
                     site_name = config_override_obj.site_name
                     site_id = config_override_obj.site_id
-                    diffs = {'changes': dict(diff), 'siteId': site_id}
+                    diffs = {'changes': config_override_obj.format_diff(diff), 'siteId': site_id}
                     basic_message = f"Config override settings from existing config override for " \
                                     f"site {site_name} removed"
     else:
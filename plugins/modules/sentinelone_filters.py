@@ -49,6 +49,8 @@ options:
       - "e.g. computerName__contains or osTypes"
     type: dict
     required: false
+extends_documentation_fragment:
+  - sva.sentinelone.diff_detail
 author:
   - "Marco Wester (@mwester117) <marco.wester@sva.de>"
 requirements:
@@ -97,10 +99,13 @@ EXAMPLES = r'''
 RETURN = r'''
 ---
 original_message:
-    description: Get detailed infos about the changes made
-    type: str
+    description:
+      - Get detailed infos about the changes made
+      - The changes are reported in the level of detail set by I(diff_detail). The sample shows the default C(summary).
+        The old and new values are only returned with I(diff_detail=full)
+    type: dict
     returned: on success
-    sample: {"changes": {"iterable_item_added": {"root['computerName__contains'][1]": "test123"}}, "siteName": "msd"}
+    sample: {"changes": {"iterable_item_added": 1}, "siteName": "msd"}
 message:
     description: Get basic infos about the changes made
     type: str
@@ -243,6 +248,7 @@ def run_module():
         site_name=dict(type='str', required=True),
         name=dict(type='str', required=True),
         filter_fields=dict(type='dict', required=False),
+        diff_detail=dict(type='str', required=False, default='summary', choices=['none', 'summary', 'paths', 'full']),
     )
 
     module = AnsibleModule(
@@ -273,7 +279,7 @@ def run_module():
             diff = filter_obj.merge_compare(current_filter_fields, desired_state_filter_fields)[0]
             if diff:
                 # Update filter if it is not up-to-date
-                diffs = {'changes': dict(diff), 'siteName': site_name}
+                diffs = {'changes': filter_obj.format_diff(diff), 'siteName': site_name}
                 basic_message = f'Filter exists in site {site_name} but is not up-to-date. Updating Filter.'
                 filter_obj.update_filter(module)
         else:
@@ -13,6 +13,7 @@ short_description: "Manage SentinelOne Groups"
 version_added: "1.0.0"
 description:
   - "This module is able to create, update and delete static and dynamic groups in SentinelOne"
+  - "The groups of the site are listed once and compared by their exact name"
 options:
   console_url:
     description:
@@ -51,6 +52,23 @@ options:
     type: str
     required: false
     default: ""
+  exclusive:
+    description:
+      - "If yes, all static groups of the site which are not passed in I(name) are deleted. Dynamic groups and the
+        default group of the site are never deleted"
+      - "Only used with I(state=present)"
+    type: bool
+    required: false
+    default: no
+  parallel_requests:
+    description:
+      - "Maximum count of API requests which are sent at the same time if several groups are changed"
+      - "A failed request does not stop the other requests. The errors of all failed requests are reported together"
+    type: int
+    required: false
+    default: 5
+extends_documentation_fragment:
+  - sva.sentinelone.diff_detail
 author:
   - "Marco Wester (@mwester117) <marco.wester@sva.de>"
 requirements:
@@ -92,6 +110,17 @@ EXAMPLES = r'''
       - "MyGroup2"
       - "MyGroup3"
 
+- name: Make sure only these static groups exist in the site. All other static groups are deleted
+  sva.sentinelone.sentinelone_groups:
+    state: "present"
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    name:
+      - "MyGroup1"
+      - "MyGroup2"
+    exclusive: true
+
 - name: Delete single static/dynamic group
   sva.sentinelone.sentinelone_groups:
     state: "absent"
@@ -115,11 +144,13 @@ EXAMPLES = r'''
 RETURN = r'''
 ---
 original_message:
-    description: Get detailed infos about the changes made
-    type: str
+    description:
+      - Get detailed infos about the changes made
+      - The changes are reported in the level of detail set by I(diff_detail). The sample shows the default C(summary).
+        The old and new values are only returned with I(diff_detail=full)
+    type: list
     returned: on success
-    sample: [{"changes": {"values_changed": {"root['filterId']":
-    {"new_value": "999999999999999999", "old_value": "888888888888888888"}}}, "groupName": "test123"}]
+    sample: [{"changes": {"values_changed": 1}, "groupName": "test123"}]
 message:
     description: Get basic infos about the changes made
     type: list
@@ -129,10 +160,12 @@ message:
 
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase, lib_imp_errors
-from ansible.module_utils.six.moves.urllib.parse import quote_plus
 
 
 class SentineloneGroups(SentineloneBase):
+    # Keys of the group objects which are needed to compare, update and delete the groups
+    group_keys = ['id', 'name', 'type', 'siteId', 'filterId', 'inherits', 'isDefault']
+
     def __init__(self, module: AnsibleModule):
         """
         Initialization of the groups object
@@ -148,11 +181,13 @@ class SentineloneGroups(SentineloneBase):
         # Set module specific parameters
         self.group_names = module.params["name"]
         self.filter_name = module.params["filter_name"]
+        self.exclusive = module.params["exclusive"]
 
         # Do sanity checks
         self.check_sanity(self.state, self.group_names, self.filter_name, module)
 
-        self.current_groups = self.get_groups(self.group_names, module)
+        # All groups of the site. Reduced to the keys in group_keys
+        self.current_groups = self.get_groups(module)
         if self.filter_name:
             # check if given filter for dynamic group exists
             self.filter_obj = self.get_current_filter(self.filter_name, module)
@@ -160,29 +195,28 @@ class SentineloneGroups(SentineloneBase):
                 module.fail_json(msg=f"Error: Filter {self.filter_name} does not exist.")
             self.filter_id = self.filter_obj['id']
 
-    def get_groups(self, group_names: list, module: AnsibleModule):
+    def get_groups(self, module: AnsibleModule):
         """
-        API call to get the existing group objects
+        Get all group objects of the site with one paginated listing
 
-        :param group_names: name of the groups to get
-        :type group_names: list
         :param module: Ansible module for error handling
         :type module: AnsibleModule
-        :return: List of group objects
-        :rtype: list
+        :return: Dictionary with the group name as key and the group object as value. Reduced to the keys in group_keys
+        :rtype: dict
         """
 
-        current_groups = []
-        for group_name in group_names:
-            api_url = self.api_endpoint_groups + (f"?siteIds={self.site_id}&"
-                                                  f"name={quote_plus(group_name)}")
-            error_msg = f"Failed to query group {group_name} from API"
-            response = self.api_call(module, api_url, error_msg=error_msg)
+        return self.get_group_index(module)
 
-            if response['pagination']['totalItems'] > 0:
-                current_groups.append(response['data'][0])
+    def get_unmanaged_groups(self):
+        """
+        Returns the static groups of the site which are not in group_names. The default group is never returned
 
-        return current_groups
+        :return: List of group objects
+        :rtype: list
+        """
+
+        return [group for group_name, group in self.current_groups.items()
+                if group_name not in self.group_names and group.get('type') == 'static' and not group.get('isDefault')]
 
     def get_desired_state_group_body(self, group_name: str):
         """
@@ -306,6 +340,9 @@ def run_module():
         site_name=dict(type='str', required=True),
         name=dict(type='list', required=True, elements='str'),
         filter_name=dict(type='str', required=False, default=""),
+        exclusive=dict(type='bool', required=False, default=False),
+        diff_detail=dict(type='str', required=False, default='summary', choices=['none', 'summary', 'paths', 'full']),
+        parallel_requests=dict(type='int', required=False, default=5),
     )
 
     module = AnsibleModule(
@@ -326,47 +363,79 @@ def run_module():
 
     diffs = []
     basic_message = []
+    # The changes are collected first and sent in parallel afterwards. List of tuples of the write (method and its
+    # arguments without the module, or None if nothing is sent), diff (or None) and message in the order of the messages
+    changes = []
 
     if state == 'present':
         for group_name in group_names:
             # Check if group exists
             desired_state_group = groups_obj.get_desired_state_group_body(group_name)
-            current_group = list(filter(lambda filterobj: filterobj['name'] == group_name, current_groups))
+            current_group = current_groups.get(group_name)
             if current_group:
                 # Group exists. Check if it differs from desired state, ignoring inhertiance property.
-                diff = groups_obj.merge_compare(current_group[0], desired_state_group['data'], ["root['inherits']"])[0]
+                diff = groups_obj.merge_compare(current_group, desired_state_group['data'], ["root['inherits']"])[0]
                 # Check if diff exists and do not want to convert dynamic to static group and vice versa
                 if diff:
-                    if ((current_group[0]['type'] == 'dynamic' and module.params['filter_name']) or
-                            (current_group[0]['type'] == 'static' and not module.params['filter_name'])):
-                        group_id = current_group[0]['id']
+                    if ((current_group['type'] == 'dynamic' and module.params['filter_name']) or
+                            (current_group['type'] == 'static' and not module.params['filter_name'])):
+                        group_id = current_group['id']
                         # Inheritance and policy should not be maintained by this module.
                         # Removing the key because if not the module will update the inherintance property
                         del desired_state_group['data']['inherits']
                         error_msg = f"Failed to update group {group_name}."
-                        groups_obj.update_group(desired_state_group, group_id, error_msg, module)
-                        basic_message.append(f"Group {group_name} updated")
-                        diffs.append({'changes': dict(diff), 'groupName': group_name})
+                        changes.append(((groups_obj.update_group, (desired_state_group, group_id, error_msg)),
+                                        {'changes': groups_obj.format_diff(diff), 'groupName': group_name},
+                                        f"Group {group_name} updated"))
                     else:
-                        basic_message.append("Can not convert dynamic to static group and vice versa. Nothing changed.")
+                        changes.append((None, None,
+                                        "Can not convert dynamic to static group and vice versa. Nothing changed."))
             else:
                 # Group does not exist. Creating the group
                 error_msg = f"Failed to create group {group_name}."
-                groups_obj.create_group(desired_state_group, error_msg, module)
-                basic_message.append(f"Group {group_name} created.")
-                diffs.append({'changes': "Group created", 'groupName': group_name})
+                changes.append(((groups_obj.create_group, (desired_state_group, error_msg)),
+                                {'changes': "Group created", 'groupName': group_name},
+                                f"Group {group_name} created."))
+
+        if groups_obj.exclusive:
+            # Remove the static groups which are not managed by this task
+            for unmanaged_group in groups_obj.get_unmanaged_groups():
+                group_name = unmanaged_group['name']
+                error_msg = f"Failed to delete group {group_name}."
+                changes.append(((groups_obj.delete_group, (unmanaged_group['id'], error_msg)),
+                                {'changes': 'Group deleted', 'groupName': group_name},
+                                f"Group {group_name} is not in name. Group deleted."))
     else:
         # state is set to absent. Removing the group if exist
         for group_name in group_names:
             # check if group exits
-            current_group = list(filter(lambda filterobj: filterobj['name'] == group_name, current_groups))
+            current_group = current_groups.get(group_name)
             if current_group:
                 # if group exists delete it
                 error_msg = f"Failed to delete group {group_name}."
-                group_id = current_group[0]['id']
-                groups_obj.delete_group(group_id, error_msg, module)
-                basic_message.append(f"Group {group_name} deleted.")
-                diffs.append({'changes': 'Group deleted', 'groupName': group_name})
+                group_id = current_group['id']
+                changes.append(((groups_obj.delete_group, (group_id, error_msg)),
+                                {'changes': 'Group deleted', 'groupName': group_name},
+                                f"Group {group_name} deleted."))
+
+    # The API takes one group per request. Creates, updates and deletes are sent in one batch, so a failed request does
+    # not stop the others. The errors of all failed requests are reported together
+    writes = [write for write, diff, message in changes if write is not None]
+    write_results = iter(groups_obj.run_parallel_results(module, lambda worker_module, write: write[0](
+        *write[1], worker_module), writes))
+    errors = []
+    for write, diff, message in changes:
+        if write is not None:
+            response, error = next(write_results)
+            if error is not None:
+                errors.append(error)
+                continue
+            diffs.append(diff)
+        basic_message.append(message)
+    if errors:
+        # Report the groups which were changed before failing
+        module.fail_json(msg=groups_obj.get_parallel_error_msg(errors, len(writes)), changed=bool(diffs),
+                         original_message=diffs, message=basic_message)
 
     result = dict(
         changed=False,
@@ -95,6 +95,14 @@ options:
     type: str
     required: false
     default: ""
+  parallel_requests:
+    description:
+      - "Maximum count of API requests which are sent at the same time if several exclusions are changed"
+    type: int
+    required: false
+    default: 5
+extends_documentation_fragment:
+  - sva.sentinelone.diff_detail
 author:
   - "Marco Wester (@mwester117) <marco.wester@sva.de>"
   - "Lasse Wackers (@mordecaine) <lasse.wackers@sva.de>"
@@ -174,25 +182,26 @@ EXAMPLES = r'''
 RETURN = r'''
 ---
 original_message:
-    description: Get detailed infos about the changes made
+    description:
+      - Get detailed infos about the changes made
+      - The changes are reported in the level of detail set by I(diff_detail). The sample shows the default C(summary).
+        The old and new values are only returned with I(diff_detail=full)
     returned: on success
-    type: str
-    sample: [{"changes": {"values_changed": {"root['mode']":
-    {"new_value": "disable_all_monitors_deep", "old_value": "disable_all_monitors"}}}, "siteId": ["99999999999999999"]}]
+    type: list
+    sample: [{"changes": {"values_changed": 1}, "siteId": ["99999999999999999"], "exclusion_id": "99999999999999999"}]
 message:
     description: Get basic infos about the changes made
     returned: on success
     type: list
-    sample: [ "Exclusion is missing in a group. Creating exclusion." ]
+    sample: [ "Exclusion is missing in group MariaDB. Creating exclusion." ]
 '''
 
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
-from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase, lib_imp_errors
-from ansible.module_utils.six.moves.urllib.parse import quote_plus
-from ansible.module_utils.urls import re
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import lib_imp_errors
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_exclusions_base import SentineloneExclusionsBase
 
 
-class SentineloneExclusions(SentineloneBase):
+class SentineloneExclusions(SentineloneExclusionsBase):
     def __init__(self, module: AnsibleModule):
         """
         Initialization of the Exclusions object
@@ -229,83 +238,7 @@ class SentineloneExclusions(SentineloneBase):
         self.desired_state_exclusion = self.get_desired_state_exclusion_body()
         self.current_exclusions = self.get_current_exclusions(self.current_group_ids, self.exclusion_path, module)
 
-        self.current_exclusion_ids = list(map(lambda exclusion: exclusion['id'], self.current_exclusions['data']))
-
-    @staticmethod
-    def get_mode_name(mode: str, os_type: str, state: str, module: AnsibleModule):
-        """
-        Map the web UI exclusion mode names to API names
-
-        :param mode: The mode which should be set for the exclusion
-        :type mode: str
-        :param os_type: The os for which the exclusion will be created
-        :type os_type: str
-        :param state: Present or absent
-        :type state: str
-        :param module: Ansible module for error handling
-        :type module: AnsibleModule
-        :return: API mapping of the exclusion mode
-        :rtype: str
-        """
-
-        if mode == "suppress_alerts":
-            return "suppress"
-        elif mode == "interoperability" and os_type == "windows":
-            return "disable_in_process_monitor"
-        elif mode == "interoperability_extended" and os_type == "windows":
-            return "disable_in_process_monitor_deep"
-        elif mode == "performance_focus":
-            return "disable_all_monitors"
-        elif mode == "performance_focus_extended":
-            return "disable_all_monitors_deep"
-        elif state == "present":
-            module.fail_json(msg=f"The mode {mode} is not compatible with os {os_type}")
-
-    @staticmethod
-    def get_path_exclusion_type(include_subfolders: bool, exclusion_path: str):
-        """
-        Set path exclusion type. If trailing slash or backslash is present path is handled as a folder. Here you can
-        optionally enable recursive exclusion with include_subfolders. If trailing slash or backslash is not present it
-        is automatically handeled as file type exclusion
-
-        :param include_subfolders: True if exclusion should match subfolders. False if not
-        :type include_subfolders: bool
-        :param exclusion_path: Path wich should be excluded
-        :type exclusion_path: str
-        :return: API mapping for the exclusion type
-        :rtype: str
-        """
-
-        # Get path type (folder or file)
-        if re.search(r"[/\\]$", exclusion_path) and not include_subfolders:
-            path_exclusion_type = "folder"
-        elif re.search(r"[/\\]$", exclusion_path) and include_subfolders:
-            path_exclusion_type = "subfolders"
-        else:
-            path_exclusion_type = "file"
-
-        return path_exclusion_type
-
-    @staticmethod
-    def get_actions(ef_alerts_mitigation: bool, ef_binary_vault: bool):
-        """
-        Set actions for Exclusion Function
-
-        :param ef_alerts_mitigation: Enable or disable exclusion for alerts and mitigation
-        :type ef_alerts_mitigation:  bool
-        :param ef_binary_vault: Enable or disable Binary Vault uploads
-        :type ef_binary_vault: bool
-        :return: API mapping for exclusion functions
-        :rtype: list
-        """
-
-        actions = []
-        if ef_alerts_mitigation:
-            actions.append("detect")
-        if ef_binary_vault:
-            actions.append("upload")
-
-        return actions
+        self.current_exclusion_ids = list(map(lambda exclusion: exclusion['id'], self.current_exclusions))
 
     def get_desired_state_exclusion_body(self):
         """
@@ -335,30 +268,12 @@ class SentineloneExclusions(SentineloneBase):
 
         return desired_state_exclusion
 
-    @staticmethod
-    def get_delete_exclusion_body(current_exclusion_ids: list):
-        """
-        Delete API object
-
-        :param current_exclusion_ids: Ids of the exclsions which schould be deleted
-        :type current_exclusion_ids: list
-        :return: API body for delete request
-        :rtype: dict
-        """
-
-        delete_body = {
-            "data": {
-                "ids": current_exclusion_ids,
-                "type": "path"
-            }
-        }
-
-        return delete_body
-
     def get_current_exclusions(self, current_group_ids: list, exclusion_path: str, module: AnsibleModule):
         """
         Get currently existing exclusion objects from API. If in group scope it returns the exclusion object for every
-        group where the exclusion exists
+        group where the exclusion exists. The API only lists the exclusions of the os type whose value contains the last
+        component of the path. They are matched with the normalized path (see get_exclusion_key), so paths which only
+        differ in case (windows) or separators are found as well
 
         :param current_group_ids: Group ids of the groups where the exclusion should exist
         :type current_group_ids: list
@@ -366,23 +281,22 @@ class SentineloneExclusions(SentineloneBase):
         :type exclusion_path: str
         :param module: Ansible module for error handling
         :type module: AnsibleModule
-        :return: API response with exclusion objects if existing
-        :rtype: dict
+        :return: List of the existing exclusion objects. Reduced to the keys needed for the comparison
+        :rtype: list
         """
 
-        api_url = self.api_endpoint_exclusions + (f"?siteIds={quote_plus(self.site_id)}&"
-                                                  f"value={quote_plus(exclusion_path)}&"
-                                                  f"osTypes={quote_plus(self.os_type)}&"
-                                                  f"type=path"
-                                                  )
-        if current_group_ids:
-            # Scope is group level
-            api_url += f"&groupIds={quote_plus(','.join(current_group_ids))}"
+        # os_type is optional if state is absent. Then the exclusions of every os are matched
+        os_types = [self.os_type] if self.os_type else ['windows', 'linux']
+        wanted_keys = [self.get_exclusion_key(exclusion_path, os_type) for os_type in os_types]
+        exclusion_index = self.get_exclusion_index(current_group_ids, module, wanted_keys=set(wanted_keys),
+                                                   value_contains=self.get_path_filter(exclusion_path),
+                                                   os_types=os_types)
 
-        error_msg = "Failed to get current exclusions."
-        response = self.api_call(module, api_url, error_msg=error_msg)
+        current_exclusions = []
+        for wanted_key in wanted_keys:
+            current_exclusions.extend(exclusion_index.get(wanted_key, []))
 
-        return response
+        return current_exclusions
 
     def delete_exclusions(self, module: AnsibleModule):
         """
@@ -427,42 +341,29 @@ class SentineloneExclusions(SentineloneBase):
 
         return response
 
-    def create_exclusions(self, module: AnsibleModule):
+    def create_exclusions(self, module: AnsibleModule, group_ids: list = None):
         """
         Create exclusions
 
         :param module: Ansible module for error handling
         :type module: AnsibleModule
+        :param group_ids: Optional parameter. Only create the exclusion in these groups instead of all groups
+        :type group_ids: list
         :return: API response of the create query
         :rtype: dict
         """
         api_url = self.api_endpoint_exclusions
         create_body = self.get_desired_state_exclusion_body()
+        if group_ids:
+            create_body['filter']['groupIds'] = group_ids
         error_msg = "Failed to create exclusions."
         response = self.api_call(module, api_url, "POST", body=create_body, error_msg=error_msg)
 
         if len(response['data']) == 0:
-            module.fail_json(msg="Exclusions should have been deleted via API but API result was empty")
+            module.fail_json(msg="Exclusions could not be created - API result was empty")
 
         return response
 
-    @staticmethod
-    def check_sanity(ef_alerts_mitigation: bool, ef_binary_vault: bool, module: AnsibleModule):
-        """
-        Check if the passed module arguments are contradicting each other
-
-        :param ef_alerts_mitigation: Enable or disable exclusion for alerts and mitigation
-        :type ef_alerts_mitigation: bool
-        :param ef_binary_vault: Enable or disable Binary Vault uploads
-        :type ef_binary_vault: bool
-        :param module: Ansible module for error handling
-        :type module: AnsibleModule
-        """
-
-        # Check if at least one of ef_alerts_mitigation and ef_binary_vault is true
-        if not ef_alerts_mitigation and not ef_binary_vault:
-            module.fail_json(msg="One of the following options needs to be true: ef_alerts_mitigation, ef_binary_vault")
-
 
 def run_module():
     # define available arguments/parameters a user can pass to the module
@@ -485,6 +386,8 @@ def run_module():
             'performance_focus_extended'
         ]),
         description=dict(type='str', required=False, default=""),
+        diff_detail=dict(type='str', required=False, default='summary', choices=['none', 'summary', 'paths', 'full']),
+        parallel_requests=dict(type='int', required=False, default=5),
     )
 
     module = AnsibleModule(
@@ -511,63 +414,64 @@ def run_module():
     diffs = []
     basic_message = []
     if state == 'present':
+        # Ids of the groups where the exclusion is missing
+        missing_group_ids = []
         if current_group_ids_names:
-            # desired_exclusions_count is the count of the currently existing groups because we want the exlusion to
-            # exist in every group
-            desired_exclusions_count = len(current_group_ids_names)
-            # current_exclusions_count is the count of the currently existing exclusions
-            current_exclusions_count = current_exclusions['pagination']['totalItems']
-            # if scope is group level
-            if desired_exclusions_count == current_exclusions_count:
-                # All exclusions exist. Check if they differ from desired state
-                for current_exclusion in current_exclusions["data"]:
-                    diff = exclusion_obj.merge_compare(current_exclusion, desired_state_exclusion['data'])[0]
-                    if diff:
-                        group_id = current_exclusion['scope']['groupIds'][0]
-                        # Get name for group with group_id
-                        group_name = list(filter(lambda filterobj: filterobj[0] == group_id,
-                                                 current_group_ids_names))[0][1]
-                        diffs.append({'changes': dict(diff), 'groupId': group_id, "exclusion_id": current_exclusion['id']})
-                        basic_message.append(f"Exclusion exists in group {group_name} but is not up-to-date. "
-                                             f"Updating exclusion.")
-            else:
-                # Not all exclusions exists.
-                message = "Exclusion is missing in a group. Creating exclusion."
-                basic_message.append(message)
-                diffs.append({'changes': message})
+            # if scope is group level. The exclusion has to exist in every group
+            existing_group_ids = set(map(exclusion_obj.get_scope_id, current_exclusions))
+            for group_id, group_name in current_group_ids_names:
+                if group_id not in existing_group_ids:
+                    missing_group_ids.append(group_id)
+                    message = f"Exclusion is missing in group {group_name}. Creating exclusion."
+                    basic_message.append(message)
+                    diffs.append({'changes': message, 'groupId': group_id})
+
+            # Check if the existing exclusions differ from desired state
+            group_names = dict(current_group_ids_names)
+            for current_exclusion in current_exclusions:
+                diff = exclusion_obj.merge_compare(current_exclusion, desired_state_exclusion['data'])[0]
+                if diff:
+                    group_id = exclusion_obj.get_scope_id(current_exclusion)
+                    diffs.append({'changes': exclusion_obj.format_diff(diff), 'groupId': group_id,
+                                  "exclusion_id": current_exclusion['id']})
+                    basic_message.append(f"Exclusion exists in group {group_names[group_id]} but is not up-to-date. "
+                                         f"Updating exclusion.")
         else:
             # if scope is site level
             site_name = exclusion_obj.site_name
-            if current_exclusions['pagination']['totalItems'] == 0:
+            if not current_exclusions:
                 message = f'Exclusion is missing in site {site_name}. Creating exclusion.'
                 basic_message.append(message)
                 diffs.append({'changes': message})
             else:
-                # Exclusion exits. Check if it differs from desired state.
-                current_exclusion = current_exclusions['data'][0]
-                diff = exclusion_obj.merge_compare(current_exclusion, desired_state_exclusion['data'])[0]
-                if diff:
-                    diffs.append({'changes': dict(diff),
-                                  'siteId': current_exclusion['scope']['siteIds'],
-                                  'exclusion_id': current_exclusion['id']
-                                  })
-                    basic_message.append(f"Exclusion exists in site {site_name} but is not up-to-date. "
-                                         f"Updating exclusion.")
+                # Exclusion exits. Check if it differs from desired state. Paths which only differ in case (windows) or
+                # separators can exist more than once
+                for current_exclusion in current_exclusions:
+                    diff = exclusion_obj.merge_compare(current_exclusion, desired_state_exclusion['data'])[0]
+                    if diff:
+                        diffs.append({'changes': exclusion_obj.format_diff(diff),
+                                      'siteId': current_exclusion['scope']['siteIds'],
+                                      'exclusion_id': current_exclusion['id']
+                                      })
+                        basic_message.append(f"Exclusion exists in site {site_name} but is not up-to-date. "
+                                             f"Updating exclusion.")
 
         if diffs:
-            if diffs[0].get('exclusion_id'):
-                # Update Exclusions
-                exclusion_obj.update_exclusions(module, exclusion_id=diffs[0]['exclusion_id'])
+            update_exclusion_ids = [diff['exclusion_id'] for diff in diffs if diff.get('exclusion_id')]
+            if update_exclusion_ids:
+                # Update every drifted exclusion. Each exclusion needs its own request
+                exclusion_obj.run_parallel(module, lambda worker_module, exclusion_id: exclusion_obj.update_exclusions(
+                    worker_module, exclusion_id=exclusion_id), update_exclusion_ids)
 
-            else:
-                # Create Exclusions
-                exclusion_obj.create_exclusions(module)
+            if missing_group_ids or not current_exclusions:
+                # Create Exclusions. In group scope only in the groups where it is missing
+                exclusion_obj.create_exclusions(module, group_ids=missing_group_ids)
 
         else:
             basic_message.append("Nothing to change, all desired changes are already set")
 
     else:
-        if current_exclusions['pagination']['totalItems'] != 0:
+        if current_exclusions:
             # Exclusions should be deleted
             exclusion_obj.delete_exclusions(module)
             diffs.append({'changes': 'Deleted all exclusions in Scope'})
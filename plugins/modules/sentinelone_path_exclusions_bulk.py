@@ -0,0 +1,498 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+module: sentinelone_path_exclusions_bulk
+short_description: "Manage many SentinelOne Path Exclusions at once"
+version_added: "2.1.0"
+description:
+  - "This module is able to create, update and delete a list of path exclusions in SentinelOne"
+  - "The exclusions of the scope are read with one paginated query and compared locally. This is much faster than
+    one M(sva.sentinelone.sentinelone_path_exclusions) task per path"
+options:
+  console_url:
+    description:
+      - "Insert your management console URL"
+    type: str
+    required: true
+  token:
+    description:
+      - "SentinelOne API auth token to authenticate at the management API"
+    type: str
+    required: true
+  state:
+    description:
+      - "Select the I(state) of the exclusions"
+    type: str
+    default: present
+    required: false
+    choices:
+      - present
+      - absent
+  site_name:
+    description:
+      - "Name of the site in SentinelOne"
+    type: str
+    required: true
+  groups:
+    description:
+      - "Set this option to set the scope to group level"
+      - "A list with groupnames which the exclusions are to be attached"
+    type: list
+    elements: str
+    default: []
+    required: false
+  exclusions:
+    description:
+      - "List of the path exclusions"
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      os_type:
+        description:
+          - "Define the operating system for the exclusion"
+        type: str
+        required: true
+        choices:
+          - windows
+          - linux
+      os_path:
+        description:
+          - "Os path of the exclusion."
+          - "If the path a folder, the path must end with / (linux) or \\\\ (windows)"
+        type: str
+        required: true
+      include_subfolders:
+        description:
+          - "If yes, the exclusion will scope subfolders as well. Is ignored if I(os_path) is not a folder (does not end
+            with / (linux) or \\\\ (windows))"
+        type: bool
+        required: false
+        default: no
+      ef_alerts_mitigation:
+        description:
+          - "Exclusion Function to exclude I(os_path) for alerts and mitigation"
+        type: bool
+        required: false
+        default: yes
+      ef_binary_vault:
+        description:
+          - "Exclusion Function to exclude I(os_path) for Binary Vaults"
+        type: bool
+        required: false
+        default: no
+      mode:
+        description:
+          - "Defines the exclusion mode for this exclusion. Required if I(state=present)"
+        type: str
+        required: false
+        choices:
+          - suppress_alerts
+          - interoperability
+          - interoperability_extended
+          - performance_focus
+          - performance_focus_extended
+      description:
+        description:
+          - "A short description to describe the exclusion"
+        type: str
+        required: false
+        default: ""
+  exclusive:
+    description:
+      - "If yes, all path exclusions of the scope which are not in I(exclusions) are deleted"
+      - "With an empty I(exclusions) list all path exclusions of the scope are deleted"
+      - "The exclusions are only deleted after all updates and creates succeeded"
+      - "Can not be used with I(state=absent)"
+    type: bool
+    required: false
+    default: no
+  parallel_requests:
+    description:
+      - "Maximum count of API requests which are sent at the same time if several exclusions are changed"
+    type: int
+    required: false
+    default: 5
+  journal:
+    description:
+      - "Path of a journal file on the host the module runs on. The completed API requests are recorded in the
+        journal, so a failed run can be resumed with I(resume)"
+      - "The journal is removed when the module finishes successfully"
+    type: path
+    required: false
+  resume:
+    description:
+      - "If yes and I(journal) exists from a failed run with the same options, the requests which were completed in
+        that run are skipped"
+      - "Requires I(journal)"
+    type: bool
+    required: false
+    default: no
+extends_documentation_fragment:
+  - sva.sentinelone.diff_detail
+author:
+  - "Marco Wester (@mwester117) <marco.wester@sva.de>"
+requirements:
+  - "deepdiff >= 5.6"
+notes:
+  - "Python module deepdiff. Tested with version >=5.6. Lower version may work too"
+  - "Currently only supported in single-account management consoles"
+  - "Currently not applicable for account level exclusions"
+  - "Currently not applicable for MacOS"
+  - "With I(journal) a failed run can be resumed. The requests which were completed in the failed run are not sent
+    again"
+  - "The API creates and updates one exclusion per request. Creates are sent once per exclusion for all groups where
+    it is missing. Creates and updates are sent in parallel (see I(parallel_requests)). Deletes are sent in one
+    request"
+'''
+
+EXAMPLES = r'''
+---
+- name: Create exclusions in site scope
+  sva.sentinelone.sentinelone_path_exclusions_bulk:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    exclusions:
+      - os_path: "C:\\Test1234\\"
+        mode: "performance_focus"
+        os_type: "windows"
+      - os_path: "/opt/test/"
+        include_subfolders: true
+        mode: "suppress_alerts"
+        os_type: "linux"
+- name: Create exclusions in multiple groups
+  sva.sentinelone.sentinelone_path_exclusions_bulk:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    groups:
+      - "MariaDB"
+      - "MaxDB"
+    exclusions: "{{ database_exclusions }}"
+- name: Make sure only these exclusions exist in the site. All other path exclusions of the site are deleted
+  sva.sentinelone.sentinelone_path_exclusions_bulk:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    exclusive: true
+    exclusions: "{{ site_exclusions }}"
+- name: Delete exclusions in group scope
+  sva.sentinelone.sentinelone_path_exclusions_bulk:
+    state: "absent"
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    groups:
+      - "MariaDB"
+    exclusions:
+      - os_path: "C:\\Test1234\\"
+        os_type: "windows"
+'''
+
+RETURN = r'''
+---
+original_message:
+    description:
+      - Get detailed infos about the changes made
+      - The changes are reported in the level of detail set by I(diff_detail). The sample shows the default C(summary).
+        The old and new values are only returned with I(diff_detail=full)
+    returned: on success
+    type: list
+    sample: [{"changes": {"values_changed": 1}, "os_path": "C:\\Test1234\\", "groupId": "99999999999999999",
+              "exclusion_id": "99999999999999999"}]
+message:
+    description: Get basic infos about the changes made
+    returned: on success
+    type: list
+    sample: [ "Exclusion C:\\Test1234\\ is missing in group MariaDB. Creating exclusion." ]
+'''
+
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import lib_imp_errors
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_exclusions_base import SentineloneExclusionsBase
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_journal import SentineloneJournal
+
+
+class SentineloneExclusionsBulk(SentineloneExclusionsBase):
+    def __init__(self, module: AnsibleModule):
+        """
+        Initialization of the bulk Exclusions object
+
+        :param module: Requires the AnsibleModule Object for parsing the parameters
+        :type module: AnsibleModule
+        """
+
+        # self.token, self.console_url, self.site_name, self.state, self.api_endpoint_*, self.group_names will be set in
+        # super Class
+        super().__init__(module)
+
+        self.current_group_ids = list(map(lambda current_group_id_name: current_group_id_name[0],
+                                          self.current_group_ids_names))
+        # The exclusions have to exist in every group or in the site if no groups are passed
+        self.scope_ids = self.current_group_ids if self.current_group_ids else [self.site_id]
+        self.scope_names = dict(self.current_group_ids_names) if self.current_group_ids else {
+            self.site_id: self.site_name}
+
+        self.exclusive = module.params["exclusive"]
+        self.desired_state_exclusions = self.get_desired_state_exclusions(module.params["exclusions"], module)
+        self.current_exclusion_index = self.get_exclusion_index(self.current_group_ids, module)
+        run_id = SentineloneJournal.get_run_id("sentinelone_path_exclusions_bulk", self.console_url, self.site_name,
+                                               self.current_group_ids, module.params["exclusions"], self.exclusive,
+                                               self.state)
+        self.journal = SentineloneJournal(module.params["journal"], run_id, module.params["resume"], module)
+
+    def get_desired_state_exclusions(self, exclusions: list, module: AnsibleModule):
+        """
+        Build the API data objects of the passed exclusions
+
+        :param exclusions: Exclusions passed as module parameter
+        :type exclusions: list
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Dictionary with the exclusion key (see get_exclusion_key) as key and the API data object as value
+        :rtype: dict
+        """
+
+        desired_state_exclusions = {}
+        for exclusion in exclusions:
+            exclusion_path = exclusion["os_path"]
+            os_type = exclusion["os_type"]
+            key = self.get_exclusion_key(exclusion_path, os_type)
+            if key in desired_state_exclusions:
+                module.fail_json(msg=f"Exclusion {exclusion_path} for os {os_type} is defined more than once")
+
+            desired_state_exclusions[key] = self.get_exclusion_data(exclusion, self.state, module)
+
+        return desired_state_exclusions
+
+    def get_scope_message_name(self, scope_id: str):
+        """
+        Returns the scope as text for the result messages
+
+        :param scope_id: Group or site id
+        :type scope_id: str
+        :return: Scope type and name
+        :rtype: str
+        """
+
+        scope_type = "group" if self.current_group_ids else "site"
+        return f"{scope_type} {self.scope_names[scope_id]}"
+
+    def get_scope_id_info(self, scope_id: str):
+        """
+        Returns the scope id in the format of the original_message entries
+
+        :param scope_id: Group or site id
+        :type scope_id: str
+        :return: Dictionary with the key groupId or siteId
+        :rtype: dict
+        """
+
+        if self.current_group_ids:
+            return {'groupId': scope_id}
+        return {'siteId': scope_id}
+
+
+def run_module():
+    # define available arguments/parameters a user can pass to the module
+    module_args = dict(
+        console_url=dict(type='str', required=True),
+        token=dict(type='str', required=True, no_log=True),
+        state=dict(type='str', required=False, default='present', choices=['present', 'absent']),
+        site_name=dict(type='str', required=True),
+        groups=dict(type='list', required=False, elements='str', default=[]),
+        exclusions=dict(type='list', required=True, elements='dict', options=dict(
+            os_type=dict(type='str', required=True, choices=['windows', 'linux']),
+            os_path=dict(type='str', required=True),
+            include_subfolders=dict(type='bool', required=False, default=False),
+            ef_alerts_mitigation=dict(type='bool', required=False, default=True),
+            ef_binary_vault=dict(type='bool', required=False, default=False),
+            mode=dict(type='str', required=False, choices=[
+                'suppress_alerts',
+                'interoperability',
+                'interoperability_extended',
+                'performance_focus',
+                'performance_focus_extended'
+            ]),
+            description=dict(type='str', required=False, default=""),
+        )),
+        exclusive=dict(type='bool', required=False, default=False),
+        diff_detail=dict(type='str', required=False, default='summary', choices=['none', 'summary', 'paths', 'full']),
+        parallel_requests=dict(type='int', required=False, default=5),
+        journal=dict(type='path', required=False),
+        resume=dict(type='bool', required=False, default=False),
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_if=[
+            ('resume', True, ('journal',))
+        ],
+        supports_check_mode=False
+    )
+
+    if not lib_imp_errors['has_lib']:
+        module.fail_json(msg=missing_required_lib("DeepDiff"), exception=lib_imp_errors['lib_imp_err'])
+
+    if module.params['exclusive'] and module.params['state'] == 'absent':
+        module.fail_json(msg="exclusive can not be used with state absent. Only the passed exclusions are deleted")
+
+    # Create bulk exclusion Object
+    exclusion_obj = SentineloneExclusionsBulk(module)
+
+    desired_state_exclusions = exclusion_obj.desired_state_exclusions
+    current_exclusion_index = exclusion_obj.current_exclusion_index
+    scope_ids = exclusion_obj.scope_ids
+
+    state = exclusion_obj.state
+    journal = exclusion_obj.journal
+
+    def write_exclusion(worker_module, write):
+        (method, args), journal_keys, dummy = write
+        method(*args, worker_module)
+        for journal_key in journal_keys:
+            journal.mark_done(journal_key)
+
+    diffs = []
+    basic_message = []
+    if state == 'present':
+        # List of tuples of the write (method and its arguments without the module), the journal keys and the diffs and
+        # messages of the write. Updates take the exclusion data and the id of the drifted exclusion, creates the
+        # exclusion data and the group ids where the exclusion is missing
+        write_exclusions = []
+        for key, desired_state_exclusion in desired_state_exclusions.items():
+            exclusion_path = desired_state_exclusion['value']
+            drifted_exclusions, missing_scope_ids = exclusion_obj.get_exclusion_changes(
+                desired_state_exclusion, current_exclusion_index.get(key, []), scope_ids)
+            # Requests which were completed in the resumed run are not sent again
+            drifted_exclusions = [(current_exclusion, diff) for current_exclusion, diff in drifted_exclusions
+                                  if not journal.is_done(f"update:{current_exclusion['id']}")]
+            missing_scope_ids = [scope_id for scope_id in missing_scope_ids
+                                 if not journal.is_done(exclusion_obj.get_create_journal_key(key, scope_id))]
+
+            for current_exclusion, diff in drifted_exclusions:
+                scope_id = exclusion_obj.get_scope_id(current_exclusion)
+                write_exclusions.append((
+                    (exclusion_obj.update_exclusion, (desired_state_exclusion, current_exclusion['id'])),
+                    [f"update:{current_exclusion['id']}"],
+                    [(dict({'changes': exclusion_obj.format_diff(diff), 'os_path': exclusion_path,
+                            'exclusion_id': current_exclusion['id']}, **exclusion_obj.get_scope_id_info(scope_id)),
+                      f"Exclusion {exclusion_path} exists in {exclusion_obj.get_scope_message_name(scope_id)} but "
+                      f"is not up-to-date. Updating exclusion.")]))
+
+            if missing_scope_ids:
+                # Site scope is created without groupIds filter
+                create_group_ids = missing_scope_ids if exclusion_obj.current_group_ids else []
+                create_changes = []
+                for scope_id in missing_scope_ids:
+                    message = (f"Exclusion {exclusion_path} is missing in "
+                               f"{exclusion_obj.get_scope_message_name(scope_id)}. Creating exclusion.")
+                    create_changes.append((dict({'changes': message, 'os_path': exclusion_path},
+                                                **exclusion_obj.get_scope_id_info(scope_id)), message))
+                write_exclusions.append(((exclusion_obj.create_exclusion, (desired_state_exclusion, create_group_ids)),
+                                         [exclusion_obj.get_create_journal_key(key, scope_id)
+                                          for scope_id in missing_scope_ids],
+                                         create_changes))
+
+        # The API takes one exclusion per request. Send the updates and creates of all exclusions in one parallel batch.
+        # A failed request does not stop the others. The errors of all failed requests are reported together
+        write_results = exclusion_obj.run_parallel_results(module, write_exclusion, write_exclusions)
+        errors = []
+        for (write, journal_keys, changes), (response, error) in zip(write_exclusions, write_results):
+            if error is not None:
+                errors.append(error)
+                continue
+            for diff, message in changes:
+                diffs.append(diff)
+                basic_message.append(message)
+        if errors:
+            # Report the exclusions which were changed before failing. The unmanaged exclusions are only pruned after
+            # all updates and creates succeeded, so a failed run does not leave the scopes with less exclusions than
+            # before
+            if exclusion_obj.exclusive:
+                basic_message.append("Unmanaged exclusions are not deleted because requests failed.")
+            module.fail_json(msg=exclusion_obj.get_parallel_error_msg(errors, len(write_exclusions)),
+                             changed=bool(diffs), original_message=diffs, message=basic_message)
+
+        delete_exclusion_ids = []
+        if exclusion_obj.exclusive:
+            # Prune all exclusions of the scope which are not managed by this task
+            for key, current_exclusions in current_exclusion_index.items():
+                if key in desired_state_exclusions:
+                    continue
+                for current_exclusion in current_exclusions:
+                    if journal.is_done(f"delete:{current_exclusion['id']}"):
+                        continue
+                    scope_id = exclusion_obj.get_scope_id(current_exclusion)
+                    delete_exclusion_ids.append(current_exclusion['id'])
+                    message = (f"Exclusion {current_exclusion['value']} exists in "
+                               f"{exclusion_obj.get_scope_message_name(scope_id)} but is not in exclusions. "
+                               f"Deleting exclusion.")
+                    basic_message.append(message)
+                    diffs.append(dict({'changes': message, 'os_path': current_exclusion['value'],
+                                       'exclusion_id': current_exclusion['id']},
+                                      **exclusion_obj.get_scope_id_info(scope_id)))
+
+        if delete_exclusion_ids:
+            # One request for all unmanaged exclusions
+            exclusion_obj.delete_exclusions_by_id(delete_exclusion_ids, module)
+            for exclusion_id in delete_exclusion_ids:
+                journal.mark_done(f"delete:{exclusion_id}")
+
+        if not diffs:
+            basic_message.append("Nothing to change, all desired changes are already set")
+
+    else:
+        delete_exclusion_ids = []
+        for key, desired_state_exclusion in desired_state_exclusions.items():
+            for current_exclusion in current_exclusion_index.get(key, []):
+                if journal.is_done(f"delete:{current_exclusion['id']}"):
+                    continue
+                scope_id = exclusion_obj.get_scope_id(current_exclusion)
+                delete_exclusion_ids.append(current_exclusion['id'])
+                message = (f"Exclusion {desired_state_exclusion['value']} exists in "
+                           f"{exclusion_obj.get_scope_message_name(scope_id)}. Deleting exclusion.")
+                basic_message.append(message)
+                diffs.append(dict({'changes': message, 'os_path': desired_state_exclusion['value'],
+                                   'exclusion_id': current_exclusion['id']},
+                                  **exclusion_obj.get_scope_id_info(scope_id)))
+
+        if delete_exclusion_ids:
+            exclusion_obj.delete_exclusions_by_id(delete_exclusion_ids, module)
+            for exclusion_id in delete_exclusion_ids:
+                journal.mark_done(f"delete:{exclusion_id}")
+        else:
+            basic_message.append("Nothing to change, exclusions do not exist")
+
+    journal.complete()
+
+    result = dict(
+        changed=False,
+        original_message=diffs,
+        message=basic_message
+    )
+
+    # If we made changes to the objects the list diffs is not empty.
+    # So we can use it to update result['changes'] to True if necessary
+    if diffs:
+        result['changed'] = True
+
+    # in the event of a successful module execution, you will want to
+    # simple AnsibleModule.exit_json(), passing the key/value results
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
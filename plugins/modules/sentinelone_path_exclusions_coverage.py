@@ -0,0 +1,324 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+module: sentinelone_path_exclusions_coverage
+short_description: "Find redundant SentinelOne Path Exclusions"
+version_added: "2.1.0"
+description:
+  - "This module finds path exclusions which are fully covered by a broader path exclusion of the same scope and can
+    optionally delete them"
+  - "An exclusion is covered if it has the same os, if the broader exclusion has the same mode (or the extended
+    variant of it) and at least the same actions and if the path of the exclusion is covered by the path of the
+    broader exclusion"
+  - "A I(subfolders) exclusion covers every exclusion below the folder and a I(folder) exclusion of the same folder.
+    A I(folder) exclusion covers the I(file) exclusions directly in the folder. Of identical exclusions only the
+    first one is kept"
+options:
+  console_url:
+    description:
+      - "Insert your management console URL"
+    type: str
+    required: true
+  token:
+    description:
+      - "SentinelOne API auth token to authenticate at the management API"
+    type: str
+    required: true
+  site_name:
+    description:
+      - "Name of the site in SentinelOne"
+    type: str
+    required: true
+  groups:
+    description:
+      - "Set this option to analyze the exclusions of groups instead of the site"
+      - "Every group is analyzed on its own"
+    type: list
+    elements: str
+    default: []
+    required: false
+  remove_redundant:
+    description:
+      - "If yes, the redundant exclusions are deleted. Otherwise they are only reported"
+    type: bool
+    required: false
+    default: no
+author:
+  - "Marco Wester (@mwester117) <marco.wester@sva.de>"
+notes:
+  - "Currently only supported in single-account management consoles"
+  - "Currently not applicable for account level exclusions"
+  - "Exclusions of a parent scope (e.g. the site for a group) are not considered"
+  - "Exclusions with wildcards (*) are never used as broader exclusion. Paths with environment variables are
+    compared literally"
+'''
+
+EXAMPLES = r'''
+---
+- name: Report redundant exclusions in site scope
+  sva.sentinelone.sentinelone_path_exclusions_coverage:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+- name: Delete redundant exclusions in groups
+  sva.sentinelone.sentinelone_path_exclusions_coverage:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    groups:
+      - "MariaDB"
+      - "MaxDB"
+    remove_redundant: true
+'''
+
+RETURN = r'''
+---
+original_message:
+    description: The redundant exclusions and the exclusions which cover them
+    returned: on success
+    type: list
+    sample: [{"exclusion_id": "99999999999999998", "os_path": "C:\\Test1234\\app.exe", "os_type": "windows",
+              "pathExclusionType": "file", "groupId": "99999999999999997",
+              "covered_by": {"exclusion_id": "99999999999999999", "os_path": "C:\\Test1234\\",
+                             "pathExclusionType": "subfolders"}}]
+message:
+    description: Get basic infos about the redundant exclusions
+    returned: on success
+    type: list
+    sample: [ "Exclusion C:\\Test1234\\app.exe in group MariaDB is covered by C:\\Test1234\\. Deleting exclusion." ]
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_exclusions_base import SentineloneExclusionsBase
+
+
+class SentineloneExclusionsCoverage(SentineloneExclusionsBase):
+    # Modes whose effect includes the effect of the mode in the key. The extended modes also apply to child processes
+    covered_modes = {
+        "suppress": ["suppress"],
+        "disable_in_process_monitor": ["disable_in_process_monitor"],
+        "disable_in_process_monitor_deep": ["disable_in_process_monitor_deep", "disable_in_process_monitor"],
+        "disable_all_monitors": ["disable_all_monitors"],
+        "disable_all_monitors_deep": ["disable_all_monitors_deep", "disable_all_monitors"]
+    }
+
+    def __init__(self, module: AnsibleModule):
+        """
+        Initialization of the Exclusions coverage object
+
+        :param module: Requires the AnsibleModule Object for parsing the parameters
+        :type module: AnsibleModule
+        """
+
+        # self.token, self.console_url, self.site_name, self.state, self.api_endpoint_*, self.group_names will be set in
+        # super Class
+        super().__init__(module)
+
+        self.remove_redundant = module.params["remove_redundant"]
+        self.current_group_ids = list(map(lambda current_group_id_name: current_group_id_name[0],
+                                          self.current_group_ids_names))
+        self.scope_names = dict(self.current_group_ids_names) if self.current_group_ids else {
+            self.site_id: self.site_name}
+
+        # All exclusions of the scope in the order of the API listing
+        exclusion_index = self.get_exclusion_index(self.current_group_ids, module)
+        self.current_exclusions = [exclusion for exclusions in exclusion_index.values() for exclusion in exclusions]
+
+    @staticmethod
+    def get_path_components(exclusion: dict):
+        """
+        Split the normalized path of the exclusion into its components. Linux paths start with an empty component for
+        the root folder
+
+        :param exclusion: Exclusion object
+        :type exclusion: dict
+        :return: Path components
+        :rtype: list
+        """
+
+        separator = "\\" if exclusion['osType'] == "windows" else "/"
+        path = SentineloneExclusionsBase.normalize_path(exclusion['value'], exclusion['osType'])
+        if path == separator:
+            return [""]
+        return path.split(separator)
+
+    def build_coverage_trie(self, exclusions: list):
+        """
+        Build a path trie per scope and os. Every node is a dictionary with the child nodes under 'children' and the
+        exclusions of the path under 'exclusions'
+
+        :param exclusions: Exclusion objects
+        :type exclusions: list
+        :return: Dictionary with tuples of scope id and os type as keys and the root nodes as values
+        :rtype: dict
+        """
+
+        tries = {}
+        for order, exclusion in enumerate(exclusions):
+            node = tries.setdefault((self.get_scope_id(exclusion), exclusion['osType']),
+                                    {'children': {}, 'exclusions': []})
+            for component in self.get_path_components(exclusion):
+                node = node['children'].setdefault(component, {'children': {}, 'exclusions': []})
+            node['exclusions'].append((order, exclusion))
+
+        return tries
+
+    def settings_cover(self, broad_exclusion: dict, exclusion: dict):
+        """
+        Check if mode and actions of broad_exclusion include mode and actions of exclusion
+
+        :param broad_exclusion: The broader exclusion
+        :type broad_exclusion: dict
+        :param exclusion: The exclusion which could be redundant
+        :type exclusion: dict
+        :return: True if the settings are covered. False if the mode of one of the exclusions is unknown
+        :rtype: bool
+        """
+
+        broad_mode = broad_exclusion.get('mode')
+        mode = exclusion.get('mode')
+        if broad_mode is None or mode is None:
+            # Exclusions without mode can not be compared and are not reported as redundant
+            return False
+
+        covered_modes = self.covered_modes.get(broad_mode, [broad_mode])
+        return mode in covered_modes and \
+            set(exclusion.get('actions') or []) <= set(broad_exclusion.get('actions') or [])
+
+    def get_covering_exclusion(self, tries: dict, order: int, exclusion: dict):
+        """
+        Search the trie for an exclusion which covers exclusion. Only the nodes on the path of the exclusion are visited
+
+        :param tries: Tries returned by build_coverage_trie
+        :type tries: dict
+        :param order: Position of the exclusion in the list the tries were built from
+        :type order: int
+        :param exclusion: The exclusion which could be redundant
+        :type exclusion: dict
+        :return: The covering exclusion or None
+        :rtype: dict
+        """
+
+        components = self.get_path_components(exclusion)
+        exclusion_type = exclusion['pathExclusionType']
+        node = tries[(self.get_scope_id(exclusion), exclusion['osType'])]
+        for depth in range(len(components) + 1):
+            is_parent = depth == len(components) - 1
+            is_same_path = depth == len(components)
+            for broad_order, broad_exclusion in node['exclusions']:
+                broad_type = broad_exclusion['pathExclusionType']
+                if broad_order == order or '*' in broad_exclusion['value']:
+                    continue
+                if not self.settings_cover(broad_exclusion, exclusion):
+                    continue
+
+                if is_same_path:
+                    if broad_type == "subfolders" and exclusion_type == "folder":
+                        return broad_exclusion
+                    if broad_type == exclusion_type:
+                        # Identical coverage. If both cover each other only the first one is kept
+                        if not self.settings_cover(exclusion, broad_exclusion) or broad_order < order:
+                            return broad_exclusion
+                elif broad_type == "subfolders":
+                    return broad_exclusion
+                elif is_parent and broad_type == "folder" and exclusion_type == "file":
+                    return broad_exclusion
+
+            if is_same_path:
+                break
+            node = node['children'].get(components[depth])
+            if node is None:
+                break
+
+        return None
+
+    def get_redundant_exclusions(self):
+        """
+        Returns the redundant exclusions of the scope
+
+        :return: List of tuples of the redundant exclusion and the covering exclusion
+        :rtype: list
+        """
+
+        tries = self.build_coverage_trie(self.current_exclusions)
+        redundant_exclusions = []
+        for order, exclusion in enumerate(self.current_exclusions):
+            covering_exclusion = self.get_covering_exclusion(tries, order, exclusion)
+            if covering_exclusion is not None:
+                redundant_exclusions.append((exclusion, covering_exclusion))
+
+        return redundant_exclusions
+
+
+def run_module():
+    # define available arguments/parameters a user can pass to the module
+    module_args = dict(
+        console_url=dict(type='str', required=True),
+        token=dict(type='str', required=True, no_log=True),
+        site_name=dict(type='str', required=True),
+        groups=dict(type='list', required=False, elements='str', default=[]),
+        remove_redundant=dict(type='bool', required=False, default=False),
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=False
+    )
+
+    # Create exclusion coverage Object
+    coverage_obj = SentineloneExclusionsCoverage(module)
+
+    scope_type = "group" if coverage_obj.current_group_ids else "site"
+    scope_id_key = "groupId" if coverage_obj.current_group_ids else "siteId"
+    action = "Deleting exclusion." if coverage_obj.remove_redundant else "Exclusion can be deleted."
+
+    redundant_exclusions = []
+    basic_message = []
+    for exclusion, covering_exclusion in coverage_obj.get_redundant_exclusions():
+        scope_id = coverage_obj.get_scope_id(exclusion)
+        redundant_exclusions.append({
+            'exclusion_id': exclusion['id'],
+            'os_path': exclusion['value'],
+            'os_type': exclusion['osType'],
+            'pathExclusionType': exclusion['pathExclusionType'],
+            scope_id_key: scope_id,
+            'covered_by': {
+                'exclusion_id': covering_exclusion['id'],
+                'os_path': covering_exclusion['value'],
+                'pathExclusionType': covering_exclusion['pathExclusionType']
+            }
+        })
+        basic_message.append(f"Exclusion {exclusion['value']} in {scope_type} {coverage_obj.scope_names[scope_id]} "
+                             f"is covered by {covering_exclusion['value']}. {action}")
+
+    changed = False
+    if redundant_exclusions and coverage_obj.remove_redundant:
+        coverage_obj.delete_exclusions_by_id([exclusion['exclusion_id'] for exclusion in redundant_exclusions], module)
+        changed = True
+    elif not redundant_exclusions:
+        basic_message.append("No redundant exclusions found")
+
+    result = dict(
+        changed=changed,
+        original_message=redundant_exclusions,
+        message=basic_message
+    )
+
+    # in the event of a successful module execution, you will want to
+    # simple AnsibleModule.exit_json(), passing the key/value results
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,505 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+---
+module: sentinelone_path_exclusions_import
+short_description: "Import SentinelOne Path Exclusions from a CSV or JSON lines file"
+version_added: "2.1.0"
+description:
+  - "This module imports path exclusions from a CSV or JSON lines file into SentinelOne"
+  - "The file is read line by line. Missing exclusions are created and drifted exclusions are updated in chunks of
+    I(chunk_size) records. Exclusions which exist in the scope but not in the file are not changed"
+  - "The whole file is validated before the first change is made"
+  - "With I(journal) an interrupted import can be resumed. The chunks and requests which were completed are skipped"
+options:
+  console_url:
+    description:
+      - "Insert your management console URL"
+    type: str
+    required: true
+  token:
+    description:
+      - "SentinelOne API auth token to authenticate at the management API"
+    type: str
+    required: true
+  site_name:
+    description:
+      - "Name of the site in SentinelOne"
+    type: str
+    required: true
+  groups:
+    description:
+      - "Set this option to set the scope to group level"
+      - "A list with groupnames which the exclusions are to be attached"
+    type: list
+    elements: str
+    default: []
+    required: false
+  src:
+    description:
+      - "Path of the file with the exclusions on the host the module runs on. Usually the controller
+        (C(delegate_to: localhost))"
+      - "Every record has the keys of the I(exclusions) option of M(sva.sentinelone.sentinelone_path_exclusions_bulk):
+        C(os_path), C(os_type), C(mode) (all required), C(include_subfolders), C(ef_alerts_mitigation),
+        C(ef_binary_vault) and C(description)"
+      - "CSV files need a header line with the keys. Empty cells get the default value"
+      - "Records with the same path (see the notes) as a previous record are skipped"
+    type: path
+    required: true
+  src_format:
+    description:
+      - "Format of I(src). C(auto) selects C(csv) for files ending with .csv and C(jsonl) for all other files"
+      - "C(jsonl): One JSON object per line"
+    type: str
+    required: false
+    default: auto
+    choices:
+      - auto
+      - csv
+      - jsonl
+  chunk_size:
+    description:
+      - "Count of records which are compared and sent to the API together"
+    type: int
+    required: false
+    default: 500
+  parallel_requests:
+    description:
+      - "Maximum count of API requests which are sent at the same time"
+    type: int
+    required: false
+    default: 5
+  journal:
+    description:
+      - "Path of a journal file on the host the module runs on. The completed API requests are recorded in the
+        journal, so a failed run can be resumed with I(resume)"
+      - "The journal is removed when the module finishes successfully"
+    type: path
+    required: false
+  resume:
+    description:
+      - "If yes and I(journal) exists from a failed run with the same options, the requests which were completed in
+        that run are skipped"
+      - "Requires I(journal)"
+    type: bool
+    required: false
+    default: no
+author:
+  - "Marco Wester (@mwester117) <marco.wester@sva.de>"
+requirements:
+  - "deepdiff >= 5.6"
+notes:
+  - "Python module deepdiff. Tested with version >=5.6. Lower version may work too"
+  - "Currently only supported in single-account management consoles"
+  - "Currently not applicable for account level exclusions"
+  - "Currently not applicable for MacOS"
+  - "Paths are compared normalized. Windows paths which only differ in case or separators and paths with repeated
+    separators are the same exclusion"
+  - "The records are read chunk by chunk, but the exclusions which exist in the scope and the paths of the imported
+    records are held in memory while the module runs. The memory usage grows with the count of exclusions in the scope
+    and the count of distinct paths in the file"
+'''
+
+EXAMPLES = r'''
+---
+- name: Import exclusions into the site
+  sva.sentinelone.sentinelone_path_exclusions_import:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    src: "files/exclusions.csv"
+  delegate_to: localhost
+- name: Import exclusions into groups
+  sva.sentinelone.sentinelone_path_exclusions_import:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    groups:
+      - "MariaDB"
+      - "MaxDB"
+    src: "/tmp/exclusions.json"
+    src_format: "jsonl"
+    chunk_size: 200
+  delegate_to: localhost
+- name: Import a large file. A failed run can be repeated and continues with the first incomplete chunk
+  sva.sentinelone.sentinelone_path_exclusions_import:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    src: "files/exclusions.csv"
+    journal: "/tmp/exclusions_import.journal"
+    resume: true
+  delegate_to: localhost
+'''
+
+RETURN = r'''
+---
+original_message:
+    description:
+      - Progress of the import. One entry per chunk. C(skipped) is true if the chunk was completed in the resumed run
+      - The counters count records and add up to C(records). A record which is created in one group and updated in
+        another counts as created. A record with a failed request counts as failed
+      - If requests fail, the completed chunks and the chunk with the failed requests are returned with the error
+    returned: on success
+    type: list
+    sample: [{"chunk": 1, "lines": "2-501", "records": 500, "duplicates": 0, "created": 480, "updated": 15,
+              "unchanged": 5, "failed": 0, "skipped": false}]
+message:
+    description: Get basic infos about the changes made
+    returned: on success
+    type: list
+    sample: [ "Chunk 1 (lines 2-501): 480 created, 15 updated, 5 unchanged, 0 duplicates skipped",
+              "Imported 500 records: 480 created, 15 updated, 5 unchanged, 0 duplicates skipped" ]
+'''
+
+import csv
+import json
+import os
+
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ansible.module_utils.common.arg_spec import ArgumentSpecValidator
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import (
+    WorkerError, WorkerModule, lib_imp_errors)
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_exclusions_base import SentineloneExclusionsBase
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_journal import SentineloneJournal
+
+
+class SentineloneExclusionsImport(SentineloneExclusionsBase):
+    # Specification of one record. The same as the exclusions option of sentinelone_path_exclusions_bulk
+    record_spec = dict(
+        os_type=dict(type='str', required=True, choices=['windows', 'linux']),
+        os_path=dict(type='str', required=True),
+        include_subfolders=dict(type='bool', required=False, default=False),
+        ef_alerts_mitigation=dict(type='bool', required=False, default=True),
+        ef_binary_vault=dict(type='bool', required=False, default=False),
+        mode=dict(type='str', required=True, choices=[
+            'suppress_alerts',
+            'interoperability',
+            'interoperability_extended',
+            'performance_focus',
+            'performance_focus_extended'
+        ]),
+        description=dict(type='str', required=False, default=""),
+    )
+    # Maximum count of invalid records which are reported
+    max_reported_errors = 20
+
+    def __init__(self, module: AnsibleModule):
+        """
+        Initialization of the Exclusions import object
+
+        :param module: Requires the AnsibleModule Object for parsing the parameters
+        :type module: AnsibleModule
+        """
+
+        # self.token, self.console_url, self.site_name, self.state, self.api_endpoint_*, self.group_names will be set in
+        # super Class
+        super().__init__(module)
+
+        self.src = module.params["src"]
+        self.src_format = module.params["src_format"]
+        if self.src_format == "auto":
+            self.src_format = "csv" if self.src.lower().endswith(".csv") else "jsonl"
+        self.chunk_size = module.params["chunk_size"]
+        if self.chunk_size < 1:
+            module.fail_json(msg="chunk_size needs to be 1 or higher")
+
+        self.current_group_ids = list(map(lambda current_group_id_name: current_group_id_name[0],
+                                          self.current_group_ids_names))
+        # The exclusions have to exist in every group or in the site if no groups are passed
+        self.scope_ids = self.current_group_ids if self.current_group_ids else [self.site_id]
+
+        self.record_validator = ArgumentSpecValidator(self.record_spec)
+        # Check the whole file before the first change is made. The journal is only opened for a valid file, so a
+        # failed check does not leave a journal which a resumed run would take as checked
+        self.check_records(module)
+        self.journal = SentineloneJournal(module.params["journal"], self.get_run_id(module), module.params["resume"],
+                                          module)
+        # One entry per exclusion of the scope. The index is held in memory while the module runs
+        self.current_exclusion_index = self.get_exclusion_index(self.current_group_ids, module)
+
+    def get_run_id(self, module: AnsibleModule):
+        """
+        Returns the id of the import for the journal. The file is identified by path, size and modification time
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Run id
+        :rtype: str
+        """
+
+        try:
+            src_stat = os.stat(self.src)
+        except OSError as err:
+            module.fail_json(msg=f"Failed to read {self.src}: {err}")
+
+        return SentineloneJournal.get_run_id("sentinelone_path_exclusions_import", self.console_url, self.site_name,
+                                             self.current_group_ids, os.path.realpath(self.src), src_stat.st_size,
+                                             src_stat.st_mtime, self.src_format, self.chunk_size)
+
+    def read_lines(self, module: AnsibleModule):
+        """
+        Generator which reads the raw records of the file one by one
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Generator of tuples of line number and record. The record is None if the line is no valid record
+        :rtype: Iterator[tuple]
+        """
+
+        try:
+            with open(self.src, newline='', encoding='utf-8-sig') as src_file:
+                if self.src_format == "csv":
+                    reader = csv.DictReader(src_file)
+                    for row in reader:
+                        # Empty cells get the default value. Cells without header are reported as unsupported key
+                        yield reader.line_num, {key if key is not None else "unnamed column": value
+                                                for key, value in row.items() if value not in ('', None)}
+                else:
+                    for line_number, line in enumerate(src_file, start=1):
+                        if not line.strip():
+                            continue
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            record = None
+                        yield line_number, record if isinstance(record, dict) else None
+        except (OSError, csv.Error) as err:
+            module.fail_json(msg=f"Failed to read {self.src}: {err}")
+
+    def get_record_data(self, record: dict, worker_module: WorkerModule):
+        """
+        Validate one record and build its API data object
+
+        :param record: Raw record of the file
+        :type record: dict
+        :param worker_module: Wrapped Ansible module. Errors are raised as WorkerError
+        :type worker_module: WorkerModule
+        :return: API data object of the exclusion
+        :rtype: dict
+        """
+
+        if record is None:
+            raise WorkerError("No valid JSON object")
+
+        result = self.record_validator.validate(record)
+        if result.error_messages:
+            raise WorkerError(" ".join(result.error_messages))
+
+        return self.get_exclusion_data(result.validated_parameters, "present", worker_module)
+
+    def read_records(self, module: AnsibleModule):
+        """
+        Generator which reads and validates the records of the file one by one
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Generator of tuples of line number and API data object. The data object is None if the record is
+        invalid. Then the third item is the error message
+        :rtype: Iterator[tuple]
+        """
+
+        worker_module = WorkerModule(module)
+        for line_number, record in self.read_lines(module):
+            try:
+                yield line_number, self.get_record_data(record, worker_module), None
+            except WorkerError as err:
+                yield line_number, None, str(err)
+
+    def check_records(self, module: AnsibleModule):
+        """
+        Validate all records of the file. Fails with the first invalid records
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        """
+
+        errors = []
+        for line_number, exclusion_data, error in self.read_records(module):
+            if error is not None:
+                errors.append(f"line {line_number}: {error}")
+                if len(errors) == self.max_reported_errors:
+                    break
+
+        if errors:
+            module.fail_json(msg=f"Invalid records in {self.src}. Nothing was imported. Errors: {' | '.join(errors)}")
+
+    def read_chunks(self, module: AnsibleModule):
+        """
+        Generator which yields the records of the file in chunks of chunk_size records
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Generator of lists of tuples of line number and API data object
+        :rtype: Iterator[list]
+        """
+
+        chunk = []
+        for line_number, exclusion_data, error in self.read_records(module):
+            if error is not None:
+                # The file was checked before. It changed while the module was running
+                module.fail_json(msg=f"Invalid record in {self.src} in line {line_number}: {error}. The file was "
+                                     f"changed during the import")
+            chunk.append((line_number, exclusion_data))
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def run_module():
+    # define available arguments/parameters a user can pass to the module
+    module_args = dict(
+        console_url=dict(type='str', required=True),
+        token=dict(type='str', required=True, no_log=True),
+        site_name=dict(type='str', required=True),
+        groups=dict(type='list', required=False, elements='str', default=[]),
+        src=dict(type='path', required=True),
+        src_format=dict(type='str', required=False, default='auto', choices=['auto', 'csv', 'jsonl']),
+        chunk_size=dict(type='int', required=False, default=500),
+        parallel_requests=dict(type='int', required=False, default=5),
+        journal=dict(type='path', required=False),
+        resume=dict(type='bool', required=False, default=False),
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        required_if=[
+            ('resume', True, ('journal',))
+        ],
+        supports_check_mode=False
+    )
+
+    if not lib_imp_errors['has_lib']:
+        module.fail_json(msg=missing_required_lib("DeepDiff"), exception=lib_imp_errors['lib_imp_err'])
+
+    # Create exclusion import Object
+    import_obj = SentineloneExclusionsImport(module)
+
+    current_exclusion_index = import_obj.current_exclusion_index
+    journal = import_obj.journal
+    scope_ids = import_obj.scope_ids
+    # Site scope is created without groupIds filter
+    create_group_ids = import_obj.current_group_ids
+
+    def write_exclusion(worker_module, write):
+        (method, args), journal_keys, dummy = write
+        method(*args, worker_module)
+        for journal_key in journal_keys:
+            journal.mark_done(journal_key)
+
+    # Only the keys of the imported records are kept to skip duplicates. The records are processed chunk by chunk, so
+    # the memory usage grows with the count of distinct paths in the file and not with the size of the records
+    imported_keys = set()
+    chunks = []
+    basic_message = []
+    totals = {'records': 0, 'duplicates': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+    for chunk_number, chunk in enumerate(import_obj.read_chunks(module), start=1):
+        stats = {'chunk': chunk_number, 'lines': f"{chunk[0][0]}-{chunk[-1][0]}", 'records': len(chunk),
+                 'duplicates': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'skipped': False}
+        chunk_key = f"chunk:{chunk_number}"
+        if journal.is_done(chunk_key):
+            # Completed in the resumed run. The keys are still needed to skip duplicates in the following chunks
+            imported_keys.update(import_obj.get_exclusion_key(exclusion_data['value'], exclusion_data['osType'])
+                                 for dummy, exclusion_data in chunk)
+            stats['skipped'] = True
+            chunks.append(stats)
+            basic_message.append(f"Chunk {chunk_number} (lines {stats['lines']}): already imported, skipped")
+            totals['records'] += stats['records']
+            continue
+
+        # List of tuples of the write (method and its arguments without the module), the journal keys and the key of
+        # the record. A record can need several writes, e.g. an update in one group and a create in another
+        write_exclusions = []
+        for line_number, exclusion_data in chunk:
+            key = import_obj.get_exclusion_key(exclusion_data['value'], exclusion_data['osType'])
+            if key in imported_keys:
+                stats['duplicates'] += 1
+                continue
+            imported_keys.add(key)
+
+            drifted_exclusions, missing_scope_ids = import_obj.get_exclusion_changes(
+                exclusion_data, current_exclusion_index.get(key, []), scope_ids)
+            # Requests which were completed in the resumed run are not sent again
+            drifted_exclusions = [(current_exclusion, diff) for current_exclusion, diff in drifted_exclusions
+                                  if not journal.is_done(f"update:{current_exclusion['id']}")]
+            missing_scope_ids = [scope_id for scope_id in missing_scope_ids
+                                 if not journal.is_done(import_obj.get_create_journal_key(key, scope_id))]
+            for current_exclusion, dummy in drifted_exclusions:
+                write_exclusions.append(((import_obj.update_exclusion, (exclusion_data, current_exclusion['id'])),
+                                         [f"update:{current_exclusion['id']}"], key))
+            if missing_scope_ids:
+                write_exclusions.append(((import_obj.create_exclusion,
+                                          (exclusion_data, missing_scope_ids if create_group_ids else [])),
+                                         [import_obj.get_create_journal_key(key, scope_id)
+                                          for scope_id in missing_scope_ids], key))
+            if not drifted_exclusions and not missing_scope_ids:
+                stats['unchanged'] += 1
+
+        # The stats count records. A record which is created in one group and updated in another counts as created,
+        # a record with a failed request counts as failed
+        write_results = import_obj.run_parallel_results(module, write_exclusion, write_exclusions)
+        created_keys = set()
+        updated_keys = set()
+        failed_keys = set()
+        errors = []
+        for ((method, args), journal_keys, key), (response, error) in zip(write_exclusions, write_results):
+            if error is not None:
+                errors.append(error)
+                failed_keys.add(key)
+            elif method == import_obj.create_exclusion:
+                created_keys.add(key)
+            else:
+                updated_keys.add(key)
+        stats['failed'] = len(failed_keys)
+        stats['created'] = len(created_keys - failed_keys)
+        stats['updated'] = len(updated_keys - created_keys - failed_keys)
+
+        chunks.append(stats)
+        basic_message.append(f"Chunk {chunk_number} (lines {stats['lines']}): {stats['created']} created, "
+                             f"{stats['updated']} updated, {stats['unchanged']} unchanged, "
+                             f"{stats['duplicates']} duplicates skipped" +
+                             (f", {stats['failed']} failed" if stats['failed'] else ""))
+        for key in totals:
+            totals[key] += stats[key]
+
+        if errors:
+            # Report the completed chunks and the records of this chunk which were imported before failing. The
+            # chunk is not journaled, so a resumed run sends only the failed requests again
+            basic_message.append(f"Import failed after {totals['records']} records: {totals['created']} created, "
+                                 f"{totals['updated']} updated, {totals['unchanged']} unchanged, "
+                                 f"{totals['duplicates']} duplicates skipped, {totals['failed']} failed")
+            module.fail_json(msg=import_obj.get_parallel_error_msg(errors, len(write_exclusions)),
+                             changed=bool(totals['created'] or totals['updated']), original_message=chunks,
+                             message=basic_message)
+        journal.mark_done(chunk_key)
+
+    basic_message.append(f"Imported {totals['records']} records: {totals['created']} created, "
+                         f"{totals['updated']} updated, {totals['unchanged']} unchanged, "
+                         f"{totals['duplicates']} duplicates skipped")
+    journal.complete()
+
+    result = dict(
+        changed=bool(totals['created'] or totals['updated']),
+        original_message=chunks,
+        message=basic_message
+    )
+
+    # in the event of a successful module execution, you will want to
+    # simple AnsibleModule.exit_json(), passing the key/value results
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
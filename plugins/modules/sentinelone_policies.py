@@ -34,12 +34,27 @@ options:
   site_name:
     description:
       - "Name of the site in SentinelOne"
+      - "Exactly one of I(site_name), I(sites) and I(all_sites) is required"
     type: str
-    required: true
+    required: false
+  sites:
+    description:
+      - "A list with the names of the sites where the policy should be changed"
+      - "The sites are resolved with one listing of the active sites and updated in parallel"
+    type: list
+    elements: str
+    required: false
+  all_sites:
+    description:
+      - "If yes, the policy is changed in all active sites of the account"
+    type: bool
+    required: false
+    default: no
   groups:
     description:
       - "Set this option to set the scope to group level"
       - "A list with groupnames where the policy should be changed"
+      - "Can only be used with I(site_name)"
     type: list
     elements: str
     default: []
@@ -52,6 +67,31 @@ options:
       - "Will be ignored if I(inherit=yes)"
     type: dict
     required: false
+  parallel_requests:
+    description:
+      - "Maximum count of API requests which are sent at the same time if several sites or groups are passed"
+      - "The policies of all sites or groups are read first and the changed policies are updated afterwards. A failed request
+        does not stop the other requests. The errors of all failed requests are reported together"
+    type: int
+    required: false
+    default: 5
+  journal:
+    description:
+      - "Path of a journal file on the host the module runs on. The completed API requests are recorded in the
+        journal, so a failed run can be resumed with I(resume)"
+      - "The journal is removed when the module finishes successfully"
+    type: path
+    required: false
+  resume:
+    description:
+      - "If yes and I(journal) exists from a failed run with the same options, the sites or groups which were updated
+        in that run are skipped"
+      - "Requires I(journal)"
+    type: bool
+    required: false
+    default: no
+extends_documentation_fragment:
+  - sva.sentinelone.diff_detail
 author:
   - "Marco Wester (@mwester117) <marco.wester@sva.de>"
 requirements:
@@ -85,6 +125,35 @@ EXAMPLES = r'''
       agentUiOn: false
       agentUi:
         agentUiOn: false
+- name: Set custom policy on multiple sites
+  sva.sentinelone.sentinelone_policies:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    sites:
+      - site1
+      - site2
+    policy:
+      agentUi:
+        agentUiOn: false
+- name: Set custom policy on all sites
+  sva.sentinelone.sentinelone_policies:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    all_sites: true
+    policy:
+      agentUi:
+        agentUiOn: false
+- name: Set custom policy on all sites. A failed run can be repeated and skips the sites which were updated
+  sva.sentinelone.sentinelone_policies:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    all_sites: true
+    policy:
+      agentUi:
+        agentUiOn: false
+    journal: "/tmp/sentinelone_policies.journal"
+    resume: true
+  delegate_to: localhost
 - name: Revert to group default policy inherited from site
   sva.sentinelone.sentinelone_policies:
     console_url: "https://XXXXX.sentinelone.net"
@@ -105,13 +174,14 @@ EXAMPLES = r'''
 RETURN = r'''
 ---
 original_message:
-    description: Get detailed infos about the changes made
-    type: str
+    description:
+      - Get detailed infos about the changes made
+      - The changes are reported in the level of detail set by I(diff_detail). The sample shows the default C(summary).
+        The old and new values are only returned with I(diff_detail=full)
+    type: list
     returned: on success
-    sample: [{"changes": {"values_changed": {"root['agentUi']['agentUiOn']": {"new_value": false, "old_value": true},
-    "root['agentUiOn']": {"new_value": false, "old_value": true}}}, "groupId": "99999999999999"},
-    {"changes": {"values_changed": {"root['agentUi']['agentUiOn']": {"new_value": false, "old_value": true},
-    "root['agentUiOn']": {"new_value": false, "old_value": true}}}, "groupId": "99999999999999"}]
+    sample: [{"changes": {"values_changed": 2}, "groupId": "99999999999999"},
+             {"changes": {"values_changed": 2}, "groupId": "88888888888888"}]
 message:
     description: Get basic infos about the changes made
     type: list
@@ -119,12 +189,16 @@ message:
     sample: ["Updating policy in group with id 99999999999999", "Updating policy in group with id 99999999999999"]
 '''
 
+import json
+
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.basic import missing_required_lib
-from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase, lib_imp_errors
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import lib_imp_errors
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_policies_base import SentinelonePoliciesBase
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_journal import SentineloneJournal
 
 
-class SentinelonePolicies(SentineloneBase):
+class SentinelonePolicies(SentinelonePoliciesBase):
     def __init__(self, module: AnsibleModule):
         """
         Initialization of the policies object
@@ -136,6 +210,10 @@ class SentinelonePolicies(SentineloneBase):
         # super class __init__ only expects "state" not "inherit". Translating it here
         module.params["state"] = module.params["inherit"]
 
+        # Do sanity checks before the site and groups are resolved in super Class
+        self.check_sanity(module.params["site_name"], module.params["sites"], module.params["all_sites"],
+                          module.params["groups"], module)
+
         # self.token, self.console_url, self.site_name, self.state, self.api_endpoint_*, self.group_names will be set in
         # super Class
         super().__init__(module)
@@ -144,104 +222,116 @@ class SentinelonePolicies(SentineloneBase):
         # Translating "state" back to "inherit"
         self.inherit = self.state
         self.desired_state_policy = module.params["policy"]
+        # Results of get_policy_changes by current policy
+        self.policy_changes = {}
+        self.scope_type = "group" if self.current_group_ids_names else "site"
 
-    def get_current_policy(self, site_group_id: str, module: AnsibleModule):
-        """
-        Get the policy which is currently set from API. Can be used on site or group scope
-
-        :param site_group_id: Site or group id
-        :type site_group_id: str
-        :param module: Ansible module for error handling
-        :type module: AnsibleModule
-        :return: Policy object
-        :rtype: dict
-        """
-
-        # API call to get the policy which is currently set. Can be used on site or group level
-        if self.current_group_ids_names:
-            api_url = f"{self.api_endpoint_groups}/{site_group_id}/policy"
+        # List with tuples of site_id and site_name of the sites where the policy should be changed
+        if self.site_name is not None:
+            self.current_site_ids_names = [(self.site_id, self.site_name)]
         else:
-            api_url = f"{self.api_endpoint_sites}/{site_group_id}/policy"
-
-        error_msg = f"Failed to get current policy for site or group with id {site_group_id}."
-        response = self.api_call(module, api_url, error_msg=error_msg)
+            site_names = None if module.params["all_sites"] else module.params["sites"]
+            self.current_site_ids_names = [(site['id'], site['name']) for site in self.get_sites(site_names, module)]
 
-        return response
+        scope_ids_names = self.current_group_ids_names if self.current_group_ids_names else self.current_site_ids_names
+        run_id = SentineloneJournal.get_run_id("sentinelone_policies", self.console_url, self.scope_type,
+                                               [scope_id for scope_id, scope_name in scope_ids_names], self.inherit,
+                                               self.desired_state_policy)
+        self.journal = SentineloneJournal(module.params["journal"], run_id, module.params["resume"], module)
 
-    def update_policy(self, site_group_id: str, update_body: dict, module: AnsibleModule):
+    @staticmethod
+    def check_sanity(site_name: str, site_names: list, all_sites: bool, group_names: list, module: AnsibleModule):
         """
-        API call to update the policy. Can be used on site or group level
-
-        :param site_group_id: Site or group id
-        :type site_group_id: str
-        :param update_body: Dictionary object which is used for updating the existing policy object
-        :type update_body: dict
+        Check if the passed module arguments are contradicting each other
+
+        :param site_name: Name of a single site
+        :type site_name: str
+        :param site_names: Names of multiple sites
+        :type site_names: list
+        :param all_sites: True if all sites should be changed
+        :type all_sites: bool
+        :param group_names: Names of the groups
+        :type group_names: list
         :param module: Ansible module for error handling
         :type module: AnsibleModule
-        :return: API response
-        :rtype: dict
         """
 
-        if self.current_group_ids_names:
-            # group level scope
-            api_url = f"{self.api_endpoint_groups}/{site_group_id}/policy"
-        else:
-            # site level scope
-            api_url = f"{self.api_endpoint_sites}/{site_group_id}/policy"
+        if [site_name is not None, bool(site_names), all_sites].count(True) != 1:
+            module.fail_json(msg="Error: Exactly one of site_name, sites and all_sites is required.")
+        if group_names and site_name is None:
+            module.fail_json(msg="Error: groups can only be used with site_name.")
+
+    def get_policy_changes(self, current_policy: dict):
+        """
+        Compare the current policy with the desired state policy. The comparison is done once per distinct current
+        policy, so sites and groups with the same policy share the result
 
-        error_msg = f"Failed to update policy with site or group id {site_group_id}."
-        response = self.api_call(module, api_url, "PUT", body=update_body, error_msg=error_msg)
+        :param current_policy: Policy object which is currently set
+        :type current_policy: dict
+        :return: Tuple of diff (DeepDiff object) and update body. The update body is None if there is no diff
+        :rtype: tuple
+        """
 
-        if not response['data']:
-            module.fail_json(msg=(f"Error in update_policy with site or group id {site_group_id}: Policy should have "
-                                  "been updated via API but result was empty"))
+        # The metadata like id and updatedAt differs in every scope and is not part of the key
+        policy_key = json.dumps(self.get_policy_settings(current_policy), sort_keys=True)
+        if policy_key not in self.policy_changes:
+            diff, merged_policy = self.merge_compare(current_policy, self.desired_state_policy)
+            update_body = None
+            if diff:
+                changed_policy = self.get_changed_subtree(current_policy, merged_policy)
+                update_body = self.get_update_body(changed_policy)
+            self.policy_changes[policy_key] = (diff, update_body)
 
-        return response
+        return self.policy_changes[policy_key]
 
-    def revert_policy(self, site_group_id: str, module: AnsibleModule):
+    def get_own_policy_flags(self, scope_ids_names: list, module: AnsibleModule):
         """
-        API-call to enable policy inheritance. Can be used on site or group level
+        Check which sites or groups have their own policy instead of inheriting it. The inherits flag of the group
+        listing is used for groups. The policies of sites and of groups without the flag are read in parallel
 
-        :param site_group_id: site or group id
-        :type site_group_id: str
+        :param scope_ids_names: List with tuples of site or group id and name
+        :type scope_ids_names: list
         :param module: Ansible module for error handling
         :type module: AnsibleModule
-        :return: API response
-        :rtype: dict
+        :return: True for every scope with its own policy. In the order of scope_ids_names
+        :rtype: list
         """
 
+        own_policy_flags = [None] * len(scope_ids_names)
         if self.current_group_ids_names:
-            api_url = f"{self.api_endpoint_groups}/{site_group_id}/revert-policy"
-        else:
-            api_url = f"{self.api_endpoint_sites}/{site_group_id}/revert-policy"
+            for index, (group_id, group_name) in enumerate(scope_ids_names):
+                inherits = self.group_index[group_name].get('inherits')
+                if inherits is not None:
+                    own_policy_flags[index] = not inherits
 
-        error_msg = f"Failed to revert policy with site or group id {site_group_id}."
-        response = self.api_call(module, api_url, "PUT", error_msg=error_msg)
+        unknown_indexes = [index for index, own_policy in enumerate(own_policy_flags) if own_policy is None]
+        current_policies = self.run_parallel(module, lambda worker_module, index: self.get_current_policy(
+            scope_ids_names[index][0], worker_module), unknown_indexes)
+        for index, current_policy in zip(unknown_indexes, current_policies):
+            # If inheritedFrom is "None" the scope has its own policy
+            own_policy_flags[index] = not current_policy["data"]["inheritedFrom"]
 
-        if not response['data']['success']:
-            module.fail_json(msg=(f"Error in revert_pollicy with site or group id {site_group_id}: Policy should have "
-                                  "been updated via API but result was empty"))
+        return own_policy_flags
 
-        return response
-
-    @staticmethod
-    def get_update_body(policy_settings: dict):
+    def get_current_policy(self, site_group_id: str, module: AnsibleModule):
         """
-        Prepare the merged object for post request
+        Get the policy which is currently set from API. Can be used on site or group scope
 
-        :param policy_settings: desired state policy settings
-        :type policy_settings: dict
-        :return: update body for API
+        :param site_group_id: Site or group id
+        :type site_group_id: str
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Policy object
         :rtype: dict
         """
 
-        # Remove deprecated policy settings. The module would not work correctly in some circumstances
-        del policy_settings['agentNotification']
-        del policy_settings['agentUiOn']
+        # API call to get the policy which is currently set. Can be used on site or group level
+        api_url = self.get_policy_api_url(self.scope_type, site_group_id)
 
-        policy_object = {'data': policy_settings}
+        error_msg = f"Failed to get current policy for site or group with id {site_group_id}."
+        response = self.api_call(module, api_url, error_msg=error_msg)
 
-        return policy_object
+        return response
 
 
 def run_module():
@@ -250,15 +340,22 @@ def run_module():
         console_url=dict(type='str', required=True),
         token=dict(type='str', required=True, no_log=True),
         inherit=dict(type='bool', required=False, default='false'),
-        site_name=dict(type='str', required=True),
+        site_name=dict(type='str', required=False),
+        sites=dict(type='list', required=False, elements='str'),
+        all_sites=dict(type='bool', required=False, default=False),
         groups=dict(type='list', required=False, elements='str', default=[]),
         policy=dict(type='dict', required=False),
+        diff_detail=dict(type='str', required=False, default='summary', choices=['none', 'summary', 'paths', 'full']),
+        parallel_requests=dict(type='int', required=False, default=5),
+        journal=dict(type='path', required=False),
+        resume=dict(type='bool', required=False, default=False),
     )
 
     module = AnsibleModule(
         argument_spec=module_args,
         required_if=[
-            ('inherit', False, ('policy',))
+            ('inherit', False, ('policy',)),
+            ('resume', True, ('journal',))
         ],
         supports_check_mode=False
     )
@@ -271,62 +368,91 @@ def run_module():
     current_group_ids_names = policy_obj.current_group_ids_names
     inherit = policy_obj.inherit
 
+    if current_group_ids_names:
+        # if scope is group level
+        scope_ids_names = current_group_ids_names
+        parent_scope_type = "site"
+    else:
+        # if scope is site level
+        scope_ids_names = policy_obj.current_site_ids_names
+        parent_scope_type = "account"
+    scope_type = policy_obj.scope_type
+    journal = policy_obj.journal
+
+    def update_policy(worker_module, update):
+        policy_obj.update_policy(scope_type, update[0], update[1], worker_module)
+        journal.mark_done(f"update:{update[0]}")
+
+    def revert_policy(worker_module, scope_id_name):
+        policy_obj.revert_policy(scope_type, scope_id_name[0], worker_module)
+        journal.mark_done(f"revert:{scope_id_name[0]}")
+
     diffs = []
     basic_message = []
     if not inherit:
         # if we want to set a custom policy
-        if current_group_ids_names:
-            # if scope is group level
-            for current_group_id_name in current_group_ids_names:
-                current_group_id = current_group_id_name[0]
-                # check if every group has the desired settings already
-                current_policy = policy_obj.get_current_policy(current_group_id, module)
-                desired_state_policy = policy_obj.desired_state_policy
-                diff, merged_policy = policy_obj.merge_compare(current_policy['data'], desired_state_policy)
-                if diff:
-                    # if group policy is different from desired state, update it
-                    current_group_name = current_group_id_name[1]
-                    diffs.append({'changes': dict(diff), 'groupId': current_group_id})
-                    basic_message.append(f"Updating policy for group {current_group_name}")
-                    update_body = policy_obj.get_update_body(merged_policy)
-                    policy_obj.update_policy(current_group_id, update_body, module)
-        else:
-            # if scope is site level
-            # check if site has the desired settings already
-            site_name = policy_obj.site_name
-            site_id = policy_obj.site_id
-            current_policy = policy_obj.get_current_policy(site_id, module)
-            desired_state_policy = policy_obj.desired_state_policy
-            diff, merged_policy = policy_obj.merge_compare(current_policy['data'], desired_state_policy)
+        # Read the policies of all scopes in parallel. The results are in the order of the scopes
+        # Scopes which were updated in the resumed run are skipped
+        scope_ids_names = [scope_id_name for scope_id_name in scope_ids_names
+                           if not journal.is_done(f"update:{scope_id_name[0]}")]
+        current_policies = policy_obj.run_parallel(module, lambda worker_module, scope_id_name: (
+            policy_obj.get_current_policy(scope_id_name[0], worker_module)), scope_ids_names)
+        # List of tuples of site or group id, update body, diff and message
+        update_policies = []
+        for (scope_id, scope_name), current_policy in zip(scope_ids_names, current_policies):
+            # check if every scope has the desired settings already
+            diff, update_body = policy_obj.get_policy_changes(current_policy['data'])
             if diff:
-                # if site policy is different from desired state, update it
-                diffs.append({'changes': dict(diff), 'SiteId': site_id})
-                basic_message.append(f"Updating policy for site {site_name}")
-                update_body = policy_obj.get_update_body(merged_policy)
-                policy_obj.update_policy(site_id, update_body, module)
+                # if policy is different from desired state, update it
+                scope_id_key = 'groupId' if current_group_ids_names else 'siteId'
+                update_policies.append((scope_id, update_body,
+                                        {'changes': policy_obj.format_diff(diff), scope_id_key: scope_id},
+                                        f"Updating policy for {scope_type} {scope_name}"))
+
+        update_results = policy_obj.run_parallel_results(module, update_policy, update_policies)
+        errors = []
+        for update, (response, error) in zip(update_policies, update_results):
+            if error is None:
+                diffs.append(update[2])
+                basic_message.append(update[3])
+            else:
+                errors.append(error)
+        if errors:
+            # Report the scopes which were updated before failing
+            module.fail_json(msg=policy_obj.get_parallel_error_msg(errors, len(update_policies)),
+                             changed=bool(diffs), original_message=diffs, message=basic_message)
     else:
         # if we want to enable inheritance
-        if current_group_ids_names:
-            # if scope is group level
-            for current_group_id_name in current_group_ids_names:
-                current_group_id = current_group_id_name[0]
-                current_policy = policy_obj.get_current_policy(current_group_id, module)
-                if not current_policy["data"]["inheritedFrom"]:
-                    # If inheritedFrom is "None" it will enable inheritance
-                    current_group_name = current_group_id_name[1]
-                    diffs.append({'changes': "Inheritance from site scope enabled", 'groupId': current_group_id})
-                    basic_message.append(f"Enable inheritance from site scope in group {current_group_name}")
-                    policy_obj.revert_policy(current_group_id, module)
-        else:
-            # if scope is site level
-            site_name = policy_obj.site_name
-            site_id = policy_obj.site_id
-            current_policy = policy_obj.get_current_policy(site_id, module)
-            if not current_policy["data"]["inheritedFrom"]:
-                # If inheritedFrom is "None" it will enable inheritance
-                diffs.append({'changes': "Inheritance from account scope enabled", 'siteId': site_id})
-                basic_message.append(f"Enable inheritance from account scope in site {site_name}")
-                policy_obj.revert_policy(site_id, module)
+        # Scopes which were reverted in the resumed run are skipped
+        scope_ids_names = [scope_id_name for scope_id_name in scope_ids_names
+                           if not journal.is_done(f"revert:{scope_id_name[0]}")]
+        own_policy_flags = policy_obj.get_own_policy_flags(scope_ids_names, module)
+        revert_scope_ids_names = [scope_id_name for scope_id_name, own_policy in zip(scope_ids_names, own_policy_flags)
+                                  if own_policy]
+        scope_id_key = 'groupId' if current_group_ids_names else 'siteId'
+
+        # The API reverts one scope per request. Send all requests in parallel
+        revert_results = policy_obj.run_parallel_results(module, revert_policy, revert_scope_ids_names)
+        errors = [error for response, error in revert_results if error is not None]
+        reverted_scope_ids_names = [scope_id_name for scope_id_name, (response, error)
+                                    in zip(revert_scope_ids_names, revert_results) if error is None]
+        for scope_id, scope_name in reverted_scope_ids_names:
+            diffs.append({'changes': f"Inheritance from {parent_scope_type} scope enabled", scope_id_key: scope_id})
+
+        # One summary of all changed scopes
+        revert_scope_names = [scope_name for scope_id, scope_name in reverted_scope_ids_names]
+        if len(revert_scope_names) == 1:
+            basic_message.append(f"Enable inheritance from {parent_scope_type} scope in {scope_type} "
+                                 f"{revert_scope_names[0]}")
+        elif revert_scope_names:
+            basic_message.append(f"Enable inheritance from {parent_scope_type} scope in {len(revert_scope_names)} "
+                                 f"{scope_type}s: {', '.join(revert_scope_names)}")
+        if errors:
+            # Report the scopes which were reverted before failing
+            module.fail_json(msg=policy_obj.get_parallel_error_msg(errors, len(revert_scope_ids_names)),
+                             changed=bool(diffs), original_message=diffs, message=basic_message)
+
+    journal.complete()
 
     result = dict(
         changed=False,
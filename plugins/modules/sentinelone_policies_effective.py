@@ -0,0 +1,285 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: sentinelone_policies_effective
+short_description: "Resolve the effective SentinelOne Policies of a site and its groups"
+version_added: "2.1.0"
+description:
+  - "This module resolves the policy which is effective in a site and its groups along the inheritance from account
+    to site to group"
+  - "The account, site and group policies are read once. Groups which inherit the site policy are resolved locally
+    without reading their policy"
+  - "A site or group which overrides the policy of the upper scope with identical settings is reported as redundant.
+    Redundant overrides can be reverted to inheritance"
+options:
+  console_url:
+    description:
+      - "Insert your management console URL"
+    type: str
+    required: true
+  token:
+    description:
+      - "SentinelOne API auth token to authenticate at the management API"
+    type: str
+    required: true
+  site_name:
+    description:
+      - "Name of the site in SentinelOne"
+    type: str
+    required: true
+  groups:
+    description:
+      - "A list with the names of the groups to resolve"
+      - "If not set, all groups of the site are resolved"
+    type: list
+    elements: str
+    default: []
+    required: false
+  settings:
+    description:
+      - "A list of settings whose effective values are returned. Nested settings are separated by dots, e.g.
+        C(agentUi.agentUiOn)"
+      - "If not set, the complete effective policy is returned"
+    type: list
+    elements: str
+    default: []
+    required: false
+  revert_redundant:
+    description:
+      - "If yes, redundant overrides are reverted to inheritance. Otherwise they are only reported"
+    type: bool
+    required: false
+    default: no
+  parallel_requests:
+    description:
+      - "Maximum count of API requests which are sent at the same time"
+    type: int
+    required: false
+    default: 5
+author:
+  - "Marco Wester (@mwester117) <marco.wester@sva.de>"
+notes:
+  - "Currently only supported in single-account management consoles"
+  - "The keys id, inheritedFrom, createdAt and updatedAt are ignored when policies are compared"
+'''
+
+EXAMPLES = r'''
+---
+- name: Get the effective agent UI setting of all groups
+  sva.sentinelone.sentinelone_policies_effective:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    settings:
+      - "agentUi.agentUiOn"
+      - "mitigationMode"
+- name: Revert group policies which are identical to the site policy
+  sva.sentinelone.sentinelone_policies_effective:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    settings:
+      - "mitigationMode"
+    revert_redundant: true
+'''
+
+RETURN = r'''
+---
+original_message:
+    description: Effective policy of the site and the groups. C(inheritedFrom) is null if the scope has its own policy
+    returned: on success
+    type: list
+    sample: [{"siteId": "99999999999999998", "siteName": "test", "inheritedFrom": "account", "redundant": false,
+              "settings": {"mitigationMode": "protect"}},
+             {"groupId": "99999999999999999", "groupName": "MariaDB", "inheritedFrom": null, "redundant": true,
+              "settings": {"mitigationMode": "protect"}}]
+message:
+    description: Get basic infos about the redundant overrides
+    returned: on success
+    type: list
+    sample: [ "Group MariaDB overrides the site policy with identical settings. Reverting to inheritance." ]
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_policies_base import SentinelonePoliciesBase
+
+
+class SentinelonePoliciesEffective(SentinelonePoliciesBase):
+    def __init__(self, module: AnsibleModule):
+        """
+        Initialization of the effective policies object
+
+        :param module: Requires the AnsibleModule Object for parsing the parameters
+        :type module: AnsibleModule
+        """
+
+        # The groups are resolved by this module because all groups of the site are needed if no groups are passed.
+        # Removing them so the super class does not resolve them again
+        self.requested_group_names = module.params["groups"]
+        module.params["groups"] = []
+
+        # self.token, self.console_url, self.site_name, self.state, self.api_endpoint_*, self.group_names will be set in
+        # super Class
+        super().__init__(module)
+
+        self.settings = module.params["settings"]
+        self.revert_redundant = module.params["revert_redundant"]
+        self.groups = self.get_requested_groups(module)
+
+        # Read every policy which is not inherited once. Inheriting groups are resolved with the site policy
+        self.site_policy = self.get_scope_policy("site", self.site_id, module)
+        if self.site_policy.get('inheritedFrom') is None:
+            self.get_scope_policy("account", self.account_id, module)
+        self.run_parallel(module, lambda worker_module, group: self.get_scope_policy(
+            "group", group['id'], worker_module), [group for group in self.groups if not group.get('inherits', False)])
+
+    def get_requested_groups(self, module: AnsibleModule):
+        """
+        Returns the passed groups or all groups of the site
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Group objects
+        :rtype: list
+        """
+
+        group_index = self.get_group_index(module)
+        if not self.requested_group_names:
+            return list(group_index.values())
+
+        missing_group_names = [group_name for group_name in self.requested_group_names
+                               if group_name not in group_index]
+        if missing_group_names:
+            module.fail_json(msg=f"Groups not found: {', '.join(missing_group_names)}")
+
+        return [group_index[group_name] for group_name in self.requested_group_names]
+
+    def get_effective_group_policy(self, group: dict):
+        """
+        Returns the policy which is effective in the group. Does not call the API
+
+        :param group: Group object
+        :type group: dict
+        :return: Tuple of the effective policy and a flag which is True if the group has its own policy
+        :rtype: tuple
+        """
+
+        own_policy = self.policy_cache.get(("group", group['id']))
+        if own_policy is not None and own_policy.get('inheritedFrom') is None:
+            return own_policy, True
+
+        return self.site_policy, False
+
+    def get_policy_values(self, policy: dict):
+        """
+        Returns the values of the settings option or the complete policy if no settings are passed
+
+        :param policy: Policy object
+        :type policy: dict
+        :return: Dictionary with the settings as keys and the values of the policy. Missing settings are None
+        :rtype: dict
+        """
+
+        if not self.settings:
+            return self.get_policy_settings(policy)
+
+        policy_values = {}
+        for setting in self.settings:
+            value = policy
+            for key in setting.split('.'):
+                value = value.get(key) if isinstance(value, dict) else None
+            policy_values[setting] = value
+
+        return policy_values
+
+
+def run_module():
+    # define available arguments/parameters a user can pass to the module
+    module_args = dict(
+        console_url=dict(type='str', required=True),
+        token=dict(type='str', required=True, no_log=True),
+        site_name=dict(type='str', required=True),
+        groups=dict(type='list', required=False, elements='str', default=[]),
+        settings=dict(type='list', required=False, elements='str', default=[]),
+        revert_redundant=dict(type='bool', required=False, default=False),
+        parallel_requests=dict(type='int', required=False, default=5),
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=False
+    )
+
+    # Create effective policies Object
+    policies_obj = SentinelonePoliciesEffective(module)
+
+    action = "Reverting to inheritance." if policies_obj.revert_redundant else "Policy can be reverted to inheritance."
+    site_policy = policies_obj.site_policy
+
+    effective_policies = []
+    basic_message = []
+    # List of tuples of scope type and scope id
+    revert_scopes = []
+
+    site_redundant = False
+    if site_policy.get('inheritedFrom') is None:
+        account_policy = policies_obj.get_scope_policy("account", policies_obj.account_id, module)
+        site_redundant = policies_obj.policies_equal(site_policy, account_policy)
+    if site_redundant:
+        revert_scopes.append(("site", policies_obj.site_id))
+        basic_message.append(f"Site {policies_obj.site_name} overrides the account policy with identical settings. "
+                             f"{action}")
+    effective_policies.append({
+        'siteId': policies_obj.site_id,
+        'siteName': policies_obj.site_name,
+        'inheritedFrom': site_policy.get('inheritedFrom'),
+        'redundant': site_redundant,
+        'settings': policies_obj.get_policy_values(site_policy)
+    })
+
+    for group in policies_obj.groups:
+        effective_policy, own_policy = policies_obj.get_effective_group_policy(group)
+        group_redundant = own_policy and policies_obj.policies_equal(effective_policy, site_policy)
+        if group_redundant:
+            revert_scopes.append(("group", group['id']))
+            basic_message.append(f"Group {group['name']} overrides the site policy with identical settings. {action}")
+        effective_policies.append({
+            'groupId': group['id'],
+            'groupName': group['name'],
+            'inheritedFrom': None if own_policy else "site",
+            'redundant': group_redundant,
+            'settings': policies_obj.get_policy_values(effective_policy)
+        })
+
+    changed = False
+    if revert_scopes and policies_obj.revert_redundant:
+        policies_obj.run_parallel(module, lambda worker_module, scope: policies_obj.revert_policy(
+            scope[0], scope[1], worker_module), revert_scopes)
+        changed = True
+    elif not revert_scopes:
+        basic_message.append("No redundant policy overrides found")
+
+    result = dict(
+        changed=changed,
+        original_message=effective_policies,
+        message=basic_message
+    )
+
+    # in the event of a successful module execution, you will want to
+    # simple AnsibleModule.exit_json(), passing the key/value results
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
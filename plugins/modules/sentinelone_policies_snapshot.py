@@ -0,0 +1,405 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: sentinelone_policies_snapshot
+short_description: "Export and restore the SentinelOne Policies of sites and groups"
+version_added: "2.1.0"
+description:
+  - "This module exports the policies of all sites and groups of the account to a snapshot file or restores them from
+    a snapshot file"
+  - "The snapshot is a gzip compressed JSON file. Every distinct policy is stored once under the sha256 fingerprint of
+    its settings. Sites and groups only reference the fingerprint or are marked as inheriting"
+  - "A restore only updates the sites and groups whose policy differs from the snapshot"
+options:
+  console_url:
+    description:
+      - "Insert your management console URL"
+    type: str
+    required: true
+  token:
+    description:
+      - "SentinelOne API auth token to authenticate at the management API"
+    type: str
+    required: true
+  action:
+    description:
+      - "C(export): Write the current policies to I(path)"
+      - "C(restore): Set the policies of I(path)"
+    type: str
+    required: false
+    default: export
+    choices:
+      - export
+      - restore
+  path:
+    description:
+      - "Path of the snapshot file on the host the module runs on. Usually the controller (C(delegate_to: localhost))"
+    type: path
+    required: true
+  sites:
+    description:
+      - "A list with the names of the sites to export or restore"
+      - "If not set, all active sites of the account are exported or all sites of the snapshot are restored"
+    type: list
+    elements: str
+    default: []
+    required: false
+  parallel_requests:
+    description:
+      - "Maximum count of API requests which are sent at the same time"
+    type: int
+    required: false
+    default: 5
+author:
+  - "Marco Wester (@mwester117) <marco.wester@sva.de>"
+notes:
+  - "Currently only supported in single-account management consoles"
+  - "Sites and groups are matched by name on restore, so a snapshot can be restored into recreated sites and groups.
+    Groups of the snapshot which do not exist are skipped with a warning"
+  - "The keys id, inheritedFrom, createdAt and updatedAt are not part of the snapshot"
+  - "The deprecated settings agentNotification and agentUiOn are not restored"
+'''
+
+EXAMPLES = r'''
+---
+- name: Export the policies of all sites and groups
+  sva.sentinelone.sentinelone_policies_snapshot:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    path: "backup/policies.json.gz"
+  delegate_to: localhost
+- name: Restore the policies of one site
+  sva.sentinelone.sentinelone_policies_snapshot:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    action: "restore"
+    path: "backup/policies.json.gz"
+    sites:
+      - "test"
+    parallel_requests: 10
+  delegate_to: localhost
+'''
+
+RETURN = r'''
+---
+original_message:
+    description:
+      - "export: Count of the exported sites, groups and distinct policies"
+      - "restore: The sites and groups which were changed"
+    returned: on success
+    type: list
+    sample: [{"changes": "Policy restored", "siteName": "test", "groupName": "MariaDB",
+              "fingerprint": "9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08"}]
+message:
+    description: Get basic infos about the changes made
+    returned: on success
+    type: list
+    sample: [ "Policy of group MariaDB in site test differs from the snapshot. Restoring policy." ]
+'''
+
+import gzip
+import json
+import os
+import tempfile
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import WorkerError, WorkerModule
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_policies_base import SentinelonePoliciesBase
+
+
+class SentinelonePoliciesSnapshot(SentinelonePoliciesBase):
+    # Version of the snapshot format. Snapshots of other versions are not restored
+    format_version = 1
+
+    def __init__(self, module: AnsibleModule):
+        """
+        Initialization of the policies snapshot object
+
+        :param module: Requires the AnsibleModule Object for parsing the parameters
+        :type module: AnsibleModule
+        """
+
+        # The module works on multiple sites. super class __init__ expects a single site_name
+        module.params["site_name"] = None
+
+        # self.token, self.console_url, self.site_name, self.state, self.api_endpoint_*, self.group_names will be set in
+        # super Class
+        super().__init__(module)
+
+        self.action = module.params["action"]
+        self.path = module.params["path"]
+        self.site_names = module.params["sites"]
+
+    def get_current_scopes(self, site_names: list, module: AnsibleModule):
+        """
+        Read the policies of the sites and their groups. The policies are read in parallel. Groups which inherit the
+        site policy according to the group listing are not read
+
+        :param site_names: Names of the sites or None for all active sites
+        :type site_names: list
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: List of scope dictionaries with the keys type, siteName, siteId, groupName, groupId (groups only),
+        inherits and settings (None if the scope inherits)
+        :rtype: list
+        """
+
+        sites = self.get_sites(site_names, module)
+        self.run_parallel(module, lambda worker_module, site: self.get_scope_policy(
+            "site", site['id'], worker_module), sites)
+        group_indexes = self.run_parallel(module, lambda worker_module, site: self.get_group_index(
+            worker_module, site['id']), sites)
+
+        own_policy_groups = [group for group_index in group_indexes for group in group_index.values()
+                             if not group.get('inherits', False)]
+        self.run_parallel(module, lambda worker_module, group: self.get_scope_policy(
+            "group", group['id'], worker_module), own_policy_groups)
+
+        scopes = []
+        for site, group_index in zip(sites, group_indexes):
+            site_policy = self.policy_cache[("site", site['id'])]
+            site_inherits = site_policy.get('inheritedFrom') is not None
+            scopes.append({
+                'type': "site",
+                'siteName': site['name'],
+                'siteId': site['id'],
+                'inherits': site_inherits,
+                'settings': None if site_inherits else self.get_policy_settings(site_policy)
+            })
+            for group_name in sorted(group_index):
+                group = group_index[group_name]
+                group_policy = self.policy_cache.get(("group", group['id']))
+                group_inherits = group_policy is None or group_policy.get('inheritedFrom') is not None
+                scopes.append({
+                    'type': "group",
+                    'siteName': site['name'],
+                    'siteId': site['id'],
+                    'groupName': group_name,
+                    'groupId': group['id'],
+                    'inherits': group_inherits,
+                    'settings': None if group_inherits else self.get_policy_settings(group_policy)
+                })
+
+        return scopes
+
+    def build_snapshot(self, scopes: list):
+        """
+        Build the snapshot of the scopes. Every distinct policy is stored once
+
+        :param scopes: Scopes returned by get_current_scopes
+        :type scopes: list
+        :return: Snapshot object
+        :rtype: dict
+        """
+
+        documents = {}
+        snapshot_scopes = []
+        for scope in scopes:
+            snapshot_scope = {key: value for key, value in scope.items() if key not in ('settings', 'siteId', 'groupId')}
+            snapshot_scope['fingerprint'] = None
+            if scope['settings'] is not None:
+                fingerprint = self.get_fingerprint(scope['settings'])
+                documents.setdefault(fingerprint, scope['settings'])
+                snapshot_scope['fingerprint'] = fingerprint
+            snapshot_scopes.append(snapshot_scope)
+
+        return {
+            'formatVersion': self.format_version,
+            'scopes': snapshot_scopes,
+            'documents': documents
+        }
+
+    def read_snapshot(self, module: AnsibleModule):
+        """
+        Read the snapshot file
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Snapshot object or None if the file does not exist
+        :rtype: dict
+        """
+
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            with gzip.open(self.path, 'rt', encoding='utf-8') as snapshot_file:
+                snapshot = json.load(snapshot_file)
+        except (OSError, EOFError, ValueError) as err:
+            module.fail_json(msg=f"Failed to read snapshot {self.path}: {err}")
+
+        if not isinstance(snapshot, dict) or snapshot.get('formatVersion') != self.format_version:
+            module.fail_json(msg=f"Snapshot {self.path} has an unsupported format")
+
+        return snapshot
+
+    def write_snapshot(self, snapshot: dict, module: AnsibleModule):
+        """
+        Write the snapshot file. The file is replaced atomically
+
+        :param snapshot: Snapshot object
+        :type snapshot: dict
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        """
+
+        snapshot_dir = os.path.dirname(os.path.abspath(self.path))
+        tmp_file_name = None
+        try:
+            with tempfile.NamedTemporaryFile(dir=snapshot_dir, delete=False) as tmp_file:
+                tmp_file_name = tmp_file.name
+                # mtime=0 makes the file content only depend on the snapshot
+                with gzip.GzipFile(fileobj=tmp_file, mode='wb', mtime=0) as gzip_file:
+                    gzip_file.write(json.dumps(snapshot, sort_keys=True).encode('utf-8'))
+        except OSError as err:
+            if tmp_file_name is not None and os.path.exists(tmp_file_name):
+                os.remove(tmp_file_name)
+            module.fail_json(msg=f"Failed to write snapshot {self.path}: {err}")
+
+        module.atomic_move(tmp_file_name, os.path.abspath(self.path))
+
+    def snapshot_differs(self, snapshot: dict, module: AnsibleModule):
+        """
+        Check if the snapshot file differs from snapshot. A file which can not be read or has an unsupported format
+        differs, so it gets replaced by the export
+
+        :param snapshot: Snapshot object
+        :type snapshot: dict
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :rtype: bool
+        """
+
+        try:
+            # WorkerModule raises instead of ending the module if the file can not be read
+            return self.read_snapshot(WorkerModule(module)) != snapshot
+        except WorkerError:
+            return True
+
+
+def run_module():
+    # define available arguments/parameters a user can pass to the module
+    module_args = dict(
+        console_url=dict(type='str', required=True),
+        token=dict(type='str', required=True, no_log=True),
+        action=dict(type='str', required=False, default='export', choices=['export', 'restore']),
+        path=dict(type='path', required=True),
+        sites=dict(type='list', required=False, elements='str', default=[]),
+        parallel_requests=dict(type='int', required=False, default=5),
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=False
+    )
+
+    # Create policies snapshot Object
+    snapshot_obj = SentinelonePoliciesSnapshot(module)
+
+    changes = []
+    basic_message = []
+    if snapshot_obj.action == 'export':
+        scopes = snapshot_obj.get_current_scopes(snapshot_obj.site_names or None, module)
+        snapshot = snapshot_obj.build_snapshot(scopes)
+        count_sites = len([scope for scope in snapshot['scopes'] if scope['type'] == "site"])
+        changes.append({
+            'sites': count_sites,
+            'groups': len(snapshot['scopes']) - count_sites,
+            'documents': len(snapshot['documents'])
+        })
+        if not snapshot_obj.snapshot_differs(snapshot, module):
+            basic_message.append(f"Snapshot {snapshot_obj.path} is up-to-date")
+        else:
+            snapshot_obj.write_snapshot(snapshot, module)
+            basic_message.append(f"Exported {changes[0]['sites']} sites and {changes[0]['groups']} groups with "
+                                 f"{changes[0]['documents']} distinct policies to {snapshot_obj.path}")
+            changes[0]['changes'] = "Snapshot written"
+    else:
+        snapshot = snapshot_obj.read_snapshot(module)
+        if snapshot is None:
+            module.fail_json(msg=f"Snapshot {snapshot_obj.path} does not exist")
+
+        snapshot_scopes = [scope for scope in snapshot['scopes']
+                           if not snapshot_obj.site_names or scope['siteName'] in snapshot_obj.site_names]
+        site_names = list(dict.fromkeys(scope['siteName'] for scope in snapshot_scopes))
+        current_scopes = {(scope['siteName'], scope.get('groupName')): scope
+                          for scope in snapshot_obj.get_current_scopes(site_names, module)}
+
+        # List of tuples of scope type, scope id, update body, change and message. The update body is None for reverts
+        restore_scopes = []
+        for snapshot_scope in snapshot_scopes:
+            scope_type = snapshot_scope['type']
+            group_name = snapshot_scope.get('groupName')
+            current_scope = current_scopes.get((snapshot_scope['siteName'], group_name))
+            scope_message_name = f"site {snapshot_scope['siteName']}"
+            if group_name is not None:
+                scope_message_name = f"group {group_name} in site {snapshot_scope['siteName']}"
+            if current_scope is None:
+                module.warn(f"The {scope_message_name} of the snapshot does not exist. Skipping.")
+                continue
+
+            scope_id = current_scope['groupId'] if scope_type == "group" else current_scope['siteId']
+            change = {'siteName': snapshot_scope['siteName']}
+            if group_name is not None:
+                change['groupName'] = group_name
+            if snapshot_scope['inherits']:
+                if current_scope['inherits']:
+                    continue
+                change['changes'] = "Inheritance enabled"
+                restore_scopes.append((scope_type, scope_id, None, change,
+                                       f"Policy of {scope_message_name} is inherited in the snapshot. "
+                                       f"Enabling inheritance."))
+            else:
+                fingerprint = snapshot_scope['fingerprint']
+                if (not current_scope['inherits'] and
+                        snapshot_obj.get_fingerprint(current_scope['settings']) == fingerprint):
+                    continue
+                # The complete policy of the snapshot is sent
+                update_body = snapshot_obj.get_update_body(dict(snapshot['documents'][fingerprint]))
+                change['changes'] = "Policy restored"
+                change['fingerprint'] = fingerprint
+                restore_scopes.append((scope_type, scope_id, update_body, change,
+                                       f"Policy of {scope_message_name} differs from the snapshot. Restoring policy."))
+
+        restore_results = snapshot_obj.run_parallel_results(module, lambda worker_module, restore: (
+            snapshot_obj.revert_policy(restore[0], restore[1], worker_module) if restore[2] is None else
+            snapshot_obj.update_policy(restore[0], restore[1], restore[2], worker_module)), restore_scopes)
+        errors = []
+        for restore, (response, error) in zip(restore_scopes, restore_results):
+            if error is None:
+                changes.append(restore[3])
+                basic_message.append(restore[4])
+            else:
+                errors.append(error)
+        if errors:
+            # Report the scopes which were restored before failing
+            module.fail_json(msg=snapshot_obj.get_parallel_error_msg(errors, len(restore_scopes)),
+                             changed=bool(changes), original_message=changes, message=basic_message)
+
+        if not restore_scopes:
+            basic_message.append("Nothing to change, all policies match the snapshot")
+
+    result = dict(
+        changed=any('changes' in change for change in changes),
+        original_message=changes,
+        message=basic_message
+    )
+
+    # in the event of a successful module execution, you will want to
+    # simple AnsibleModule.exit_json(), passing the key/value results
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
@@ -81,6 +81,8 @@ options:
     type: str
     required: false
     default: ""
+extends_documentation_fragment:
+  - sva.sentinelone.diff_detail
 author:
   - "Marco Wester (@mwester117) <marco.wester@sva.de>"
 requirements:
@@ -112,11 +114,13 @@ EXAMPLES = r'''
 RETURN = r'''
 ---
 original_message:
-    description: Get detailed infos about the changes made
-    type: str
+    description:
+      - Get detailed infos about the changes made
+      - The changes are reported in the level of detail set by I(diff_detail). The sample shows the default C(summary).
+        The old and new values are only returned with I(diff_detail=full)
+    type: dict
     returned: on success
-    sample: {'changes': {'values_changed': {"root['description']": {'new_value': 'Test1', 'old_value': 'Test'},
-      "root['unlimitedExpiration']": {'new_value': True, 'old_value': False}}}, 'siteName': 'test'}
+    sample: {"changes": {"values_changed": 2}, "siteName": "test"}
 message:
     description: Get basic infos about the changes made
     type: str
@@ -321,7 +325,8 @@ def run_module():
         license_type=dict(type='str', required=False, choices=['core', 'control', 'complete'], default='core'),
         total_agents=dict(type='int', required=False, default=-1),
         expiration_date=dict(type='str', required=False, default="-1"),
-        description=dict(type='str', required=False, default='')
+        description=dict(type='str', required=False, default=''),
+        diff_detail=dict(type='str', required=False, default='summary', choices=['none', 'summary', 'paths', 'full']),
     )
 
     module = AnsibleModule(
@@ -352,12 +357,13 @@ def run_module():
                 "root['licenses']['bundles'][0]['majorVersion']", "root['licenses']['bundles'][0]['minorVersion']",
                 "root['licenses']['bundles'][0]['totalSurfaces']"
             ]
-            diff = site_obj.merge_compare(current_site, desired_state_site, exclude_path)[0]
+            diff, merged_site = site_obj.merge_compare(current_site, desired_state_site, exclude_path)
             if diff:
-                # Update site if it is not up-to-date
-                diffs = {'changes': dict(diff), 'siteName': site_name}
+                # Update site if it is not up-to-date. Only the changed settings are sent to the API
+                diffs = {'changes': site_obj.format_diff(diff), 'siteName': site_name}
                 basic_message = 'Site exists but is not up-to-date. Updating site.'
-                site_obj.update_site(desired_state_site, module)
+                update_site_body = site_obj.get_changed_subtree(current_site, merged_site, exclude_path)
+                site_obj.update_site(update_site_body, module)
         else:
             # Creates the site if it is missing
             basic_message = f'Site is missing. Adding site {site_name}'
@@ -74,6 +74,16 @@ options:
     type: str
     required: false
     default: "+00:00"
+  parallel_requests:
+    description:
+      - "Maximum count of API requests which are sent at the same time if several groups are passed"
+      - "The upgrade policies of all groups are read and checked first. No upgrade policy is updated if
+        I(max_concurrent_downloads) is higher than the value of the upper scope"
+    type: int
+    required: false
+    default: 5
+extends_documentation_fragment:
+  - sva.sentinelone.diff_detail
 author:
   - "Marco Wester (@mwester117) <marco.wester@sva.de>"
 requirements:
@@ -82,6 +92,7 @@ notes:
   - "Python module deepdiff. Tested with version >=5.6. Lower version may work too"
   - "Currently only supported in single-account management consoles"
   - "Currently not applicable for account level upgrade policies"
+  - "Groups which need the same upgrade policy are updated together with one request per 100 groups"
 '''
 
 EXAMPLES = r'''
@@ -147,20 +158,14 @@ EXAMPLES = r'''
 RETURN = r'''
 ---
 original_message:
-    description: Get detailed infos about the changes made
-    type: str
+    description:
+      - Get detailed infos about the changes made
+      - The changes are reported in the level of detail set by I(diff_detail). The sample shows the default C(summary).
+        The old and new values are only returned with I(diff_detail=full)
+    type: list
     returned: on success
-    sample: [{'changes': {'dictionary_item_removed': ["root['data']['maintenanceWindowsByDay']['Friday']",
-      "root['data']['maintenanceWindowsByDay']['Saturday']", "root['data']['maintenanceWindowsByDay']['Sunday']",
-      "root['data']['maintenanceWindowsByDay']['Thursday']"], 'values_changed':
-      {"root['data']['inheritParentMaintenanceConfig']": {'new_value': False, 'old_value': True},
-      "root['data']['maintenanceWindowsByDay']['Monday']['isMaintenanceAllDay']": {'new_value': False, 'old_value': True},
-      "root['data']['maintenanceWindowsByDay']['Tuesday']['isMaintenanceAllDay']": {'new_value': False, 'old_value': True}},
-      'iterable_item_added': {"root['data']['maintenanceWindowsByDay']['Monday']['maintenanceHours'][0]":
-      {'fromTime': '8:00 am', 'toTime': '11:00 pm'},
-      "root['data']['maintenanceWindowsByDay']['Tuesday']['maintenanceHours'][0]": {'fromTime': '8:00 am',
-      'toTime': '12:00 pm'}, "root['data']['maintenanceWindowsByDay']['Tuesday']['maintenanceHours'][1]":
-      {'fromTime': '3:00 pm', 'toTime': '7:00 pm'}}}, 'SiteId': '9999999999999999999'}]
+    sample: [{"changes": {"dictionary_item_removed": 4, "values_changed": 3, "iterable_item_added": 3},
+              "SiteId": "9999999999999999999"}]
 message:
     description: Get basic infos about the changes made
     type: list
@@ -168,12 +173,17 @@ message:
     sample: ["Updating upgrade policy for group group1", "Updating upgrade policy for group group2"]
 '''
 
+import json
+
 from ansible.module_utils.basic import AnsibleModule, missing_required_lib
-from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase, lib_imp_errors
-from datetime import datetime
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import lib_imp_errors
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_upgrade_policies_base import SentineloneUpgradePoliciesBase
 
 
-class SentineloneUpgradePolicies(SentineloneBase):
+class SentineloneUpgradePolicies(SentineloneUpgradePoliciesBase):
+    # Maximum count of group ids in the filter of one update request
+    max_filter_ids = 100
+
     def __init__(self, module: AnsibleModule):
         """
         Initialization of the upgrade policies object
@@ -201,60 +211,6 @@ class SentineloneUpgradePolicies(SentineloneBase):
         self.check_sanity(self.inherit_maintenance_windows, self.desired_state_timezone,
                           self.desired_state_maintenance_windows, module)
 
-    def get_current_upgrade_policy(self, site_group_id: str, module: AnsibleModule):
-        """
-        Get the upgrade policy which is currently set from API. Can be used on site or group scope
-
-        :param site_group_id: Site or group id
-        :type site_group_id: str
-        :param module: Ansible module for error handling
-        :type module: AnsibleModule
-        :return: Upgrade Policy object
-        :rtype: dict
-        """
-
-        site_id = self.site_id
-
-        # Build API call to get the upgrade policy which is currently set. Can be used on site or group level
-        query_options = ["taskType=agents_upgrade"]
-        if self.current_group_ids_names:
-            query_options.append(f"groupIds={site_group_id}")
-        else:
-            query_options.append(f"siteIds={site_id}")
-
-        query_uri = '&'.join(query_options)
-        api_url = f"{self.api_endpoint_upgrade_policy}?{query_uri}"
-
-        error_msg = f"Failed to get current upgrade policy for site or group with id {site_group_id}."
-        response = self.api_call(module, api_url, error_msg=error_msg)
-
-        return response
-
-    def update_upgrade_policy(self, site_group_id: str, update_body: dict, module: AnsibleModule):
-        """
-        API call to update the upgrade policy. Can be used on site or group level
-
-        :param site_group_id: Site or group id
-        :type site_group_id: str
-        :param update_body: Dictionary object which is used for updating the existing upgrade policy object
-        :type update_body: dict
-        :param module: Ansible module for error handling
-        :type module: AnsibleModule
-        :return: API response
-        :rtype: dict
-        """
-
-        api_url = self.api_endpoint_upgrade_policy
-
-        error_msg = f"Failed to update the upgrade policy with site or group id {site_group_id}."
-        response = self.api_call(module, api_url, "PUT", body=update_body, error_msg=error_msg)
-
-        if not response['data']:
-            module.fail_json(msg=(f"Error in update_upgrade_policy with site or group id {site_group_id}: "
-                                  f"Upgrade policy should have been updated via API but result was empty"))
-
-        return response
-
     def get_desired_state_upgrade_policy(self, parent_max_concurrent_downloads: int):
         """
         Generate desired state upgrade policy object
@@ -322,66 +278,89 @@ class SentineloneUpgradePolicies(SentineloneBase):
 
         return desired_state_upgrade_policy
 
-    def get_update_body(self, desired_state_upgrade_policy: dict, site_group_id: int):
+    def get_update_body(self, desired_state_upgrade_policy: dict, site_group_ids: list):
         """
-        Create post object. Adding additional keys to the object.
+        Create post object. Adding additional keys to the object. desired_state_upgrade_policy is not changed
 
         :param desired_state_upgrade_policy: upgrade policy which should be set
         :type desired_state_upgrade_policy: dict
-        :param site_group_id: Site_id or group_id. Depends on the scope
-        :type site_group_id: int
+        :param site_group_ids: Site_id or group_ids. Depends on the scope. The API sets the same upgrade policy for all
+        of them
+        :type site_group_ids: list
         :return: Body which can be used with API
         :rtype: dict
         """
-        desired_state_upgrade_policy['filter'] = {'taskType': 'agents_upgrade'}
+        update_body = dict(desired_state_upgrade_policy)
+        update_body['filter'] = {'taskType': 'agents_upgrade'}
 
         if self.current_group_ids_names:
-            desired_state_upgrade_policy['filter']['groupIds'] = [site_group_id]
+            update_body['filter']['groupIds'] = site_group_ids
         else:
-            desired_state_upgrade_policy['filter']['siteIds'] = [site_group_id]
+            update_body['filter']['siteIds'] = site_group_ids
 
-        return desired_state_upgrade_policy
+        return update_body
+
+    def get_update_bodies(self, update_group_ids: dict):
+        """
+        Create the update bodies for groups which need the same upgrade policy. Each body contains at most
+        max_filter_ids group ids
+
+        :param update_group_ids: Dictionary with the canonical JSON of the desired state upgrade policy as key and the
+        list of group ids as value
+        :type update_group_ids: dict
+        :return: List of tuples of group ids and update body
+        :rtype: list
+        """
+
+        update_bodies = []
+        for desired_state_json, group_ids in update_group_ids.items():
+            desired_state_upgrade_policy = json.loads(desired_state_json)
+            for index in range(0, len(group_ids), self.max_filter_ids):
+                chunk_group_ids = group_ids[index:index + self.max_filter_ids]
+                update_bodies.append((chunk_group_ids,
+                                      self.get_update_body(desired_state_upgrade_policy, chunk_group_ids)))
 
-    def check_max_concurrent_downloads_size(self, current_upgrade_policy: dict, inherit_max_concurrent_downloads: bool,
+        return update_bodies
+
+    def check_max_concurrent_downloads_size(self, current_upgrade_policies: list, inherit_max_concurrent_downloads: bool,
                                             module: AnsibleModule):
         """
-        Check if desired state max concurrent downloads value is lower than upper scopes max concurrent downloads value
+        Check if desired state max concurrent downloads value is lower than upper scopes max concurrent downloads value.
+        The check is done once with the lowest upper scope value of all passed upgrade policies, so the module fails
+        before any upgrade policy is updated
 
-        :param current_upgrade_policy: Upgrade policy which is currently set
-        :type current_upgrade_policy: dict
+        :param current_upgrade_policies: Upgrade policies which are currently set
+        :type current_upgrade_policies: list
         :param inherit_max_concurrent_downloads: Should the maximum concurrent downloads be inherited from upper scope
         :type inherit_max_concurrent_downloads: bool
         :param module: Ansible module for error handling
         :type module: AnsibleModule
-        :return: Parent max concurrent downloads is returned
-        :rtype: int
         """
-        parent_max_concurrent_downloads = current_upgrade_policy['data']['parentMaxConcurrent']
-        if not inherit_max_concurrent_downloads:
-            if parent_max_concurrent_downloads < self.desired_state_max_concurrent_downloads:
-                module.fail_json(msg="max_concurrent_downloads is higher than the upper scopes Maximum Concurrent "
-                                     "Downloads value. Please use a value lower than or equal to "
-                                     f"{parent_max_concurrent_downloads}")
-            parent_max_concurrent_downloads = None
 
-        return parent_max_concurrent_downloads
+        if inherit_max_concurrent_downloads:
+            return
 
-    @staticmethod
-    def clean_current_upgrade_policy_object(upgrade_policy_object: dict):
+        parent_max_concurrent_downloads = min(current_upgrade_policy['data']['parentMaxConcurrent']
+                                              for current_upgrade_policy in current_upgrade_policies)
+        if parent_max_concurrent_downloads < self.desired_state_max_concurrent_downloads:
+            module.fail_json(msg="max_concurrent_downloads is higher than the upper scopes Maximum Concurrent "
+                                 "Downloads value. Please use a value lower than or equal to "
+                                 f"{parent_max_concurrent_downloads}")
+
+    def get_parent_max_concurrent_downloads(self, current_upgrade_policy: dict):
         """
-        Remove unnecessary keys from object for comparision with the desired state object
+        Returns the maximum concurrent downloads value of the upper scope if it is inherited
 
-        :param upgrade_policy_object: object from which the keys should be removed
-        :type upgrade_policy_object: dict
+        :param current_upgrade_policy: Upgrade policy which is currently set
+        :type current_upgrade_policy: dict
+        :return: Parent max concurrent downloads or None if it is not inherited
+        :rtype: int
         """
 
-        # Some items in current_upgrade_policy are not necessary to compare and these keys make the comparison unusable.
-        # They are not available in the update the upgrade policy API endpoint and needs to be removed
-        current_upgrade_policy_remove_items = ['concurrencyConfigUpdatedAt', 'concurrencyConfigUpdatedBy',
-                                               'maintenanceConfigUpdatedAt', 'maintenanceConfigUpdatedBy',
-                                               'parentMaxConcurrent', 'taskType']
-        for key in current_upgrade_policy_remove_items:
-            del upgrade_policy_object["data"][key]
+        if not self.inherit_max_concurrent_downloads:
+            return None
+
+        return current_upgrade_policy['data']['parentMaxConcurrent']
 
     @staticmethod
     def check_sanity(inherit_maintenance_windows: bool, timezone: str, maintenance_windows: dict,
@@ -399,11 +378,7 @@ class SentineloneUpgradePolicies(SentineloneBase):
         :type module:AnsibleModule
         """
 
-        valid_timezones = ["-11:00", "-10:00", "-09:30", "-09:00", "-08:00", "-07:00", "-06:00", "-05:00", "-04:00",
-                           "-03:30", "-03:00", "-02:00", "-01:00", "+00:00", "+01:00", "+02:00", "+03:00", "+03:30",
-                           "+04:00", "+04:30", "05:00", "+05:30", "+05:45", "+06:00", "+06:30", "+07:00", "+08:00",
-                           "+08:45", "+09:00", "+09:30", "+10:00", "+10:30", "+11:00", "+12:00", "+13:00", "+13:45",
-                           "+14:00"]
+        valid_timezones = SentineloneUpgradePoliciesBase.valid_timezones
 
         if timezone not in valid_timezones:
             module.fail_json(msg="Timezone is invalid. Please choose one of the following values: "
@@ -430,8 +405,8 @@ class SentineloneUpgradePolicies(SentineloneBase):
 
                         try:
                             # Check if entered time is valid
-                            time1 = datetime.strptime(from_value, "%I:%M %p")
-                            time2 = datetime.strptime(to_value, "%I:%M %p")
+                            time1 = SentineloneUpgradePoliciesBase.parse_maintenance_time(from_value)
+                            time2 = SentineloneUpgradePoliciesBase.parse_maintenance_time(to_value)
                         except ValueError as err:
                             module.fail_json(msg=f"Please check the entered maintenance window time values for {day}. "
                                              f"The entered time value is not valid. Exception is: {err}")
@@ -454,6 +429,8 @@ def run_module():
         maintenance_windows=dict(type='dict', required=False),
         max_concurrent_downloads=dict(type='int', required=False),
         timezone=dict(type='str', required=False, default="+00:00"),
+        diff_detail=dict(type='str', required=False, default='summary', choices=['none', 'summary', 'paths', 'full']),
+        parallel_requests=dict(type='int', required=False, default=5),
     )
 
     module = AnsibleModule(
@@ -488,13 +465,20 @@ def run_module():
     # if we want to set custom Maintenance Windows
     if current_group_ids_names:
         # if scope is group level
-        for current_group_id_name in current_group_ids_names:
+        # Groups which need the same upgrade policy are updated together. Dictionary with the canonical JSON of the
+        # desired state upgrade policy as key and the list of group ids as value
+        update_group_ids = {}
+        # Read the upgrade policies of all groups first and check them before any group is updated
+        current_upgrade_policies = upgrade_policy_obj.get_upgrade_policies(
+            "group", [current_group_id_name[0] for current_group_id_name in current_group_ids_names], module)
+        upgrade_policy_obj.check_max_concurrent_downloads_size(current_upgrade_policies,
+                                                               inherit_max_concurrent_downloads, module)
+
+        for current_group_id_name, current_upgrade_policy in zip(current_group_ids_names, current_upgrade_policies):
             current_group_id = current_group_id_name[0]
             # check if every group has the desired settings already
-            current_upgrade_policy = upgrade_policy_obj.get_current_upgrade_policy(current_group_id, module)
-
-            parent_max_concurrent_downloads = upgrade_policy_obj.check_max_concurrent_downloads_size(
-                current_upgrade_policy, inherit_max_concurrent_downloads, module)
+            parent_max_concurrent_downloads = upgrade_policy_obj.get_parent_max_concurrent_downloads(
+                current_upgrade_policy)
 
             upgrade_policy_obj.clean_current_upgrade_policy_object(current_upgrade_policy)
 
@@ -506,19 +490,24 @@ def run_module():
             if diff:
                 # if upgrade policy is different from desired state, update it
                 current_group_name = current_group_id_name[1]
-                diffs.append({'changes': dict(diff), 'groupId': current_group_id})
+                diffs.append({'changes': upgrade_policy_obj.format_diff(diff), 'groupId': current_group_id})
                 basic_message.append(f"Updating upgrade policy for group {current_group_name}")
-                update_body = upgrade_policy_obj.get_update_body(desired_state_upgrade_policy, current_group_id)
-                upgrade_policy_obj.update_upgrade_policy(current_group_id, update_body, module)
+                desired_state_json = json.dumps(desired_state_upgrade_policy, sort_keys=True)
+                update_group_ids.setdefault(desired_state_json, []).append(current_group_id)
+
+        for group_ids, update_body in upgrade_policy_obj.get_update_bodies(update_group_ids):
+            upgrade_policy_obj.update_upgrade_policy(group_ids, update_body, module)
     else:
         # if scope is site level
         # check if site has the desired settings already
         site_name = upgrade_policy_obj.site_name
         site_id = upgrade_policy_obj.site_id
-        current_upgrade_policy = upgrade_policy_obj.get_current_upgrade_policy(site_id, module)
+        current_upgrade_policy = upgrade_policy_obj.get_upgrade_policy("site", site_id, module)
 
-        parent_max_concurrent_downloads = upgrade_policy_obj.check_max_concurrent_downloads_size(
-            current_upgrade_policy, inherit_max_concurrent_downloads, module)
+        upgrade_policy_obj.check_max_concurrent_downloads_size([current_upgrade_policy],
+                                                               inherit_max_concurrent_downloads, module)
+        parent_max_concurrent_downloads = upgrade_policy_obj.get_parent_max_concurrent_downloads(
+            current_upgrade_policy)
 
         upgrade_policy_obj.clean_current_upgrade_policy_object(current_upgrade_policy)
 
@@ -529,10 +518,10 @@ def run_module():
                                           exclude_path=exclude_path)
         if diff:
             # if upgrade policy is different from desired state, update it
-            diffs.append({'changes': dict(diff), 'SiteId': site_id})
+            diffs.append({'changes': upgrade_policy_obj.format_diff(diff), 'SiteId': site_id})
             basic_message.append(f"Updating upgrade policy for site {site_name}")
-            update_body = upgrade_policy_obj.get_update_body(desired_state_upgrade_policy, site_id)
-            upgrade_policy_obj.update_upgrade_policy(site_id, update_body, module)
+            update_body = upgrade_policy_obj.get_update_body(desired_state_upgrade_policy, [site_id])
+            upgrade_policy_obj.update_upgrade_policy([site_id], update_body, module)
 
     result = dict(
         changed=False,
@@ -0,0 +1,239 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: sentinelone_upgrade_policies_drift
+short_description: "Report SentinelOne Upgrade Policies which differ from a baseline"
+version_added: "2.1.0"
+description:
+  - "This module reads the upgrade policies of all sites and groups of the account and reports which of them differ
+    from a baseline"
+  - "The upgrade policies are read in parallel. Sites and groups with identical upgrade policies share one
+    fingerprint, so every distinct upgrade policy is returned once"
+  - "The module does not change anything"
+options:
+  console_url:
+    description:
+      - "Insert your management console URL"
+    type: str
+    required: true
+  token:
+    description:
+      - "SentinelOne API auth token to authenticate at the management API"
+    type: str
+    required: true
+  sites:
+    description:
+      - "A list with the names of the sites to check"
+      - "If not set, all active sites of the account are checked"
+    type: list
+    elements: str
+    default: []
+    required: false
+  baseline:
+    description:
+      - "Upgrade policy settings which every site and group should have. The keys are the API names of the upgrade
+        policy, e.g. C(maxConcurrent), C(timezoneGmt), C(inheritParentMaintenanceConfig) or C(maintenanceWindowsByDay)"
+      - "Only the passed keys are compared"
+      - "If not set, the upgrade policies are only grouped by fingerprint"
+    type: dict
+    default: {}
+    required: false
+  parallel_requests:
+    description:
+      - "Maximum count of API requests which are sent at the same time"
+    type: int
+    required: false
+    default: 5
+author:
+  - "Marco Wester (@mwester117) <marco.wester@sva.de>"
+notes:
+  - "Currently only supported in single-account management consoles"
+  - "The API returns the maintenance windows and the maximum concurrent downloads which are effective in a scope even
+    if they are inherited from the upper scope"
+  - "The keys concurrencyConfigUpdatedAt, concurrencyConfigUpdatedBy, maintenanceConfigUpdatedAt,
+    maintenanceConfigUpdatedBy, parentMaxConcurrent and taskType are ignored"
+'''
+
+EXAMPLES = r'''
+---
+- name: Find sites and groups which do not inherit the upgrade policy
+  sva.sentinelone.sentinelone_upgrade_policies_drift:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    baseline:
+      inheritParentConcurrencyConfig: true
+      inheritParentMaintenanceConfig: true
+- name: Group the upgrade policies of two sites by fingerprint
+  sva.sentinelone.sentinelone_upgrade_policies_drift:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    sites:
+      - "site1"
+      - "site2"
+'''
+
+RETURN = r'''
+---
+original_message:
+    description:
+      - "C(scopes) contains one row per site and group with the fingerprint of its upgrade policy and the baseline keys
+        which differ"
+      - "C(upgradePolicies) contains every distinct upgrade policy by fingerprint"
+    returned: on success
+    type: dict
+    sample: {"scopes": [{"siteName": "test", "fingerprint": "1f0c...", "differs": []},
+                        {"siteName": "test", "groupName": "MariaDB", "fingerprint": "8a7e...",
+                         "differs": ["maxConcurrent"]}],
+             "upgradePolicies": {"1f0c...": {"maxConcurrent": 50, "timezoneGmt": "GMT+00:00"},
+                                 "8a7e...": {"maxConcurrent": 10, "timezoneGmt": "GMT+00:00"}}}
+message:
+    description: Get basic infos about the scopes which differ from the baseline
+    returned: on success
+    type: list
+    sample: [ "1 of 2 scopes differ from the baseline: test/MariaDB" ]
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_upgrade_policies_base import SentineloneUpgradePoliciesBase
+
+
+class SentineloneUpgradePoliciesDrift(SentineloneUpgradePoliciesBase):
+    def __init__(self, module: AnsibleModule):
+        """
+        Initialization of the upgrade policies drift object
+
+        :param module: Requires the AnsibleModule Object for parsing the parameters
+        :type module: AnsibleModule
+        """
+
+        # The module works on multiple sites. super class __init__ expects a single site_name
+        module.params["site_name"] = None
+
+        # self.token, self.console_url, self.site_name, self.state, self.api_endpoint_*, self.group_names will be set in
+        # super Class
+        super().__init__(module)
+
+        self.site_names = module.params["sites"]
+        self.baseline = module.params["baseline"]
+
+    def get_current_scopes(self, module: AnsibleModule):
+        """
+        Read the upgrade policies of the sites and their groups. The upgrade policies are read in parallel
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: List of scope dictionaries with the keys siteName, groupName (groups only) and settings
+        :rtype: list
+        """
+
+        sites = self.get_sites(self.site_names or None, module)
+        group_indexes = self.run_parallel(module, lambda worker_module, site: self.get_group_index(
+            worker_module, site['id']), sites)
+
+        scopes = []
+        # List of tuples of scope type and scope id in the order of scopes
+        scope_ids = []
+        for site, group_index in zip(sites, group_indexes):
+            scopes.append({'siteName': site['name']})
+            scope_ids.append(("site", site['id']))
+            for group_name in sorted(group_index):
+                scopes.append({'siteName': site['name'], 'groupName': group_name})
+                scope_ids.append(("group", group_index[group_name]['id']))
+
+        upgrade_policies = self.run_parallel(module, lambda worker_module, scope_id: self.get_upgrade_policy(
+            scope_id[0], scope_id[1], worker_module), scope_ids)
+        for scope, upgrade_policy in zip(scopes, upgrade_policies):
+            self.clean_current_upgrade_policy_object(upgrade_policy)
+            scope['settings'] = upgrade_policy['data']
+
+        return scopes
+
+    def get_differing_keys(self, settings: dict):
+        """
+        Returns the baseline keys whose values differ from the settings
+
+        :param settings: Cleaned upgrade policy settings
+        :type settings: dict
+        :return: Sorted list of baseline keys
+        :rtype: list
+        """
+
+        return sorted(key for key, value in self.baseline.items()
+                      if self.values_differ(settings.get(key), value))
+
+
+def run_module():
+    # define available arguments/parameters a user can pass to the module
+    module_args = dict(
+        console_url=dict(type='str', required=True),
+        token=dict(type='str', required=True, no_log=True),
+        sites=dict(type='list', required=False, elements='str', default=[]),
+        baseline=dict(type='dict', required=False, default={}),
+        parallel_requests=dict(type='int', required=False, default=5),
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    # Create upgrade policies drift Object
+    drift_obj = SentineloneUpgradePoliciesDrift(module)
+
+    scopes = drift_obj.get_current_scopes(module)
+
+    upgrade_policies = {}
+    # Differing baseline keys by fingerprint. Scopes with the same fingerprint differ in the same keys
+    differing_keys = {}
+    scope_rows = []
+    drifted_scope_names = []
+    for scope in scopes:
+        fingerprint = drift_obj.get_fingerprint(scope['settings'])
+        if fingerprint not in upgrade_policies:
+            upgrade_policies[fingerprint] = scope['settings']
+            differing_keys[fingerprint] = drift_obj.get_differing_keys(scope['settings'])
+
+        scope_row = {key: value for key, value in scope.items() if key != 'settings'}
+        scope_row['fingerprint'] = fingerprint
+        scope_row['differs'] = differing_keys[fingerprint]
+        scope_rows.append(scope_row)
+        if differing_keys[fingerprint]:
+            drifted_scope_names.append('/'.join(scope_row.get(key) for key in ('siteName', 'groupName')
+                                                if key in scope_row))
+
+    basic_message = []
+    if not drift_obj.baseline:
+        basic_message.append(f"{len(scopes)} scopes have {len(upgrade_policies)} distinct upgrade policies")
+    elif drifted_scope_names:
+        basic_message.append(f"{len(drifted_scope_names)} of {len(scopes)} scopes differ from the baseline: "
+                             f"{', '.join(drifted_scope_names)}")
+    else:
+        basic_message.append(f"All {len(scopes)} scopes match the baseline")
+
+    result = dict(
+        changed=False,
+        original_message={
+            'scopes': scope_rows,
+            'upgradePolicies': upgrade_policies
+        },
+        message=basic_message
+    )
+
+    # in the event of a successful module execution, you will want to
+    # simple AnsibleModule.exit_json(), passing the key/value results
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
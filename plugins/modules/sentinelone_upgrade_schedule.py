@@ -0,0 +1,447 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+---
+module: sentinelone_upgrade_schedule
+short_description: "Plan the agent upgrade rollout along the SentinelOne Upgrade Policies"
+version_added: "2.1.0"
+description:
+  - "This module reads the upgrade policies of the groups of a site and calculates when an upgrade of all agents can
+    be finished"
+  - "The maintenance windows of every group are converted to UTC with the timezone of its upgrade policy. The upgrade
+    capacity per UTC hour is the sum of the maximum concurrent downloads of all groups whose maintenance window is open
+    in this hour"
+  - "Groups whose upgrade does not finish before the deadline are reported"
+  - "The module does not change anything"
+options:
+  console_url:
+    description:
+      - "Insert your management console URL"
+    type: str
+    required: true
+  token:
+    description:
+      - "SentinelOne API auth token to authenticate at the management API"
+    type: str
+    required: true
+  site_name:
+    description:
+      - "Name of the site in SentinelOne"
+    type: str
+    required: true
+  groups:
+    description:
+      - "A list with the names of the groups to plan"
+      - "If not set, all groups of the site are planned"
+    type: list
+    elements: str
+    default: []
+    required: false
+  start_time:
+    description:
+      - "UTC time when the upgrade starts in the format C(YYYY-MM-DDTHH:MM:SSZ)"
+      - "If not set, the current time is used"
+    type: str
+    required: false
+  deadline_hours:
+    description:
+      - "Hours after I(start_time) until the upgrade of all agents needs to be finished"
+    type: int
+    required: false
+    default: 168
+  upgrade_duration:
+    description:
+      - "Minutes which are needed to upgrade one agent"
+    type: int
+    required: false
+    default: 30
+  parallel_requests:
+    description:
+      - "Maximum count of API requests which are sent at the same time"
+    type: int
+    required: false
+    default: 5
+author:
+  - "Marco Wester (@mwester117) <marco.wester@sva.de>"
+notes:
+  - "Currently only supported in single-account management consoles"
+  - "The API returns the maintenance windows and the maximum concurrent downloads which are effective in a group even
+    if they are inherited from the site"
+  - "A group without maintenance windows can be upgraded at any time"
+  - "The agents of a group are upgraded in batches of maximum concurrent downloads agents. A batch can continue in the
+    next maintenance window"
+'''
+
+EXAMPLES = r'''
+---
+- name: Check if all agents of the site can be upgraded within three days
+  sva.sentinelone.sentinelone_upgrade_schedule:
+    console_url: "https://XXXXX.sentinelone.net"
+    token: "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+    site_name: "test"
+    start_time: "2024-06-03T18:00:00Z"
+    deadline_hours: 72
+  register: upgrade_schedule
+- name: Fail if an upgrade does not finish in time
+  ansible.builtin.assert:
+    that: upgrade_schedule.original_message.groups | selectattr('late') | list | length == 0
+    fail_msg: "{{ upgrade_schedule.message }}"
+'''
+
+RETURN = r'''
+---
+original_message:
+    description:
+      - "Upgrade plan of the groups. The times are UTC. C(finishesAt) is null if the upgrade of a group never finishes
+        or does not finish before the year 9999"
+      - "C(capacityPerHour) contains the maximum count of concurrent downloads for every UTC hour of the week"
+    returned: on success
+    type: dict
+    sample: {"start": "2024-06-03T18:00:00Z", "deadline": "2024-06-06T18:00:00Z", "finishesAt": "2024-06-03T22:00:00Z",
+             "capacityPerHour": {"Monday": [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 100, 100, 0]},
+             "groups": [{"groupId": "99999999999999999", "groupName": "MariaDB", "agents": 200, "maxConcurrent": 100,
+                         "timezone": "GMT+02:00", "windowsUtc": [{"day": "Monday", "from": "21:00", "to": "23:00"}],
+                         "openHoursPerWeek": 2.0, "finishesAt": "2024-06-03T22:00:00Z", "late": false}]}
+message:
+    description: Get basic infos about the groups which do not finish in time
+    returned: on success
+    type: list
+    sample: [ "Upgrade of group MariaDB finishes at 2024-06-12T22:30:00Z after the deadline 2024-06-06T18:00:00Z" ]
+'''
+
+import math
+from datetime import datetime, timedelta, timezone
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_upgrade_policies_base import SentineloneUpgradePoliciesBase
+
+
+class SentineloneUpgradeSchedule(SentineloneUpgradePoliciesBase):
+    # Format of start_time and of the times in the result
+    time_format = "%Y-%m-%dT%H:%M:%SZ"
+    minutes_per_day = 24 * 60
+    minutes_per_week = 7 * minutes_per_day
+
+    def __init__(self, module: AnsibleModule):
+        """
+        Initialization of the upgrade schedule object
+
+        :param module: Requires the AnsibleModule Object for parsing the parameters
+        :type module: AnsibleModule
+        """
+
+        # The groups are resolved by this module because all groups of the site are needed if no groups are passed.
+        # Removing them so the super class does not resolve them again
+        self.requested_group_names = module.params["groups"]
+        module.params["groups"] = []
+
+        # self.token, self.console_url, self.site_name, self.state, self.api_endpoint_*, self.group_names will be set in
+        # super Class
+        super().__init__(module)
+
+        self.deadline_hours = module.params["deadline_hours"]
+        self.upgrade_duration = module.params["upgrade_duration"]
+        if self.upgrade_duration < 1:
+            module.fail_json(msg="upgrade_duration needs to be 1 or higher")
+        self.start_time = self.get_start_time(module.params["start_time"], module)
+        self.deadline = self.start_time + timedelta(hours=self.deadline_hours)
+        self.groups = self.get_requested_groups(module)
+
+    def get_start_time(self, start_time: str, module: AnsibleModule):
+        """
+        Parse start_time or return the current UTC time if it is not set
+
+        :param start_time: UTC time in the format of time_format
+        :type start_time: str
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Start time without seconds
+        :rtype: datetime
+        """
+
+        if start_time is None:
+            return datetime.now(timezone.utc).replace(tzinfo=None, second=0, microsecond=0)
+
+        try:
+            return datetime.strptime(start_time, self.time_format).replace(second=0)
+        except ValueError:
+            module.fail_json(msg=f"start_time {start_time} is invalid. Expecting format YYYY-MM-DDTHH:MM:SSZ")
+
+    def get_requested_groups(self, module: AnsibleModule):
+        """
+        Returns the passed groups or all groups of the site
+
+        :param module: Ansible module for error handling
+        :type module: AnsibleModule
+        :return: Group objects
+        :rtype: list
+        """
+
+        group_index = self.get_group_index(module, group_keys=['id', 'name', 'totalAgents'])
+        if not self.requested_group_names:
+            return list(group_index.values())
+
+        missing_group_names = [group_name for group_name in self.requested_group_names
+                               if group_name not in group_index]
+        if missing_group_names:
+            module.fail_json(msg=f"Groups not found: {', '.join(missing_group_names)}")
+
+        return [group_index[group_name] for group_name in self.requested_group_names]
+
+    def get_utc_windows(self, upgrade_policy: dict):
+        """
+        Convert the maintenance windows of an upgrade policy to UTC
+
+        :param upgrade_policy: Upgrade policy object
+        :type upgrade_policy: dict
+        :return: Sorted list of tuples of start and end minute in the UTC week. Minute 0 is Monday 00:00 UTC
+        :rtype: list
+        """
+
+        maintenance_windows_by_day = upgrade_policy['data'].get('maintenanceWindowsByDay') or {}
+        if not maintenance_windows_by_day:
+            return [(0, self.minutes_per_week)]
+
+        timezone_offset = self.get_timezone_offset(upgrade_policy['data'].get('timezoneGmt', "GMT+00:00"))
+        windows = []
+        for day_index, day in enumerate(self.week_days):
+            day_windows = maintenance_windows_by_day.get(day)
+            if not day_windows:
+                continue
+            day_start = day_index * self.minutes_per_day - timezone_offset
+            if day_windows.get('isMaintenanceAllDay'):
+                local_windows = [(0, self.minutes_per_day)]
+            else:
+                local_windows = [(self.parse_maintenance_time(hours['fromTime']),
+                                  self.parse_maintenance_time(hours['toTime']))
+                                 for hours in day_windows.get('maintenanceHours', [])]
+            for window_start, window_end in local_windows:
+                start = (day_start + window_start) % self.minutes_per_week
+                end = start + window_end - window_start
+                # Windows which span the end of the UTC week continue at its start
+                if end > self.minutes_per_week:
+                    windows.append((0, end - self.minutes_per_week))
+                    end = self.minutes_per_week
+                windows.append((start, end))
+
+        # Merge overlapping and adjacent windows
+        merged_windows = []
+        for start, end in sorted(windows):
+            if merged_windows and start <= merged_windows[-1][1]:
+                merged_windows[-1] = (merged_windows[-1][0], max(merged_windows[-1][1], end))
+            else:
+                merged_windows.append((start, end))
+
+        return merged_windows
+
+    def format_windows(self, windows: list):
+        """
+        Convert UTC windows to readable day and time ranges. Windows which span midnight are split
+
+        :param windows: Windows as returned by get_utc_windows
+        :type windows: list
+        :return: List of dictionaries with day, from and to
+        :rtype: list
+        """
+
+        formatted_windows = []
+        for start, end in windows:
+            while start < end:
+                day_index = start // self.minutes_per_day
+                day_end = min(end, (day_index + 1) * self.minutes_per_day)
+                from_minute = start - day_index * self.minutes_per_day
+                to_minute = day_end - day_index * self.minutes_per_day
+                formatted_windows.append({
+                    'day': self.week_days[day_index],
+                    'from': f"{from_minute // 60:02d}:{from_minute % 60:02d}",
+                    'to': f"{to_minute // 60:02d}:{to_minute % 60:02d}"
+                })
+                start = day_end
+
+        return formatted_windows
+
+    def get_finish_time(self, windows: list, agents: int, max_concurrent: int):
+        """
+        Calculate when the upgrade of all agents of a group is finished. The windows are only walked in the week of
+        start_time and in the week in which the upgrade finishes. The complete weeks in between are skipped with the
+        open minutes per week
+
+        :param windows: Windows as returned by get_utc_windows
+        :type windows: list
+        :param agents: Count of agents in the group
+        :type agents: int
+        :param max_concurrent: Maximum concurrent downloads of the group
+        :type max_concurrent: int
+        :return: UTC finish time or None if the upgrade never finishes or finishes after the last supported date
+        :rtype: datetime
+        """
+
+        if agents == 0:
+            return self.start_time
+        if max_concurrent < 1 or not windows:
+            return None
+
+        remaining_minutes = math.ceil(agents / max_concurrent) * self.upgrade_duration
+        start_minute = (self.start_time.weekday() * self.minutes_per_day + self.start_time.hour * 60 +
+                        self.start_time.minute)
+        # The windows of the week of start_time which are still open
+        finish_minute, remaining_minutes = self.walk_windows(windows, 0, start_minute, remaining_minutes)
+        if finish_minute is None:
+            # The upgrade finishes in the first week with less than the open minutes per week left
+            open_minutes_per_week = sum(end - start for start, end in windows)
+            skipped_weeks = (remaining_minutes - 1) // open_minutes_per_week
+            remaining_minutes -= skipped_weeks * open_minutes_per_week
+            finish_minute, remaining_minutes = self.walk_windows(
+                windows, (skipped_weeks + 1) * self.minutes_per_week, start_minute, remaining_minutes)
+
+        try:
+            return self.start_time + timedelta(minutes=finish_minute - start_minute)
+        except OverflowError:
+            return None
+
+    @staticmethod
+    def walk_windows(windows: list, week_offset: int, start_minute: int, remaining_minutes: int):
+        """
+        Use the windows of one week for the upgrade
+
+        :param windows: Windows as returned by get_utc_windows
+        :type windows: list
+        :param week_offset: Minute of the start of the week, counted from the start of the week of start_time
+        :type week_offset: int
+        :param start_minute: Minute of start_time in its week. Earlier minutes are not used
+        :type start_minute: int
+        :param remaining_minutes: Minutes which are needed until the upgrade is finished
+        :type remaining_minutes: int
+        :return: Tuple of the finish minute (None if the upgrade does not finish in this week) and the remaining minutes
+        :rtype: tuple
+        """
+
+        for start, end in windows:
+            start = max(start + week_offset, start_minute)
+            end = end + week_offset
+            if end <= start:
+                continue
+            if end - start >= remaining_minutes:
+                return start + remaining_minutes, 0
+            remaining_minutes -= end - start
+
+        return None, remaining_minutes
+
+    def get_capacity_per_hour(self, group_plans: list):
+        """
+        Sum up the maximum concurrent downloads of the groups whose windows are open for every UTC hour of the week.
+        Groups whose window is open only for a part of an hour are counted proportionally
+
+        :param group_plans: Tuples of windows and maximum concurrent downloads of the groups
+        :type group_plans: list
+        :return: Dictionary with the days as keys and a list of the capacity of the 24 hours as values
+        :rtype: dict
+        """
+
+        capacity = [0.0] * (self.minutes_per_week // 60)
+        for windows, max_concurrent in group_plans:
+            for start, end in windows:
+                for hour in range(start // 60, math.ceil(end / 60)):
+                    open_minutes = min(end, (hour + 1) * 60) - max(start, hour * 60)
+                    capacity[hour] += max_concurrent * open_minutes / 60
+
+        return {day: [round(value) for value in capacity[day_index * 24:(day_index + 1) * 24]]
+                for day_index, day in enumerate(self.week_days)}
+
+
+def run_module():
+    # define available arguments/parameters a user can pass to the module
+    module_args = dict(
+        console_url=dict(type='str', required=True),
+        token=dict(type='str', required=True, no_log=True),
+        site_name=dict(type='str', required=True),
+        groups=dict(type='list', required=False, elements='str', default=[]),
+        start_time=dict(type='str', required=False),
+        deadline_hours=dict(type='int', required=False, default=168),
+        upgrade_duration=dict(type='int', required=False, default=30),
+        parallel_requests=dict(type='int', required=False, default=5),
+    )
+
+    module = AnsibleModule(
+        argument_spec=module_args,
+        supports_check_mode=True
+    )
+
+    # Create upgrade schedule Object
+    schedule_obj = SentineloneUpgradeSchedule(module)
+    groups = schedule_obj.groups
+    time_format = schedule_obj.time_format
+    deadline = schedule_obj.deadline.strftime(time_format)
+
+    upgrade_policies = schedule_obj.get_upgrade_policies("group", [group['id'] for group in groups], module)
+
+    group_schedules = []
+    group_plans = []
+    basic_message = []
+    finish_times = []
+    for group, upgrade_policy in zip(groups, upgrade_policies):
+        windows = schedule_obj.get_utc_windows(upgrade_policy)
+        max_concurrent = upgrade_policy['data'].get('maxConcurrent') or 0
+        agents = group.get('totalAgents', 0)
+        group_plans.append((windows, max_concurrent))
+
+        finish_time = schedule_obj.get_finish_time(windows, agents, max_concurrent)
+        finish_times.append(finish_time)
+        late = finish_time is None or finish_time > schedule_obj.deadline
+        if finish_time is None and (max_concurrent < 1 or not windows):
+            basic_message.append(f"Upgrade of group {group['name']} never finishes because it has no maintenance "
+                                 "window or its maximum concurrent downloads is 0")
+        elif finish_time is None:
+            basic_message.append(f"Upgrade of group {group['name']} does not finish before the year "
+                                 f"{datetime.max.year}")
+        elif late:
+            basic_message.append(f"Upgrade of group {group['name']} finishes at {finish_time.strftime(time_format)} "
+                                 f"after the deadline {deadline}")
+
+        group_schedules.append({
+            'groupId': group['id'],
+            'groupName': group['name'],
+            'agents': agents,
+            'maxConcurrent': max_concurrent,
+            'timezone': upgrade_policy['data'].get('timezoneGmt'),
+            'windowsUtc': schedule_obj.format_windows(windows),
+            'openHoursPerWeek': sum(end - start for start, end in windows) / 60,
+            'finishesAt': finish_time.strftime(time_format) if finish_time else None,
+            'late': late
+        })
+
+    fleet_finish_time = None
+    if finish_times and None not in finish_times:
+        fleet_finish_time = max(finish_times).strftime(time_format)
+    if not basic_message:
+        basic_message.append(f"Upgrade of all groups finishes before the deadline {deadline}")
+
+    result = dict(
+        changed=False,
+        original_message={
+            'start': schedule_obj.start_time.strftime(time_format),
+            'deadline': deadline,
+            'finishesAt': fleet_finish_time,
+            'capacityPerHour': schedule_obj.get_capacity_per_hour(group_plans),
+            'groups': group_schedules
+        },
+        message=basic_message
+    )
+
+    # in the event of a successful module execution, you will want to
+    # simple AnsibleModule.exit_json(), passing the key/value results
+    module.exit_json(**result)
+
+
+def main():
+    run_module()
+
+
+if __name__ == '__main__':
+    main()
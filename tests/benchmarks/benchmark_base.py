@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+# Micro-benchmarks for the helpers of SentineloneBase which run for every object a module touches.
+# Reports operations per second, the peak memory of one operation and the count of memory blocks which are still
+# allocated after the operation (e.g. the returned object).
+#
+# Run from a directory which contains ansible_collections/sva/sentinelone:
+#   python -m ansible_collections.sva.sentinelone.tests.benchmarks.benchmark_base [--sizes 1 100] [--json results.json]
+
+import argparse
+import copy
+import json
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone import sentinelone_base
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.plugins.modules.sentinelone_upgrade_policies import SentineloneUpgradePolicies
+from ansible_collections.sva.sentinelone.tests.benchmarks.utils import measure, measure_allocations
+from ansible_collections.sva.sentinelone.tests.unit.plugins.module_utils.sentinelone.payloads import (
+    build_desired_policy, build_policy)
+
+# Payload sizes in KB
+PAYLOAD_SIZES = [1, 10, 100, 1024, 5 * 1024]
+
+
+class FakeResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def read(self):
+        return self.content
+
+
+def fake_fetch_url(response_body: bytes):
+    """
+    Replacement for fetch_url which returns response_body without doing a request
+    """
+
+    def fetch_url(module, url, **kwargs):
+        return FakeResponse(response_body), {'status': 200}
+
+    return fetch_url
+
+
+def get_upgrade_policy_obj():
+    obj = SentineloneUpgradePolicies.__new__(SentineloneUpgradePolicies)
+    obj.inherit_max_concurrent_downloads = False
+    obj.inherit_maintenance_windows = False
+    obj.desired_state_max_concurrent_downloads = 100
+    obj.desired_state_timezone = "+01:00"
+    windows = [{"from": "01:00 am", "to": "03:00 am"}, {"from": "10:00 pm", "to": "11:30 pm"}]
+    obj.desired_state_maintenance_windows = {day: windows for day in
+                                             ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]}
+    obj.desired_state_maintenance_windows["Saturday"] = None
+    return obj
+
+
+def get_cases(size_kb: int):
+    """
+    Returns a list of tuples with the name of the benchmark, the function to measure and an optional setup function
+    """
+
+    base_obj = SentineloneBase.__new__(SentineloneBase)
+    base_obj.token = "XXXXXXXXXXXXXXXXXXXXXXXXXXX"
+
+    current = build_policy(size_kb * 1024)
+    desired = build_desired_policy(current, changes=10)
+    desired_unchanged = {"agentUi": {"agentUiOn": True}}
+    merged = copy.deepcopy(current)
+    base_obj.merge(merged, desired)
+    remove_dict = {key: None for key in list(current)[::2]}
+    body = {"data": current}
+    body_json = json.dumps(body)
+    response_body = json.dumps({"data": current}).encode('utf-8')
+
+    cases = [
+        ("merge_compare unchanged", lambda: base_obj.merge_compare(current, desired_unchanged)),
+        ("merge_compare changed", lambda: base_obj.merge_compare(current, desired)),
+        ("compare unchanged", lambda: base_obj.compare(current, current)),
+        ("compare changed", lambda: base_obj.compare(current, merged)),
+        # merge and remove_dict_from_dict change the passed dictionary. Every run gets a fresh copy
+        ("merge", lambda target: base_obj.merge(target, desired), lambda: copy.deepcopy(current)),
+        ("remove_dict_from_dict", lambda target: base_obj.remove_dict_from_dict(target, remove_dict),
+         lambda: copy.deepcopy(current)),
+        ("deepcopy", lambda: copy.deepcopy(current)),
+        ("json encode", lambda: json.dumps(body)),
+        ("json decode", lambda: json.loads(body_json)),
+        ("api_call PUT", lambda: base_obj.api_call(None, "https://console", "PUT", body=body)),
+    ]
+    return cases, response_body
+
+
+def run(sizes: list):
+    results = []
+    original_fetch_url = sentinelone_base.fetch_url
+    try:
+        for size_kb in sizes:
+            cases, response_body = get_cases(size_kb)
+            sentinelone_base.fetch_url = fake_fetch_url(response_body)
+            for name, func, *setup in cases:
+                setup = setup[0] if setup else None
+                runtime = measure(func, setup=setup)
+                peak, blocks = measure_allocations(func, setup)
+                results.append({"function": name, "size_kb": size_kb, "runtime": runtime, "peak_bytes": peak,
+                                "blocks": blocks})
+    finally:
+        sentinelone_base.fetch_url = original_fetch_url
+
+    upgrade_policy_obj = get_upgrade_policy_obj()
+    func = lambda: upgrade_policy_obj.get_desired_state_upgrade_policy(None)  # noqa: E731
+    runtime = measure(func)
+    peak, blocks = measure_allocations(func)
+    results.append({"function": "get_desired_state_upgrade_policy", "size_kb": 0, "runtime": runtime,
+                    "peak_bytes": peak, "blocks": blocks})
+
+    for result in results:
+        result["ops_per_sec"] = 1 / result["runtime"]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the helpers of SentineloneBase")
+    parser.add_argument("--sizes", type=int, nargs="+", default=PAYLOAD_SIZES, help="Payload sizes in KB")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.sizes)
+
+    print(f"{'function':<34} {'payload':>9} {'ops/sec':>12} {'peak KB':>10} {'blocks':>9}")
+    for result in results:
+        print(f"{result['function']:<34} {result['size_kb']:>7}KB {result['ops_per_sec']:>12.1f} "
+              f"{result['peak_bytes'] / 1024:>10.1f} {result['blocks']:>9}")
+
+    if args.json:
+        with open(args.json, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+# Compares the fast comparison helpers of SentineloneBase with DeepDiff on large policy objects.
+# The correctness of the fast helpers is checked in tests/unit/plugins/module_utils/sentinelone/test_sentinelone_base_diff.py
+#
+# Run from a directory which contains ansible_collections/sva/sentinelone:
+#   python -m ansible_collections.sva.sentinelone.tests.benchmarks.benchmark_diff
+
+import copy
+
+from deepdiff import DeepDiff
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.tests.benchmarks.utils import measure
+from ansible_collections.sva.sentinelone.tests.unit.plugins.module_utils.sentinelone.payloads import (
+    build_desired_policy, build_policy)
+
+PAYLOAD_SIZES = [10 * 1024, 100 * 1024, 1024 * 1024, 5 * 1024 * 1024]
+
+
+def main():
+    base_obj = SentineloneBase.__new__(SentineloneBase)
+    print(f"{'payload':>10} {'case':<10} {'DeepDiff':>12} {'fast path':>12} {'speedup':>8}")
+    for size in PAYLOAD_SIZES:
+        current = build_policy(size)
+        unchanged = copy.deepcopy(current)
+        changed = copy.deepcopy(current)
+        base_obj.merge(changed, build_desired_policy(current, changes=10))
+
+        cases = [
+            # Idempotent run. Only changed-or-not is needed
+            ("unchanged", lambda: DeepDiff(current, unchanged),
+             lambda: SentineloneBase.values_differ(current, unchanged)),
+            # Changed run. The changed paths are needed
+            ("changed", lambda: DeepDiff(current, changed),
+             lambda: SentineloneBase.get_changed_paths(current, changed)),
+        ]
+        for case, reference, fast_path in cases:
+            reference_time = measure(reference)
+            fast_path_time = measure(fast_path)
+            print(f"{size // 1024:>8}KB {case:<10} {reference_time * 1000:>10.2f}ms {fast_path_time * 1000:>10.2f}ms "
+                  f"{reference_time / fast_path_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import gc
+import time
+import timeit
+import tracemalloc
+
+
+def measure(func, min_time=0.5, setup=None):
+    """
+    Returns the average runtime of func in seconds. func is repeated until min_time is reached.
+    If setup is passed it is called before every run and its return value is passed to func. The runtime of setup is
+    not measured. Needed for functions which change the passed objects
+    """
+
+    if setup is None:
+        timer = timeit.Timer(func)
+        number, total = timer.autorange()
+        while total < min_time:
+            number *= 2
+            total = timer.timeit(number)
+        return total / number
+
+    number = 0
+    total = 0.0
+    while total < min_time:
+        argument = setup()
+        start = time.perf_counter()
+        func(argument)
+        total += time.perf_counter() - start
+        number += 1
+    return total / number
+
+
+def measure_allocations(func, setup=None):
+    """
+    Runs func once with tracemalloc enabled. setup is handled like in measure and is not traced
+
+    :return: Tuple of the peak memory in bytes and the count of memory blocks which are still allocated when func
+    returns (e.g. the returned object)
+    :rtype: tuple
+    """
+
+    argument = setup() if setup is not None else None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = func(argument) if setup is not None else func()
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    blocks = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, 'filename'))
+    del result
+    return peak, blocks
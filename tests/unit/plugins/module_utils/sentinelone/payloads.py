@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import copy
+import json
+import random
+
+# Key names as they appear in SentinelOne policies, config overrides and exclusions
+KEYS = [
+    "agentUi", "agentUiOn", "antiTamperingOn", "autoMitigationAction", "cloudValidationOn", "engines", "executables",
+    "lateralMovement", "mitigationMode", "monitorOnWrite", "networkQuarantineOn", "remoteShell", "scanNewAgents",
+    "snapshotsOn", "iocAttributes", "deepVisibility", "config", "powershellProtection", "scope", "groupIds",
+    "siteIds", "value", "mode", "actions", "osType", "pathExclusionType", "description", "name", "maxConcurrent",
+]
+
+LEAVES = [
+    lambda rnd: rnd.choice([True, False]),
+    lambda rnd: rnd.randint(0, 3),
+    lambda rnd: rnd.choice(["on", "off", "protect", "detect", "disable_all_monitors", ""]),
+    lambda rnd: rnd.choice([0.5, 1.0, 2.5]),
+    lambda rnd: None,
+    lambda rnd: [rnd.choice(["detect", "upload", "kill", "quarantine"]) for dummy in range(rnd.randint(0, 3))],
+]
+
+
+def random_leaf(rnd):
+    return rnd.choice(LEAVES)(rnd)
+
+
+def random_object(rnd, depth=3, width=6):
+    """
+    Random nested dictionary which looks like a policy, config override or exclusion object
+    """
+
+    obj = {}
+    for dummy in range(rnd.randint(1, width)):
+        key = rnd.choice(KEYS)
+        roll = rnd.random()
+        if depth > 0 and roll < 0.3:
+            obj[key] = random_object(rnd, depth - 1, width)
+        elif depth > 0 and roll < 0.4:
+            obj[key] = [random_object(rnd, depth - 1, 3) for dummy in range(rnd.randint(0, 3))]
+        else:
+            obj[key] = random_leaf(rnd)
+    return obj
+
+
+def iter_paths(obj, path="root"):
+    """
+    Yield the DeepDiff paths of all dictionary keys in obj, including the keys of dictionaries inside lists
+    """
+
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            key_path = f"{path}[{key!r}]"
+            yield key_path
+            for sub_path in iter_paths(value, key_path):
+                yield sub_path
+    elif isinstance(obj, list):
+        for index, item in enumerate(obj):
+            for sub_path in iter_paths(item, f"{path}[{index}]"):
+                yield sub_path
+
+
+def mutate(rnd, obj, changes=3, allow_removal=True):
+    """
+    Return a modified deep copy of obj. Values are changed (including type changes), keys are added and removed and
+    list items are changed or appended
+    """
+
+    new_obj = copy.deepcopy(obj)
+    for dummy in range(changes):
+        target = new_obj
+        # Walk down to a random dictionary
+        while True:
+            nested = [value for value in target.values() if isinstance(value, dict)]
+            nested += [item for value in target.values() if isinstance(value, list)
+                       for item in value if isinstance(item, dict)]
+            if not nested or rnd.random() < 0.4:
+                break
+            target = rnd.choice(nested)
+
+        roll = rnd.random()
+        if not target or roll < 0.3:
+            target[rnd.choice(KEYS)] = random_leaf(rnd)
+        elif roll < 0.4 and allow_removal:
+            del target[rnd.choice(list(target))]
+        elif roll < 0.5:
+            key = rnd.choice(list(target))
+            if isinstance(target[key], list):
+                target[key].append(random_leaf(rnd))
+            else:
+                target[key] = random_object(rnd, 1)
+        else:
+            key = rnd.choice(list(target))
+            target[key] = random_leaf(rnd)
+    return new_obj
+
+
+def random_desired_state(rnd, current, changes=3):
+    """
+    Desired state object for merge_compare. Contains a subset of the keys of current with some changed values
+    """
+
+    desired = {}
+    for key, value in current.items():
+        if rnd.random() < 0.5:
+            continue
+        if isinstance(value, dict) and rnd.random() < 0.5:
+            desired[key] = random_desired_state(rnd, value, changes)
+        else:
+            desired[key] = copy.deepcopy(value)
+    return mutate(rnd, desired, changes, allow_removal=False) if desired else desired
+
+
+def build_policy(size_bytes, seed=0):
+    """
+    Build a policy like dictionary with a JSON size of roughly size_bytes
+    """
+
+    rnd = random.Random(seed)
+    policy = {
+        "agentUiOn": True,
+        "agentUi": {"agentUiOn": True, "contactSupport": "", "showSupport": False, "showQuarantine": True},
+        "engines": {"dataFiles": "on", "executables": "on", "exploits": "on", "lateralMovement": "on"},
+        "mitigationMode": "protect",
+        "inheritedFrom": None,
+    }
+    index = 0
+    while len(json.dumps(policy)) < size_bytes:
+        section = {}
+        for key in KEYS:
+            section[key] = random_leaf(rnd)
+        section["iocAttributes"] = {key: random_leaf(rnd) for key in KEYS[:10]}
+        section["exclusions"] = [{"value": f"C:\\Program Files\\Vendor{index}\\{item}\\", "mode": "suppress"}
+                                 for item in range(5)]
+        policy[f"section{index}"] = section
+        index += 1
+    return policy
+
+
+def build_desired_policy(policy, changes=5, seed=0):
+    """
+    Desired state for a policy built with build_policy. Changes the values of some settings in random sections
+    """
+
+    rnd = random.Random(seed)
+    sections = [key for key in policy if key.startswith("section")]
+    desired = {"agentUi": {"agentUiOn": False}}
+    for dummy in range(changes):
+        section = rnd.choice(sections)
+        desired.setdefault(section, {})["mitigationMode"] = rnd.choice(["detect", "protect"])
+    return desired
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+# Differential tests for the fast comparison helpers of SentineloneBase. Random nested objects are compared with the
+# fast helpers and with DeepDiff. Both have to agree on whether something changed and on the changed paths.
+
+import copy
+import inspect
+import random
+import re
+
+from unittest import mock
+
+import pytest
+
+from deepdiff import DeepDiff
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone import sentinelone_base
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.tests.unit.plugins.module_utils.sentinelone.payloads import (
+    build_desired_policy, build_policy, iter_paths, mutate, random_desired_state, random_object)
+
+ITERATIONS = 300
+
+
+@pytest.fixture
+def base_obj():
+    # Skip __init__ because it queries the API
+    obj = SentineloneBase.__new__(SentineloneBase)
+    obj.diff_detail = "full"
+    return obj
+
+
+def project_path(path):
+    """
+    get_changed_paths compares lists as a whole. Cut DeepDiff paths at the first list index
+    """
+
+    match = re.match(r"^(.*?)\[\d+\]", path)
+    return match.group(1) if match else path
+
+
+def deepdiff_paths(diff):
+    paths = set()
+    for changes in dict(diff).values():
+        paths.update(project_path(path) for path in changes)
+    return paths
+
+
+def reference_diff(dict1, dict2, exclude_path=None):
+    """
+    DeepDiff result the fast helpers are checked against. Newer DeepDiff versions report dictionaries with only few
+    common keys as one changed value. Disable that to get the changed keys like older versions and get_changed_paths
+    """
+
+    kwargs = {}
+    if "threshold_to_diff_deeper" in inspect.signature(DeepDiff.__init__).parameters:
+        kwargs["threshold_to_diff_deeper"] = 0
+    return DeepDiff(dict1, dict2, exclude_paths=exclude_path, **kwargs)
+
+
+def random_exclude_path(rnd, obj):
+    paths = list(iter_paths(obj))
+    if not paths or rnd.random() < 0.5:
+        return None
+    return rnd.sample(paths, min(len(paths), rnd.randint(1, 3)))
+
+
+@pytest.mark.parametrize("seed", range(ITERATIONS))
+def test_compare_agrees_with_deepdiff(seed):
+    rnd = random.Random(seed)
+    dict1 = random_object(rnd)
+    dict2 = mutate(rnd, dict1, rnd.randint(0, 4)) if rnd.random() < 0.8 else copy.deepcopy(dict1)
+    exclude_path = random_exclude_path(rnd, dict1)
+
+    expected = DeepDiff(dict1, dict2, exclude_paths=exclude_path)
+
+    assert SentineloneBase.values_differ(dict1, dict2, exclude_path) == bool(expected)
+    assert bool(SentineloneBase.compare(dict1, dict2, exclude_path)) == bool(expected)
+    changed_paths = SentineloneBase.get_changed_paths(dict1, dict2, exclude_path)
+    assert set(changed_paths) == deepdiff_paths(reference_diff(dict1, dict2, exclude_path))
+
+
+@pytest.mark.parametrize("seed", range(ITERATIONS))
+def test_merge_compare_agrees_with_deepdiff(base_obj, seed):
+    rnd = random.Random(seed)
+    current = random_object(rnd)
+    desired = random_desired_state(rnd, current, rnd.randint(0, 3))
+    exclude_path = random_exclude_path(rnd, current)
+
+    diff, merged = base_obj.merge_compare(current, desired, exclude_path)
+    expected = DeepDiff(current, merged, exclude_paths=exclude_path)
+
+    assert bool(diff) == bool(expected)
+    assert dict(diff) == dict(expected)
+    changed_paths = SentineloneBase.get_changed_paths(current, merged, exclude_path)
+    assert set(changed_paths) == deepdiff_paths(reference_diff(current, merged, exclude_path))
+    # The minimal update body has to be empty if and only if nothing changed
+    assert bool(SentineloneBase.get_changed_subtree(current, merged, exclude_path)) == bool(expected)
+
+
+def test_changed_subtree_applied_to_current_gives_merged(base_obj):
+    rnd = random.Random(42)
+    for dummy in range(ITERATIONS):
+        current = random_object(rnd)
+        desired = random_desired_state(rnd, current)
+        merged = base_obj.merge_compare(current, desired)[1]
+        patched = copy.deepcopy(current)
+        base_obj.merge(patched, SentineloneBase.get_changed_subtree(current, merged))
+        assert not DeepDiff(patched, merged)
+
+
+def test_compare_of_equal_dictionaries_skips_deepdiff():
+    policy = build_policy(10 * 1024)
+    SentineloneBase.compare({}, {})
+
+    with mock.patch.object(sentinelone_base, 'DeepDiff') as deepdiff:
+        diff = SentineloneBase.compare(policy, copy.deepcopy(policy))
+
+    assert not deepdiff.called
+    assert not diff
+    assert diff is SentineloneBase.compare({}, {})
+
+
+def test_changed_subtree_removes_excluded_keys_from_lists():
+    exclude_path = ["root['licenses']['bundles'][0]['majorVersion']", "root['licenses']['bundles'][0]['surfaces']"]
+    current = {"name": "test", "licenses": {"bundles": [{"name": "core", "majorVersion": 1, "surfaces": [1]}]}}
+    merged = {"name": "test", "licenses": {"bundles": [{"name": "complete", "majorVersion": 2, "surfaces": [2]}]}}
+
+    changed_subtree = SentineloneBase.get_changed_subtree(current, merged, exclude_path)
+
+    assert changed_subtree == {"licenses": {"bundles": [{"name": "complete"}]}}
+    assert merged["licenses"]["bundles"][0]["majorVersion"] == 2
+
+
+@pytest.mark.parametrize("value1, value2, changed_path", [
+    (1, 1.0, "root['key']"),
+    (True, 1, "root['key']"),
+    (None, {}, "root['key']"),
+    ([1, 2], [2, 1], "root['key']"),
+    ({"a": [1]}, {"a": (1,)}, "root['key']['a']"),
+])
+def test_type_and_order_changes_are_detected(value1, value2, changed_path):
+    dict1 = {"key": value1}
+    dict2 = {"key": value2}
+    assert bool(DeepDiff(dict1, dict2))
+    assert SentineloneBase.values_differ(dict1, dict2)
+    assert SentineloneBase.get_changed_paths(dict1, dict2) == [changed_path]
+
+
+def test_large_policy_agrees_with_deepdiff(base_obj):
+    policy = build_policy(200 * 1024)
+    desired = build_desired_policy(policy, changes=10)
+
+    diff, merged = base_obj.merge_compare(policy, desired)
+
+    assert deepdiff_paths(reference_diff(policy, merged)) == set(SentineloneBase.get_changed_paths(policy, merged))
+    assert not base_obj.merge_compare(policy, {"agentUi": {"agentUiOn": True}})[0]
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+# Memory regression tests. The peak memory of the helpers must depend on the size of the changes or the page size and
+# not on the size of the processed objects or the count of objects in the tenant.
+
+import copy
+import gc
+import random
+import tracemalloc
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.tests.unit.plugins.module_utils.sentinelone.payloads import (
+    build_desired_policy, build_policy, random_desired_state, random_object)
+
+
+def peak_memory(func, *args):
+    """
+    Returns the peak memory in bytes which is allocated while func is running
+    """
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def fake_list_api(item_count: int, item_size: int = 1024):
+    """
+    Returns a replacement for api_call which serves item_count items of roughly item_size bytes page by page. The pages
+    are generated on request like a real API response
+    """
+
+    def api_call(module, api_url, http_method="get", **kwargs):
+        params = dict(param.split('=', 1) for param in api_url.split('?', 1)[1].split('&'))
+        limit = int(params['limit'])
+        offset = int(params.get('cursor', 0))
+        items = [{'id': str(index), 'name': f"item{index}", 'value': 'x' * item_size}
+                 for index in range(offset, min(offset + limit, item_count))]
+        next_cursor = str(offset + limit) if offset + limit < item_count else None
+        return {'data': items, 'pagination': {'nextCursor': next_cursor, 'totalItems': item_count}}
+
+    return api_call
+
+
+@pytest.fixture
+def base_obj():
+    # Skip __init__ because it queries the API
+    return SentineloneBase.__new__(SentineloneBase)
+
+
+@pytest.fixture(scope="module")
+def large_policy():
+    return build_policy(2 * 1024 * 1024)
+
+
+def test_merge_compare_does_not_copy_current_data(base_obj, large_policy):
+    deepcopy_peak = peak_memory(copy.deepcopy, large_policy)
+    merge_compare_peak = peak_memory(base_obj.merge_compare, large_policy, {"agentUi": {"agentUiOn": True}})
+
+    assert merge_compare_peak < deepcopy_peak / 10
+
+
+def test_merge_copy_only_copies_changed_dictionaries(base_obj, large_policy):
+    desired = build_desired_policy(large_policy, changes=10)
+    expected = copy.deepcopy(large_policy)
+    base_obj.merge(expected, desired)
+    original = copy.deepcopy(large_policy)
+
+    merge_copy_peak = peak_memory(base_obj.merge_copy, large_policy, desired)
+
+    assert base_obj.merge_copy(large_policy, desired) == expected
+    assert large_policy == original
+    assert merge_copy_peak < peak_memory(copy.deepcopy, large_policy) / 10
+
+
+def test_remove_dict_copy_matches_remove_dict_from_dict(base_obj):
+    rnd = random.Random(0)
+    for dummy in range(300):
+        current = random_object(rnd)
+        remove = random_desired_state(rnd, current)
+        original = copy.deepcopy(current)
+        expected = copy.deepcopy(current)
+        base_obj.remove_dict_from_dict(expected, remove)
+
+        assert base_obj.remove_dict_copy(current, remove) == expected
+        assert current == original
+
+
+def test_remove_dict_copy_does_not_copy_current_dict(base_obj, large_policy):
+    remove = {"agentUi": {"agentUiOn": None}}
+
+    remove_peak = peak_memory(base_obj.remove_dict_copy, large_policy, remove)
+
+    assert remove_peak < peak_memory(copy.deepcopy, large_policy) / 10
+
+
+def test_get_paginated_memory_is_bounded_by_page_size(base_obj):
+    def consume(item_count):
+        base_obj.api_call = fake_list_api(item_count)
+        for item in base_obj.get_paginated(None, "https://console/web/api/v2.1/exclusions?siteIds=1", page_size=50):
+            assert item['id']
+
+    small_tenant_peak = peak_memory(consume, 500)
+    large_tenant_peak = peak_memory(consume, 10000)
+
+    assert large_tenant_peak < small_tenant_peak * 1.5
+
+
+def test_get_paginated_yields_all_items(base_obj):
+    base_obj.api_call = fake_list_api(1234, item_size=1)
+
+    items = list(base_obj.get_paginated(None, "https://console/web/api/v2.1/groups", page_size=100))
+
+    assert [item['id'] for item in items] == [str(index) for index in range(1234)]
+
+
+def test_get_group_index_only_keeps_group_keys(base_obj):
+    base_obj.api_call = fake_list_api(2000)
+    base_obj.api_endpoint_groups = "https://console/web/api/v2.1/groups"
+    base_obj.site_id = "1"
+
+    group_index = base_obj.get_group_index(None)
+    custom_index = base_obj.get_group_index(None, group_keys=['id'])
+
+    assert len(group_index) == 2000
+    assert group_index["item7"] == {'id': "7", 'name': "item7"}
+    assert custom_index["item7"] == {'id': "7"}
+    # The large values of the listed objects are dropped while paginating
+    assert peak_memory(base_obj.get_group_index, None) < 2000 * 1024
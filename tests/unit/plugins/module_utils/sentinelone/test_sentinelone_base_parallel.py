@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import threading
+import time
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+
+
+class ModuleFailed(Exception):
+    pass
+
+
+class FakeModule:
+    def __init__(self):
+        self.params = {}
+        self.fail_count = 0
+
+    def fail_json(self, msg, **kwargs):
+        self.fail_count += 1
+        raise ModuleFailed(msg)
+
+
+@pytest.fixture
+def base_obj():
+    # Skip __init__ because it queries the API
+    obj = SentineloneBase.__new__(SentineloneBase)
+    obj.parallel_requests = 3
+    return obj
+
+
+def test_run_parallel_limits_concurrency_and_keeps_order(base_obj):
+    lock = threading.Lock()
+    running = [0]
+    max_running = [0]
+
+    def func(worker_module, item):
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return item * 2
+
+    results = base_obj.run_parallel(FakeModule(), func, list(range(20)))
+
+    assert results == [item * 2 for item in range(20)]
+    assert max_running[0] == 3
+
+
+def test_run_parallel_reports_all_errors_after_all_calls(base_obj):
+    module = FakeModule()
+    done = []
+
+    def func(worker_module, item):
+        if item % 5 == 0:
+            # Worker threads get a wrapper which raises instead of ending the process
+            worker_module.fail_json(msg=f"item {item} failed")
+        done.append(item)
+
+    with pytest.raises(ModuleFailed) as err:
+        base_obj.run_parallel(module, func, list(range(1, 11)))
+
+    assert module.fail_count == 1
+    assert "2 of 10 API calls failed" in str(err.value)
+    assert "item 5 failed" in str(err.value) and "item 10 failed" in str(err.value)
+    assert sorted(done) == [1, 2, 3, 4, 6, 7, 8, 9]
+
+
+def test_worker_module_passes_attributes(base_obj):
+    module = FakeModule()
+    module.params = {"validate_certs": True}
+
+    results = base_obj.run_parallel(module, lambda worker_module, item: worker_module.params[item], ["validate_certs"])
+
+    assert results == [True]
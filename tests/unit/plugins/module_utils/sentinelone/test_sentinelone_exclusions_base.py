@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_exclusions_base import (
+    SentineloneExclusionsBase)
+
+
+@pytest.mark.parametrize("path1, path2, os_type", [
+    ("C:\\Test\\", "c:\\test\\", "windows"),
+    ("C:\\Test\\", "C:/Test/", "windows"),
+    ("C:\\Test\\\\Dir\\", "C:\\Test\\Dir\\\\", "windows"),
+    ("\\\\Server\\Share\\", "\\\\server\\share\\", "windows"),
+    ("/opt//app/", "/opt/app/", "linux"),
+    ("/opt/app", "/opt//app", "linux"),
+])
+def test_equivalent_paths_get_same_key(path1, path2, os_type):
+    assert (SentineloneExclusionsBase.get_exclusion_key(path1, os_type)
+            == SentineloneExclusionsBase.get_exclusion_key(path2, os_type))
+
+
+@pytest.mark.parametrize("path1, os_type1, path2, os_type2", [
+    # Linux paths are case sensitive
+    ("/opt/App/", "linux", "/opt/app/", "linux"),
+    # A file and a folder with the same path
+    ("C:\\Test\\", "windows", "C:\\Test", "windows"),
+    ("/opt/app/", "linux", "/opt/app", "linux"),
+    ("/opt/app/", "linux", "/opt/app/", "windows"),
+    # The leading \\ of UNC paths is significant
+    ("\\\\Server\\Share\\", "windows", "\\Server\\Share\\", "windows"),
+])
+def test_different_paths_get_different_keys(path1, os_type1, path2, os_type2):
+    assert (SentineloneExclusionsBase.get_exclusion_key(path1, os_type1)
+            != SentineloneExclusionsBase.get_exclusion_key(path2, os_type2))
+
+
+@pytest.mark.parametrize("path, include_subfolders", [
+    ("C:\\Test\\", False),
+    ("C:\\Test\\", True),
+    ("C:\\Test", False),
+    ("/opt/app/", True),
+    ("/opt/app", True),
+])
+def test_path_kind_matches_path_exclusion_type(path, include_subfolders):
+    path_exclusion_type = SentineloneExclusionsBase.get_path_exclusion_type(include_subfolders, path)
+    path_kind = SentineloneExclusionsBase.get_exclusion_key(path, "windows")[2]
+
+    assert path_kind == ("file" if path_exclusion_type == "file" else "folder")
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from unittest import mock
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_journal import SentineloneJournal
+
+
+def test_resume_skips_recorded_keys_and_ignores_incomplete_line(tmp_path):
+    path = str(tmp_path / "run.journal")
+    module = mock.Mock()
+    journal = SentineloneJournal(path, "run-1", False, module)
+    journal.mark_done("create:a")
+    journal.mark_done("update:1")
+    journal.journal_file.write('{"key": "upd')
+    journal.journal_file.close()
+
+    resumed = SentineloneJournal(path, "run-1", True, module)
+
+    assert resumed.resumed
+    assert resumed.is_done("create:a") and resumed.is_done("update:1")
+    assert not resumed.is_done("update:2")
+    module.warn.assert_not_called()
+
+
+def test_journal_without_resume_starts_fresh(tmp_path):
+    path = str(tmp_path / "run.journal")
+    journal = SentineloneJournal(path, "run-1", False, mock.Mock())
+    journal.mark_done("chunk:1")
+    journal.journal_file.close()
+
+    fresh = SentineloneJournal(path, "run-1", False, mock.Mock())
+
+    assert not fresh.resumed
+    assert not fresh.is_done("chunk:1")
+
+
+def test_other_run_id_is_not_resumed(tmp_path):
+    path = str(tmp_path / "run.journal")
+    module = mock.Mock()
+    journal = SentineloneJournal(path, "run-1", False, module)
+    journal.mark_done("chunk:1")
+    journal.journal_file.close()
+
+    other = SentineloneJournal(path, "run-2", True, module)
+
+    assert not other.resumed
+    assert not other.is_done("chunk:1")
+    module.warn.assert_called_once()
+
+
+def test_complete_removes_journal(tmp_path):
+    path = tmp_path / "run.journal"
+    journal = SentineloneJournal(str(path), "run-1", False, mock.Mock())
+    journal.mark_done("chunk:1")
+
+    journal.complete()
+
+    assert not path.exists()
+
+
+def test_without_path_nothing_is_recorded():
+    journal = SentineloneJournal(None, "run-1", True, mock.Mock())
+    journal.mark_done("chunk:1")
+    journal.complete()
+
+    assert not journal.resumed
+    assert not journal.is_done("chunk:1")
+
+
+def test_run_id_depends_on_values():
+    assert SentineloneJournal.get_run_id("a", {"x": 1, "y": 2}) == SentineloneJournal.get_run_id("a", {"y": 2, "x": 1})
+    assert SentineloneJournal.get_run_id("a", 1) != SentineloneJournal.get_run_id("a", 2)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import os
+
+from unittest import mock
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.fake_console import CONSOLE_URL, FakeConsole
+
+
+@pytest.fixture
+def group_names():
+    """
+    Names of the groups of the fake console. Override it in the test module to get other groups
+    """
+
+    return ["MariaDB", "MaxDB"]
+
+
+@pytest.fixture
+def console(group_names):
+    """
+    Fake console which answers all API calls of the modules. Override it in the test module and request console to
+    add sites, groups or policies
+    """
+
+    console = FakeConsole(group_names=group_names)
+    with mock.patch.object(SentineloneBase, 'api_call', side_effect=console.api_call, autospec=False):
+        yield console
+
+
+@pytest.fixture
+def module_args():
+    """
+    Module arguments of the tested module which every test passes. Override it in the test module
+    """
+
+    return dict(site_name="test")
+
+
+@pytest.fixture
+def get_args(module_args):
+    """
+    Returns a function which builds the module arguments from module_args and the passed arguments. Paths are passed as
+    str like from a playbook
+    """
+
+    def get_args(**kwargs):
+        args = dict(console_url=CONSOLE_URL, token="XXXX", **module_args)
+        args.update({key: str(value) if isinstance(value, os.PathLike) else value for key, value in kwargs.items()})
+        return args
+
+    return get_args
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+# In-memory replacement for the SentinelOne management API. It is patched in place of SentineloneBase.api_call and
+# implements the parts of the API the modules use.
+
+import copy
+import itertools
+
+from ansible.module_utils.six.moves.urllib.parse import parse_qs, urlparse
+
+CONSOLE_URL = "https://console.sentinelone.net"
+ACCOUNT_ID = "1000"
+SITE_ID = "2000"
+
+
+class FakeConsole:
+    def __init__(self, site_name: str = "test", group_names: list = None):
+        self.ids = itertools.count(5000)
+        self.calls = []
+        self.site = {"id": SITE_ID, "name": site_name, "accountId": ACCOUNT_ID, "state": "active"}
+        self.sites = [self.site]
+        self.groups = [{"id": str(3000 + index), "name": group_name, "siteId": SITE_ID, "isDefault": False,
+                        "type": "static", "inherits": True}
+                       for index, group_name in enumerate(group_names or [])]
+        self.exclusions = []
+        # Policies by site or group id. Groups without own policy inherit the site policy
+        self.policies = {ACCOUNT_ID: {"inheritedFrom": None, "mitigationMode": "protect",
+                                      "agentUi": {"agentUiOn": True, "showSuspicious": True}}}
+        self.policies[SITE_ID] = dict(copy.deepcopy(self.policies[ACCOUNT_ID]), inheritedFrom="account")
+        # Upgrade policies by site or group id. Scopes without entry inherit the upgrade policy of the site
+        self.config_overrides = []
+        self.upgrade_policies = {SITE_ID: {"inheritParentConcurrencyConfig": True,
+                                           "inheritParentMaintenanceConfig": True, "maxConcurrent": 50,
+                                           "timezoneGmt": "GMT+00:00", "maintenanceWindowsByDay": {}}}
+
+    def group_id(self, group_name: str):
+        return next(group['id'] for group in self.groups if group['name'] == group_name)
+
+    def add_exclusion(self, value: str, os_type: str, group_name: str = None, **kwargs):
+        """
+        Add an existing exclusion. Unset settings get the defaults of the modules
+        """
+
+        scope = {"groupIds": [self.group_id(group_name)]} if group_name else {"siteIds": [SITE_ID]}
+        exclusion = {
+            "id": str(next(self.ids)),
+            "type": "path",
+            "value": value,
+            "mode": "disable_all_monitors",
+            "source": "user",
+            "pathExclusionType": "folder" if value[-1] in "/\\" else "file",
+            "description": "",
+            "actions": ["detect"],
+            "osType": os_type,
+            "scope": scope,
+            "createdAt": "2024-01-01T00:00:00Z",
+            "userName": "test",
+        }
+        exclusion.update(kwargs)
+        self.exclusions.append(exclusion)
+        return exclusion
+
+    def writes(self, http_method: str = None):
+        """
+        Returns the recorded calls which changed something
+        """
+
+        return [call for call in self.calls if call[0] != "GET" and (http_method is None or call[0] == http_method)]
+
+    @staticmethod
+    def paginate(items: list, params: dict):
+        limit = int(params.get('limit', ['10'])[0])
+        offset = int(params.get('cursor', ['0'])[0])
+        next_offset = offset + limit
+        return items[offset:next_offset], {
+            "nextCursor": str(next_offset) if next_offset < len(items) else None,
+            "totalItems": len(items)
+        }
+
+    def api_call(self, module, api_endpoint: str, http_method: str = "get", parse_response: bool = True, **kwargs):
+        url = urlparse(api_endpoint)
+        params = parse_qs(url.query)
+        http_method = http_method.upper()
+        body = copy.deepcopy(kwargs.get("body", {}))
+        self.calls.append((http_method, url.path, body))
+        path = url.path
+        resource_id = None
+        segments = path.rsplit('/', 2)
+        if segments[-1].isdigit():
+            # Calls to a single object, e.g. /groups/{id}
+            path, resource_id = path.rsplit('/', 1)
+        elif segments[-2].isdigit():
+            # Calls to a sub resource of a single object, e.g. /groups/{id}/policy
+            resource_id = segments[-2]
+        handler = getattr(self, f"handle_{path.rsplit('/', 1)[-1].replace('-', '_')}")
+        if resource_id is not None:
+            return handler(http_method, params, body, resource_id)
+        return handler(http_method, params, body)
+
+    def handle_accounts(self, http_method: str, params: dict, body: dict):
+        return {"data": [{"id": ACCOUNT_ID, "name": "account"}], "pagination": {"totalItems": 1}}
+
+    def add_site(self, name: str, **kwargs):
+        site = {"id": str(next(self.ids)), "name": name, "accountId": ACCOUNT_ID, "state": "active"}
+        site.update(kwargs)
+        self.sites.append(site)
+        # New sites inherit the account policy
+        self.policies[site['id']] = dict(copy.deepcopy(self.policies[SITE_ID]), inheritedFrom="account")
+        return site
+
+    def handle_sites(self, http_method: str, params: dict, body: dict):
+        sites = [site for site in self.sites if site['state'] == params.get('state', [site['state']])[0]]
+        if 'name' in params:
+            sites = [site for site in sites if site['name'] == params['name'][0]]
+        data, pagination = self.paginate(sites, params)
+        return {"data": {"sites": data}, "pagination": pagination}
+
+    def add_group(self, name: str, **kwargs):
+        group = {"id": str(next(self.ids)), "name": name, "siteId": SITE_ID, "isDefault": False, "type": "static",
+                 "inherits": True}
+        group.update(kwargs)
+        self.groups.append(group)
+        return group
+
+    def handle_groups(self, http_method: str, params: dict, body: dict, group_id: str = None):
+        if http_method == "POST":
+            group = self.add_group(body['data']['name'], type="dynamic" if 'filterId' in body['data'] else "static",
+                                   **{key: value for key, value in body['data'].items() if key != 'name'})
+            return {"data": copy.deepcopy(group)}
+        if http_method == "PUT":
+            group = next(group for group in self.groups if group['id'] == group_id)
+            group.update(body['data'])
+            return {"data": copy.deepcopy(group)}
+        if http_method == "DELETE":
+            self.groups = [group for group in self.groups if group['id'] != group_id]
+            return {"data": {"success": True}}
+
+        groups = self.groups
+        if 'siteIds' in params:
+            groups = [group for group in groups if group['siteId'] in params['siteIds'][0].split(',')]
+        if 'name' in params:
+            # The API matches substrings
+            groups = [group for group in groups if params['name'][0] in group['name']]
+        data, pagination = self.paginate(groups, params)
+        return {"data": data, "pagination": pagination}
+
+    def get_policy(self, scope_id: str):
+        if scope_id in self.policies:
+            return self.policies[scope_id]
+        return dict(copy.deepcopy(self.policies[SITE_ID]), inheritedFrom="site")
+
+    def set_policy(self, group_name: str, **settings):
+        """
+        Give the group an own policy based on the site policy
+        """
+
+        group_id = self.group_id(group_name)
+        self.set_inherits(group_id, False)
+        self.policies[group_id] = dict(copy.deepcopy(self.policies[SITE_ID]), inheritedFrom=None, **settings)
+        return self.policies[group_id]
+
+    def set_inherits(self, scope_id: str, inherits: bool):
+        for group in self.groups:
+            if group['id'] == scope_id:
+                group['inherits'] = inherits
+
+    @staticmethod
+    def merge(current: dict, update: dict):
+        for key, value in update.items():
+            if isinstance(value, dict) and isinstance(current.get(key), dict):
+                FakeConsole.merge(current[key], value)
+            else:
+                current[key] = copy.deepcopy(value)
+
+    def handle_policy(self, http_method: str, params: dict, body: dict, scope_id: str):
+        if http_method == "PUT":
+            policy = self.policies.setdefault(scope_id, copy.deepcopy(self.get_policy(scope_id)))
+            self.merge(policy, body['data'])
+            policy['inheritedFrom'] = None
+            self.set_inherits(scope_id, False)
+        return {"data": copy.deepcopy(self.get_policy(scope_id))}
+
+    def handle_revert_policy(self, http_method: str, params: dict, body: dict, scope_id: str):
+        self.policies.pop(scope_id, None)
+        self.set_inherits(scope_id, True)
+        return {"data": {"success": True}}
+
+    def get_upgrade_policy(self, scope_id: str):
+        return self.upgrade_policies.get(scope_id, self.upgrade_policies[SITE_ID])
+
+    def handle_tasks_configuration(self, http_method: str, params: dict, body: dict):
+        if http_method == "PUT":
+            scope_ids = body['filter'].get('groupIds') or body['filter']['siteIds']
+            for scope_id in scope_ids:
+                self.upgrade_policies[scope_id] = copy.deepcopy(body['data'])
+            return {"data": {"affected": len(scope_ids)}}
+
+        scope_id = (params.get('groupIds') or params['siteIds'])[0]
+        upgrade_policy = dict(copy.deepcopy(self.get_upgrade_policy(scope_id)), taskType="agents_upgrade",
+                              parentMaxConcurrent=self.upgrade_policies[SITE_ID]['maxConcurrent'],
+                              concurrencyConfigUpdatedAt=None, concurrencyConfigUpdatedBy=None,
+                              maintenanceConfigUpdatedAt=None, maintenanceConfigUpdatedBy=None)
+        return {"data": upgrade_policy}
+
+    def add_config_override(self, name: str, config: dict, group_name: str = None, **kwargs):
+        config_override = {"id": str(next(self.ids)), "name": name, "description": "", "osType": "windows",
+                           "versionOption": "ALL", "config": config, "createdAt": "2024-01-01T00:00:00Z",
+                           "updatedAt": "2024-01-01T00:00:00Z"}
+        if group_name:
+            config_override.update(scope="group", group={"id": self.group_id(group_name), "name": group_name})
+        else:
+            config_override.update(scope="site", site={"id": SITE_ID, "name": self.site['name']})
+        config_override.update(kwargs)
+        self.config_overrides.append(config_override)
+        return config_override
+
+    def handle_config_override(self, http_method: str, params: dict, body: dict, config_override_id: str = None):
+        if http_method == "POST":
+            config_override = dict(body['data'], id=str(next(self.ids)))
+            self.config_overrides.append(config_override)
+            return {"data": copy.deepcopy(config_override)}
+        if http_method == "PUT":
+            config_override = next(config_override for config_override in self.config_overrides
+                                   if config_override['id'] == config_override_id)
+            config_override.update(body['data'])
+            return {"data": copy.deepcopy(config_override)}
+        if http_method == "DELETE":
+            self.config_overrides = [config_override for config_override in self.config_overrides
+                                     if config_override['id'] != config_override_id]
+            return {"data": {"success": True}}
+
+        def matches(config_override):
+            scope = config_override.get('group') or config_override.get('site')
+            scope_ids = params.get('groupIds', params.get('siteIds'))[0].split(',')
+            return (config_override['osType'] in params['osTypes'][0].split(',') and scope['id'] in scope_ids and
+                    config_override['scope'] == ("group" if 'groupIds' in params else "site") and
+                    config_override['versionOption'] == params['versionOption'][0] and
+                    config_override.get('agentVersion') in params.get('agentVersions', [None])[0:1] and
+                    params.get('name__like', [""])[0] in config_override['name'])
+
+        return {"data": [copy.deepcopy(config_override) for config_override in self.config_overrides
+                         if matches(config_override)]}
+
+    def handle_exclusions(self, http_method: str, params: dict, body: dict):
+        if http_method == "GET":
+            exclusions = self.exclusions
+            if 'groupIds' in params:
+                group_ids = params['groupIds'][0].split(',')
+                exclusions = [exclusion for exclusion in exclusions
+                              if exclusion['scope'].get('groupIds', [None])[0] in group_ids]
+            else:
+                exclusions = [exclusion for exclusion in exclusions if 'siteIds' in exclusion['scope']]
+            if 'value' in params:
+                exclusions = [exclusion for exclusion in exclusions if exclusion['value'] == params['value'][0]]
+            if 'value__contains' in params:
+                # The contains filters of the API ignore the case
+                exclusions = [exclusion for exclusion in exclusions
+                              if params['value__contains'][0].casefold() in exclusion['value'].casefold()]
+            if 'osTypes' in params:
+                os_types = params['osTypes'][0].split(',')
+                exclusions = [exclusion for exclusion in exclusions if exclusion['osType'] in os_types]
+            data, pagination = self.paginate(copy.deepcopy(exclusions), params)
+            return {"data": data, "pagination": pagination}
+
+        if http_method == "POST":
+            group_ids = body['filter'].get('groupIds')
+            scopes = [{"groupIds": [group_id]} for group_id in group_ids] if group_ids else [{"siteIds": [SITE_ID]}]
+            created = []
+            for scope in scopes:
+                exclusion = dict(copy.deepcopy(body['data']), id=str(next(self.ids)), scope=scope)
+                self.exclusions.append(exclusion)
+                created.append(copy.deepcopy(exclusion))
+            return {"data": created}
+
+        if http_method == "PUT":
+            exclusion = next(exclusion for exclusion in self.exclusions if exclusion['id'] == body['data']['id'])
+            exclusion.update(body['data'])
+            return {"data": [copy.deepcopy(exclusion)]}
+
+        if http_method == "DELETE":
+            ids = body['data']['ids']
+            count = len(self.exclusions)
+            self.exclusions = [exclusion for exclusion in self.exclusions if exclusion['id'] not in ids]
+            return {"data": {"affected": count - len(self.exclusions)}}
+
+        raise NotImplementedError(http_method)
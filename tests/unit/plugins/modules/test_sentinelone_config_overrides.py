@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from unittest import mock
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_config_overrides
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.fake_console import CONSOLE_URL
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import run_module
+
+
+@pytest.fixture
+def group_names():
+    return ["Servers"]
+
+
+@pytest.fixture
+def module_args():
+    return dict(site_name="test", name="test_override", os_type="windows")
+
+
+def test_missing_config_override_is_created(console, get_args):
+    result = run_module(sentinelone_config_overrides, get_args(group="Servers",
+                                                               config_override={"powershellProtection": True}))
+
+    assert result['changed']
+    assert [call[0] for call in console.writes()] == ["POST"]
+    assert console.config_overrides[0]['config'] == {"powershellProtection": True}
+    assert console.config_overrides[0]['group'] == {"id": console.group_id("Servers")}
+
+
+def test_changed_config_override_is_updated_in_place(console, get_args):
+    config_override = console.add_config_override("test_override", {"powershellProtection": True,
+                                                                     "antiTamperingOn": True})
+
+    result = run_module(sentinelone_config_overrides, get_args(config_override={"powershellProtection": False},
+                                                               description="changed"))
+
+    assert result['message'] == "Config override test_override for site test updated"
+    writes = console.writes()
+    assert [(call[0], call[1].rsplit('/', 1)[-1]) for call in writes] == [("PUT", config_override['id'])]
+    # Only the changed keys are sent. The config is sent as a whole
+    assert writes[0][2] == {"data": {"config": {"powershellProtection": False, "antiTamperingOn": True},
+                                     "description": "changed"}}
+    assert [config_override['id'] for config_override in console.config_overrides] == [config_override['id']]
+
+    result = run_module(sentinelone_config_overrides, get_args(config_override={"powershellProtection": False},
+                                                               description="changed"))
+
+    assert not result['changed']
+    assert len(console.writes()) == 1
+
+
+def test_removed_settings_are_updated_in_place(console, get_args):
+    config_override = console.add_config_override("test_override", {"powershellProtection": True,
+                                                                     "antiTamperingOn": True})
+
+    result = run_module(sentinelone_config_overrides, get_args(state="absent",
+                                                               config_override={"antiTamperingOn": None}))
+
+    assert result['changed']
+    assert console.writes() == [("PUT", f"/web/api/v2.1/config-override/{config_override['id']}",
+                                 {"data": {"config": {"powershellProtection": True}}})]
+
+
+def test_changed_immutable_key_recreates_the_config_override(console):
+    config_override = console.add_config_override("test_override", {"powershellProtection": True})
+    config_override_obj = sentinelone_config_overrides.SentineloneConfigOverrides.__new__(
+        sentinelone_config_overrides.SentineloneConfigOverrides)
+
+    assert config_override_obj.get_update_body(config_override, dict(config_override, name="renamed")) == {
+        "data": {"name": "renamed"}}
+    assert config_override_obj.get_update_body(config_override, dict(config_override, osType="linux")) is None
+    # Immutable keys which the API does not return are not compared
+    without_site = {key: value for key, value in config_override.items() if key != 'site'}
+    assert config_override_obj.get_update_body(without_site, dict(config_override, description="x")) == {
+        "data": {"description": "x"}}
+
+    config_override_obj.api_endpoint_config_overrides = f"{CONSOLE_URL}/web/api/v2.1/config-override"
+    config_override_obj.apply_config_override(config_override, dict(config_override, osType="linux"), mock.Mock())
+
+    assert [call[0] for call in console.writes()] == ["DELETE", "POST"]
+    assert [config_override['osType'] for config_override in console.config_overrides] == ["linux"]
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from unittest import mock
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_groups
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+
+@pytest.fixture
+def group_names():
+    return ["Default Group", "MariaDB10", "Legacy"]
+
+
+@pytest.fixture
+def console(console):
+    console.groups[0]['isDefault'] = True
+    console.add_group("Dynamic", type="dynamic", filterId="9000")
+    return console
+
+
+def current_group_names(console):
+    return [group['name'] for group in console.groups]
+
+
+def test_substring_match_is_not_taken_as_existing_group(console, get_args):
+    result = run_module(sentinelone_groups, get_args(name=["MariaDB"]))
+
+    assert result['message'] == ["Group MariaDB created."]
+    assert "MariaDB" in current_group_names(console) and "MariaDB10" in current_group_names(console)
+
+
+def test_groups_are_listed_once_for_all_names(console, get_args):
+    result = run_module(sentinelone_groups, get_args(name=["MariaDB10", "Legacy", "New1", "New2"]))
+
+    group_listings = [call for call in console.calls if call[0] == "GET" and call[1].endswith("/groups")]
+    assert len(group_listings) == 1
+    assert result['message'] == ["Group New1 created.", "Group New2 created."]
+
+
+def test_exclusive_deletes_only_undeclared_static_groups(console, get_args):
+    result = run_module(sentinelone_groups, get_args(name=["MariaDB10", "New"], exclusive=True))
+
+    assert result['changed']
+    assert sorted(current_group_names(console)) == ["Default Group", "Dynamic", "MariaDB10", "New"]
+    assert "Group Legacy is not in name. Group deleted." in result['message']
+
+
+def test_absent_deletes_exact_names(console, get_args):
+    result = run_module(sentinelone_groups, get_args(state="absent", name=["MariaDB", "Legacy"]))
+
+    assert result['message'] == ["Group Legacy deleted."]
+    assert "MariaDB10" in current_group_names(console)
+
+
+def test_failed_create_does_not_stop_the_other_groups(console, get_args):
+    def failing_api_call(module, api_endpoint, http_method="get", **kwargs):
+        if http_method.upper() == "POST" and kwargs['body']['data']['name'] == "New2":
+            module.fail_json(msg="Failed to create group New2. Status code: 400")
+        return console.api_call(module, api_endpoint, http_method, **kwargs)
+
+    with mock.patch.object(SentineloneBase, 'api_call', side_effect=failing_api_call):
+        with pytest.raises(AnsibleFailJson) as err:
+            run_module(sentinelone_groups, get_args(name=["New1", "New2", "New3"], parallel_requests=2))
+
+    assert err.value.args[0]['msg'] == "1 of 3 API calls failed. Errors: Failed to create group New2. Status code: 400"
+    assert "New1" in current_group_names(console) and "New3" in current_group_names(console)
+
+
+def test_failed_delete_does_not_stop_creates_and_reports_the_changes(console, get_args):
+    def failing_api_call(module, api_endpoint, http_method="get", **kwargs):
+        if http_method.upper() == "DELETE":
+            module.fail_json(msg="Failed to delete group Legacy. Status code: 500")
+        return console.api_call(module, api_endpoint, http_method, **kwargs)
+
+    with mock.patch.object(SentineloneBase, 'api_call', side_effect=failing_api_call):
+        with pytest.raises(AnsibleFailJson) as err:
+            run_module(sentinelone_groups, get_args(name=["MariaDB10", "New"], exclusive=True))
+
+    result = err.value.args[0]
+    assert result['msg'] == "1 of 2 API calls failed. Errors: Failed to delete group Legacy. Status code: 500"
+    assert result['changed']
+    assert result['original_message'] == [{'changes': "Group created", 'groupName': "New"}]
+    assert result['message'] == ["Group New created."]
+    assert "New" in current_group_names(console) and "Legacy" in current_group_names(console)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from unittest import mock
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_path_exclusions
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.fake_console import FakeConsole
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import run_module
+
+
+@pytest.fixture
+def module_args():
+    return dict(site_name="test", os_path="C:\\Test\\", os_type="windows", mode="performance_focus")
+
+
+def test_creates_and_is_idempotent(console, get_args):
+    result = run_module(sentinelone_path_exclusions, get_args())
+
+    assert result['changed']
+    assert len(console.exclusions) == 1
+    assert not run_module(sentinelone_path_exclusions, get_args())['changed']
+
+
+def test_updates_drifted_exclusion(console, get_args):
+    console.add_exclusion("C:\\Test\\", "windows", mode="suppress")
+
+    result = run_module(sentinelone_path_exclusions, get_args())
+
+    assert result['changed']
+    assert console.exclusions[0]['mode'] == "disable_all_monitors"
+
+
+def test_deletes_exclusions_in_groups(console, get_args):
+    console.add_exclusion("C:\\Test\\", "windows", group_name="MariaDB")
+    console.add_exclusion("C:\\Test\\", "windows", group_name="MaxDB")
+
+    result = run_module(sentinelone_path_exclusions, get_args(state="absent", groups=["MariaDB", "MaxDB"]))
+
+    assert result['changed']
+    assert not console.exclusions
+
+
+def test_finds_exclusion_with_different_case_and_separators(console, get_args):
+    console.add_exclusion("c:/test/", "windows")
+
+    result = run_module(sentinelone_path_exclusions, get_args())
+
+    assert result['changed']
+    assert not console.writes("POST")
+    assert console.exclusions[0]['value'] == "C:\\Test\\"
+    assert not run_module(sentinelone_path_exclusions, get_args())['changed']
+
+
+def test_updates_all_drifted_site_exclusions(console, get_args):
+    console.add_exclusion("C:\\Test\\", "windows", mode="suppress")
+    console.add_exclusion("c:/test//", "windows", mode="suppress")
+
+    result = run_module(sentinelone_path_exclusions, get_args())
+
+    assert result['changed']
+    assert len(console.writes("PUT")) == 2
+    assert all(exclusion['mode'] == "disable_all_monitors" for exclusion in console.exclusions)
+    assert not run_module(sentinelone_path_exclusions, get_args())['changed']
+
+
+def test_lists_only_matching_exclusions(console, get_args):
+    console.add_exclusion("C:\\Other\\", "windows")
+    console.add_exclusion("/test", "linux")
+
+    with mock.patch.object(SentineloneBase, 'get_paginated', autospec=True,
+                           side_effect=SentineloneBase.get_paginated) as get_paginated:
+        result = run_module(sentinelone_path_exclusions, get_args())
+
+    assert result['changed']
+    listings = [call.args[2] for call in get_paginated.call_args_list if "/exclusions" in call.args[2]]
+    assert listings
+    assert all("value__contains=Test" in listing and "osTypes=windows" in listing for listing in listings)
+    assert len(console.exclusions) == 3
+
+
+def test_updates_all_drifted_group_exclusions(console, get_args):
+    group_names = [f"Group{index}" for index in range(20)]
+    console.groups = FakeConsole(group_names=group_names).groups
+    for group_name in group_names:
+        console.add_exclusion("C:\\Test\\", "windows", group_name=group_name, mode="suppress")
+
+    result = run_module(sentinelone_path_exclusions, get_args(groups=group_names))
+
+    assert result['changed']
+    assert len(console.writes("PUT")) == 20
+    assert all(exclusion['mode'] == "disable_all_monitors" for exclusion in console.exclusions)
+    assert not run_module(sentinelone_path_exclusions, get_args(groups=group_names))['changed']
+
+
+def test_creates_exclusion_only_in_missing_groups(console, get_args):
+    console.add_exclusion("C:\\Test\\", "windows", group_name="MariaDB", mode="suppress")
+
+    result = run_module(sentinelone_path_exclusions, get_args(groups=["MariaDB", "MaxDB"]))
+
+    assert result['changed']
+    creates = console.writes("POST")
+    assert len(creates) == 1
+    assert creates[0][2]['filter']['groupIds'] == [console.group_id("MaxDB")]
+    # The drifted exclusion in the other group is updated in the same run
+    assert len(console.writes("PUT")) == 1
+    assert result['message'] == ["Exclusion is missing in group MaxDB. Creating exclusion.",
+                                 "Exclusion exists in group MariaDB but is not up-to-date. Updating exclusion."]
+    assert not run_module(sentinelone_path_exclusions, get_args(groups=["MariaDB", "MaxDB"]))['changed']
+    assert len(console.exclusions) == 2
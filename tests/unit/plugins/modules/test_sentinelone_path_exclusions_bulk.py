@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from unittest import mock
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_journal import SentineloneJournal
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_path_exclusions_bulk
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+
+def linux_exclusions(count: int, mode: str = "performance_focus"):
+    return [{"os_path": f"/opt/app{index}/", "os_type": "linux", "mode": mode} for index in range(count)]
+
+
+def test_creates_missing_exclusions_in_site(console, get_args):
+    result = run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=linux_exclusions(250)))
+
+    assert result['changed']
+    assert len(console.writes("POST")) == 250
+    assert len(console.exclusions) == 250
+    assert all(call[2]['filter'] == {"siteIds": ["2000"]} for call in console.writes("POST"))
+
+
+def test_is_idempotent_with_one_listing(console, get_args):
+    run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=linux_exclusions(250)))
+    console.calls = []
+
+    result = run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=linux_exclusions(250)))
+
+    assert not result['changed']
+    assert not console.writes()
+    # 250 exclusions with a page size of 100
+    assert len([call for call in console.calls if call[1].endswith("/exclusions")]) == 3
+
+
+def test_updates_drifted_exclusions_only(console, get_args):
+    for exclusion in linux_exclusions(5):
+        console.add_exclusion(exclusion['os_path'], "linux")
+    console.exclusions[2]['mode'] = "suppress"
+
+    result = run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=linux_exclusions(5)))
+
+    assert result['changed']
+    updates = console.writes("PUT")
+    assert len(updates) == 1
+    assert updates[0][2]['data']['id'] == console.exclusions[2]['id']
+    assert console.exclusions[2]['mode'] == "disable_all_monitors"
+    assert not console.writes("POST")
+
+
+def test_creates_exclusion_only_in_missing_groups(console, get_args):
+    console.add_exclusion("C:\\Test\\", "windows", group_name="MariaDB")
+    exclusions = [{"os_path": "C:\\Test\\", "os_type": "windows", "mode": "performance_focus"}]
+
+    result = run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=exclusions, groups=["MariaDB", "MaxDB"]))
+
+    assert result['changed']
+    creates = console.writes("POST")
+    assert len(creates) == 1
+    assert creates[0][2]['filter']['groupIds'] == [console.group_id("MaxDB")]
+    assert result['message'] == ["Exclusion C:\\Test\\ is missing in group MaxDB. Creating exclusion."]
+
+
+def test_deletes_exclusions_with_one_request(console, get_args):
+    for exclusion in linux_exclusions(3):
+        console.add_exclusion(exclusion['os_path'], "linux")
+    console.add_exclusion("/keep/", "linux")
+
+    result = run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=linux_exclusions(3), state="absent"))
+
+    assert result['changed']
+    assert len(console.writes("DELETE")) == 1
+    assert [exclusion['value'] for exclusion in console.exclusions] == ["/keep/"]
+
+
+def test_duplicate_exclusions_fail(console, get_args):
+    with pytest.raises(AnsibleFailJson, match="defined more than once"):
+        run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=linux_exclusions(2) + linux_exclusions(1)))
+
+
+def test_matches_normalized_windows_paths(console, get_args):
+    console.add_exclusion("c:\\program files\\app\\", "windows")
+    exclusions = [{"os_path": "C:\\Program Files\\App\\", "os_type": "windows", "mode": "performance_focus"}]
+
+    result = run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=exclusions))
+
+    assert result['changed']
+    assert not console.writes("POST")
+    assert console.exclusions[0]['value'] == "C:\\Program Files\\App\\"
+
+
+def test_normalized_duplicate_exclusions_fail(console, get_args):
+    exclusions = [{"os_path": "C:\\App\\", "os_type": "windows", "mode": "performance_focus"},
+                  {"os_path": "c:/app/", "os_type": "windows", "mode": "performance_focus"}]
+
+    with pytest.raises(AnsibleFailJson, match="defined more than once"):
+        run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=exclusions))
+
+
+def test_exclusive_deletes_unmanaged_exclusions_with_one_request(console, get_args):
+    for exclusion in linux_exclusions(3):
+        console.add_exclusion(exclusion['os_path'], "linux")
+    console.add_exclusion("/unmanaged1/", "linux")
+    console.add_exclusion("C:\\Unmanaged\\", "windows")
+    console.add_exclusion("/other/group/", "linux", group_name="MariaDB")
+
+    result = run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=linux_exclusions(3), exclusive=True))
+
+    assert result['changed']
+    deletes = console.writes("DELETE")
+    assert len(deletes) == 1
+    assert len(deletes[0][2]['data']['ids']) == 2
+    assert sorted(exclusion['value'] for exclusion in console.exclusions) == sorted(
+        [exclusion['os_path'] for exclusion in linux_exclusions(3)] + ["/other/group/"])
+    second_run = run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=linux_exclusions(3), exclusive=True))
+    assert not second_run['changed']
+
+
+def test_exclusive_keeps_unmanaged_exclusions_when_a_create_fails(console, get_args):
+    console.add_exclusion("/unmanaged1/", "linux")
+
+    def failing_api_call(module, api_endpoint, http_method="get", **kwargs):
+        if http_method.upper() == "POST" and kwargs['body']['data']['value'] == "/opt/app1/":
+            module.fail_json(msg="Failed to create exclusion /opt/app1/.")
+        return console.api_call(module, api_endpoint, http_method, **kwargs)
+
+    with mock.patch.object(SentineloneBase, 'api_call', side_effect=failing_api_call):
+        with pytest.raises(AnsibleFailJson, match="1 of 3 API calls failed") as err:
+            run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=linux_exclusions(3), exclusive=True))
+
+    # The successful creates are reported with the error
+    result = err.value.args[0]
+    assert result['changed']
+    assert [diff['os_path'] for diff in result['original_message']] == ["/opt/app0/", "/opt/app2/"]
+    assert result['message'][-1] == "Unmanaged exclusions are not deleted because requests failed."
+    assert not console.writes("DELETE")
+    assert sorted(exclusion['value'] for exclusion in console.exclusions) == ["/opt/app0/", "/opt/app2/",
+                                                                              "/unmanaged1/"]
+
+
+def test_resume_skips_journaled_creates_per_group_and_deletes(console, tmp_path, get_args):
+    unmanaged_exclusion = console.add_exclusion("/unmanaged/", "linux", group_name="MariaDB")
+    args = get_args(exclusions=linux_exclusions(1), groups=["MariaDB", "MaxDB"], exclusive=True,
+                    journal=str(tmp_path / "bulk.journal"), resume=True)
+    # The first run is killed before the journal is removed
+    with mock.patch.object(SentineloneJournal, 'complete'):
+        run_module(sentinelone_path_exclusions_bulk, args)
+    assert len(console.writes("POST")) == 1 and len(console.writes("DELETE")) == 1
+
+    # The exclusion was only created in one of the groups and the unmanaged exclusion is listed again
+    console.exclusions = [unmanaged_exclusion] + [exclusion for exclusion in console.exclusions
+                                                  if exclusion['scope'] == {"groupIds": [console.group_id("MaxDB")]}]
+    assert len(console.exclusions) == 2
+    console.calls = []
+    result = run_module(sentinelone_path_exclusions_bulk, args)
+
+    assert not console.writes()
+    assert not result['changed']
+
+
+def test_without_exclusive_unmanaged_exclusions_are_kept(console, get_args):
+    console.add_exclusion("/unmanaged1/", "linux")
+
+    run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=linux_exclusions(1)))
+
+    assert not console.writes("DELETE")
+
+
+def test_exclusive_with_state_absent_fails(console, get_args):
+    console.add_exclusion("/unmanaged1/", "linux")
+
+    with pytest.raises(AnsibleFailJson, match="exclusive can not be used with state absent"):
+        run_module(sentinelone_path_exclusions_bulk, get_args(exclusions=linux_exclusions(1), state="absent",
+                                                              exclusive=True))
+
+    assert not console.calls
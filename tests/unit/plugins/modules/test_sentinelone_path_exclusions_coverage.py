@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_path_exclusions_coverage
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import run_module
+
+
+def redundant_paths(result):
+    return sorted(exclusion['os_path'] for exclusion in result['original_message'])
+
+
+@pytest.mark.parametrize("broad, exclusion, covered", [
+    # subfolders covers everything below the folder
+    (("C:\\App\\", "subfolders"), ("C:\\App\\bin\\app.exe", "file"), True),
+    (("C:\\App\\", "subfolders"), ("c:/app/bin/", "subfolders"), True),
+    (("C:\\App\\", "subfolders"), ("C:\\App\\", "folder"), True),
+    (("C:\\App\\", "subfolders"), ("C:\\App", "file"), False),
+    (("C:\\App\\", "subfolders"), ("C:\\Application\\app.exe", "file"), False),
+    # folder only covers the files directly in the folder
+    (("C:\\App\\", "folder"), ("C:\\App\\app.exe", "file"), True),
+    (("C:\\App\\", "folder"), ("C:\\App\\*.log", "file"), True),
+    (("C:\\App\\", "folder"), ("C:\\App\\bin\\app.exe", "file"), False),
+    (("C:\\App\\", "folder"), ("C:\\App\\bin\\", "folder"), False),
+    # The folder exclusion is covered by the subfolders exclusion and not the other way round
+    (("C:\\App\\", "folder"), ("C:\\App\\", "subfolders"), False),
+    (("C:\\App\\*\\", "subfolders"), ("C:\\App\\*\\app.exe", "file"), False),
+    (("/opt/", "subfolders"), ("/opt/app/run.sh", "file"), True),
+    (("/", "subfolders"), ("/opt/app/run.sh", "file"), True),
+    (("/Opt/", "subfolders"), ("/opt/app/run.sh", "file"), False),
+])
+def test_path_coverage(console, broad, exclusion, covered, get_args):
+    os_type = "linux" if broad[0].startswith("/") else "windows"
+    console.add_exclusion(broad[0], os_type, pathExclusionType=broad[1])
+    exclusion_id = console.add_exclusion(exclusion[0], os_type, pathExclusionType=exclusion[1])['id']
+
+    result = run_module(sentinelone_path_exclusions_coverage, get_args())
+
+    redundant_ids = [redundant['exclusion_id'] for redundant in result['original_message']]
+    assert (exclusion_id in redundant_ids) == covered
+    assert not result['changed']
+
+
+@pytest.mark.parametrize("broad_settings, settings, covered", [
+    (dict(mode="disable_all_monitors_deep"), dict(mode="disable_all_monitors"), True),
+    (dict(mode="disable_all_monitors"), dict(mode="disable_all_monitors_deep"), False),
+    (dict(mode="suppress"), dict(mode="disable_all_monitors"), False),
+    (dict(actions=["detect", "upload"]), dict(actions=["detect"]), True),
+    (dict(actions=["detect"]), dict(actions=["detect", "upload"]), False),
+    # Exclusions without mode can not be compared
+    (dict(mode=None), dict(), False),
+    (dict(), dict(mode=None), False),
+    (dict(actions=None), dict(actions=["detect"]), False),
+    (dict(), dict(actions=None), True),
+])
+def test_settings_coverage(console, broad_settings, settings, covered, get_args):
+    console.add_exclusion("C:\\App\\", "windows", pathExclusionType="subfolders", **broad_settings)
+    console.add_exclusion("C:\\App\\app.exe", "windows", **settings)
+
+    result = run_module(sentinelone_path_exclusions_coverage, get_args())
+
+    assert redundant_paths(result) == (["C:\\App\\app.exe"] if covered else [])
+
+
+def test_only_first_of_identical_exclusions_is_kept(console, get_args):
+    first = console.add_exclusion("C:\\App\\", "windows", pathExclusionType="subfolders")
+    console.add_exclusion("c:\\app\\", "windows", pathExclusionType="subfolders")
+
+    result = run_module(sentinelone_path_exclusions_coverage, get_args())
+
+    assert redundant_paths(result) == ["c:\\app\\"]
+    assert result['original_message'][0]['covered_by']['exclusion_id'] == first['id']
+
+
+def test_other_scopes_and_os_do_not_cover(console, get_args):
+    console.add_exclusion("/opt/", "linux", group_name="MariaDB", pathExclusionType="subfolders")
+    console.add_exclusion("/opt/app", "linux", group_name="MaxDB")
+    console.add_exclusion("/opt/app2", "windows", group_name="MariaDB")
+
+    result = run_module(sentinelone_path_exclusions_coverage, get_args(groups=["MariaDB", "MaxDB"]))
+
+    assert not result['original_message']
+
+
+def test_removes_redundant_exclusions_with_one_request(console, get_args):
+    console.add_exclusion("C:\\App\\", "windows", group_name="MariaDB", pathExclusionType="subfolders")
+    console.add_exclusion("C:\\App\\bin\\", "windows", group_name="MariaDB", pathExclusionType="folder")
+    console.add_exclusion("C:\\App\\bin\\app.exe", "windows", group_name="MariaDB")
+    console.add_exclusion("C:\\Other\\", "windows", group_name="MariaDB")
+
+    result = run_module(sentinelone_path_exclusions_coverage, get_args(groups=["MariaDB"], remove_redundant=True))
+
+    assert result['changed']
+    assert len(console.writes("DELETE")) == 1
+    assert sorted(exclusion['value'] for exclusion in console.exclusions) == ["C:\\App\\", "C:\\Other\\"]
+    assert not run_module(sentinelone_path_exclusions_coverage,
+                          get_args(groups=["MariaDB"], remove_redundant=True))['changed']
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import json
+
+from unittest import mock
+
+import pytest
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_path_exclusions_import
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+
+def write_jsonl(path, records):
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n")
+    return path
+
+
+def records(count: int):
+    return [{"os_path": f"/opt/app{index}/", "os_type": "linux", "mode": "performance_focus"} for index in range(count)]
+
+
+def test_imports_jsonl_in_chunks(console, tmp_path, get_args):
+    src = write_jsonl(tmp_path / "exclusions.json", records(1200))
+
+    result = run_module(sentinelone_path_exclusions_import, get_args(src=src, chunk_size=500))
+
+    assert result['changed']
+    assert [chunk['records'] for chunk in result['original_message']] == [500, 500, 200]
+    assert result['original_message'][0]['lines'] == "1-500"
+    assert len(console.exclusions) == 1200
+    second_run = run_module(sentinelone_path_exclusions_import, get_args(src=src, chunk_size=500))
+    assert not second_run['changed']
+    assert second_run['message'][-1] == "Imported 1200 records: 0 created, 0 updated, 1200 unchanged, " \
+                                        "0 duplicates skipped"
+
+
+def test_imports_csv_with_defaults_and_updates_drifted(console, tmp_path, get_args):
+    console.add_exclusion("C:\\App\\", "windows", group_name="MariaDB", mode="suppress")
+    src = tmp_path / "exclusions.csv"
+    src.write_text("os_path,os_type,mode,include_subfolders,description\n"
+                   "C:\\App\\,windows,performance_focus,,\n"
+                   "c:/app/,windows,performance_focus,,\n"
+                   "/opt/,linux,suppress_alerts,yes,Application\n")
+
+    result = run_module(sentinelone_path_exclusions_import, get_args(src=src, groups=["MariaDB", "MaxDB"]))
+
+    assert result['original_message'] == [{'chunk': 1, 'lines': "2-4", 'records': 3, 'duplicates': 1,
+                                           'created': 2, 'updated': 0, 'unchanged': 0, 'failed': 0,
+                                           'skipped': False}]
+    assert len(console.exclusions) == 4
+    opt_exclusion = next(exclusion for exclusion in console.exclusions if exclusion['value'] == "/opt/")
+    assert opt_exclusion['pathExclusionType'] == "subfolders"
+    assert opt_exclusion['description'] == "Application"
+
+
+def test_invalid_records_fail_before_any_change(console, tmp_path, get_args):
+    src = tmp_path / "exclusions.json"
+    src.write_text(json.dumps(records(1)[0]) + "\n"
+                   "no json\n" +
+                   json.dumps({"os_path": "/opt/", "os_type": "linux", "mode": "interoperability"}) + "\n" +
+                   json.dumps({"os_path": "/opt/", "os_type": "macos", "mode": "suppress_alerts"}) + "\n")
+
+    with pytest.raises(AnsibleFailJson) as err:
+        run_module(sentinelone_path_exclusions_import, get_args(src=src))
+
+    message = err.value.args[0]['msg']
+    assert "line 2: No valid JSON object" in message
+    assert "line 3: The mode interoperability is not compatible with os linux" in message
+    assert "line 4: " in message and "line 1:" not in message
+    assert not console.writes()
+
+
+def test_invalid_records_fail_again_with_resume(console, tmp_path, get_args):
+    src = write_jsonl(tmp_path / "exclusions.json", records(2) + [{"os_path": "/opt/", "os_type": "linux"}])
+    journal = tmp_path / "import.journal"
+    args = get_args(src=src, journal=str(journal), resume=True)
+
+    for dummy in range(2):
+        with pytest.raises(AnsibleFailJson) as err:
+            run_module(sentinelone_path_exclusions_import, args)
+
+        assert "line 3: missing required arguments: mode" in err.value.args[0]['msg']
+        assert not journal.exists()
+    assert not console.writes()
+
+
+def test_resume_skips_completed_chunks(console, tmp_path, get_args):
+    src = write_jsonl(tmp_path / "exclusions.json", records(30))
+    journal = tmp_path / "import.journal"
+    args = get_args(src=src, chunk_size=10, parallel_requests=1, journal=str(journal), resume=True)
+    posts = []
+
+    def failing_api_call(module, api_endpoint, http_method="get", **kwargs):
+        if http_method.upper() == "POST":
+            posts.append(api_endpoint)
+            if len(posts) == 15:
+                module.fail_json(msg="Status code: 503")
+        return console.api_call(module, api_endpoint, http_method, **kwargs)
+
+    with mock.patch.object(SentineloneBase, 'api_call', side_effect=failing_api_call):
+        with pytest.raises(AnsibleFailJson) as err:
+            run_module(sentinelone_path_exclusions_import, args)
+    assert "1 of 10 API calls failed" in err.value.args[0]['msg']
+    assert len(console.exclusions) == 19
+    assert journal.exists()
+
+    console.calls = []
+    result = run_module(sentinelone_path_exclusions_import, args)
+
+    assert [chunk['skipped'] for chunk in result['original_message']] == [True, False, False]
+    assert [chunk['created'] for chunk in result['original_message']] == [0, 1, 10]
+    assert result['message'][0] == "Chunk 1 (lines 1-10): already imported, skipped"
+    assert len(console.writes("POST")) == 11
+    assert len(console.exclusions) == 30
+    assert not journal.exists()
+
+
+def test_journal_of_other_run_is_not_resumed(console, tmp_path, get_args):
+    src = write_jsonl(tmp_path / "exclusions.json", records(5))
+    journal = tmp_path / "import.journal"
+    journal.write_text(json.dumps({"run_id": "other"}) + "\n" + json.dumps({"key": "chunk:1"}) + "\n")
+
+    with mock.patch.object(AnsibleModule, 'warn') as warn:
+        result = run_module(sentinelone_path_exclusions_import,
+                            get_args(src=src, journal=str(journal), resume=True))
+
+    assert result['original_message'][0]['created'] == 5
+    assert "belongs to a run with other options" in warn.call_args[0][0]
+    assert not journal.exists()
+
+
+def test_counts_updated_records(console, tmp_path, get_args):
+    for group_name in ["MariaDB", "MaxDB"]:
+        console.add_exclusion("/opt/app0/", "linux", group_name=group_name, mode="suppress")
+    src = write_jsonl(tmp_path / "exclusions.jsonl", records(3))
+
+    result = run_module(sentinelone_path_exclusions_import, get_args(src=src, groups=["MariaDB", "MaxDB"]))
+
+    assert len(console.writes("PUT")) == 2
+    chunk = result['original_message'][0]
+    assert (chunk['created'], chunk['updated'], chunk['unchanged']) == (2, 1, 0)
+
+
+def test_failed_requests_report_the_imported_chunks(console, tmp_path, get_args):
+    def failing_api_call(module, api_endpoint, http_method="get", **kwargs):
+        if http_method.upper() == "POST" and kwargs['body']['data']['value'] == "/opt/app12/":
+            module.fail_json(msg="Failed to create exclusions. Status code: 500")
+        return console.api_call(module, api_endpoint, http_method, **kwargs)
+
+    src = write_jsonl(tmp_path / "exclusions.jsonl", records(15))
+    with mock.patch.object(SentineloneBase, 'api_call', side_effect=failing_api_call):
+        with pytest.raises(AnsibleFailJson) as err:
+            run_module(sentinelone_path_exclusions_import, get_args(src=src, chunk_size=10))
+
+    result = err.value.args[0]
+    assert result['msg'] == "1 of 5 API calls failed. Errors: Failed to create exclusions. Status code: 500"
+    assert result['changed']
+    assert [(chunk['created'], chunk['failed']) for chunk in result['original_message']] == [(10, 0), (4, 1)]
+    assert result['message'][-1] == "Import failed after 15 records: 14 created, 0 updated, 0 unchanged, " \
+                                    "0 duplicates skipped, 1 failed"
+    assert len(console.exclusions) == 14
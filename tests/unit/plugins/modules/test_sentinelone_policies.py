@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from unittest import mock
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_policies
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+GROUP_NAMES = [f"Group{index}" for index in range(12)]
+
+
+@pytest.fixture
+def group_names():
+    return GROUP_NAMES
+
+
+@pytest.fixture
+def module_args():
+    return dict(site_name="test", groups=GROUP_NAMES)
+
+
+def test_updates_changed_group_policies_in_group_order(console, get_args):
+    for group_name in GROUP_NAMES[::3]:
+        console.set_policy(group_name, mitigationMode="detect")
+
+    result = run_module(sentinelone_policies, get_args(policy={"mitigationMode": "detect"}, parallel_requests=4))
+
+    changed_groups = [group_name for group_name in GROUP_NAMES if group_name not in GROUP_NAMES[::3]]
+    assert result['message'] == [f"Updating policy for group {group_name}" for group_name in changed_groups]
+    assert [diff['groupId'] for diff in result['original_message']] == [
+        console.group_id(group_name) for group_name in changed_groups]
+    assert all(console.get_policy(console.group_id(group_name))['mitigationMode'] == "detect"
+               for group_name in GROUP_NAMES)
+    # Only the changed settings are sent
+    assert all(call[2] == {"data": {"mitigationMode": "detect"}} for call in console.writes("PUT"))
+
+
+def test_failed_updates_are_reported_together(console, get_args):
+    failing_group_ids = [console.group_id("Group2"), console.group_id("Group7")]
+
+    def failing_api_call(module, api_endpoint, http_method="get", **kwargs):
+        if http_method.upper() == "PUT" and any(f"/{group_id}/" in api_endpoint for group_id in failing_group_ids):
+            module.fail_json(msg=f"Failed to update policy with site or group id {api_endpoint.split('/')[-2]}.")
+        return console.api_call(module, api_endpoint, http_method, **kwargs)
+
+    with mock.patch.object(SentineloneBase, 'api_call', side_effect=failing_api_call):
+        with pytest.raises(AnsibleFailJson) as err:
+            run_module(sentinelone_policies, get_args(policy={"mitigationMode": "detect"}))
+
+    result = err.value.args[0]
+    assert result['msg'].startswith("2 of 12 API calls failed.")
+    assert all(group_id in result['msg'] for group_id in failing_group_ids)
+    assert console.get_policy(console.group_id("Group11"))['mitigationMode'] == "detect"
+    # The groups which were updated are reported
+    updated_groups = [group_name for group_name in GROUP_NAMES if group_name not in ("Group2", "Group7")]
+    assert result['changed']
+    assert result['message'] == [f"Updating policy for group {group_name}" for group_name in updated_groups]
+    assert [diff['groupId'] for diff in result['original_message']] == [
+        console.group_id(group_name) for group_name in updated_groups]
+
+
+def test_resume_skips_the_groups_updated_in_the_failed_run(console, tmp_path, get_args):
+    journal = tmp_path / "policies.journal"
+    args = get_args(policy={"mitigationMode": "detect"}, journal=str(journal), resume=True)
+    failing_group_id = console.group_id("Group2")
+
+    def failing_api_call(module, api_endpoint, http_method="get", **kwargs):
+        if http_method.upper() == "PUT" and f"/{failing_group_id}/" in api_endpoint:
+            module.fail_json(msg=f"Failed to update policy with site or group id {failing_group_id}.")
+        return console.api_call(module, api_endpoint, http_method, **kwargs)
+
+    with mock.patch.object(SentineloneBase, 'api_call', side_effect=failing_api_call):
+        with pytest.raises(AnsibleFailJson):
+            run_module(sentinelone_policies, args)
+    assert journal.exists()
+
+    console.calls = []
+    result = run_module(sentinelone_policies, args)
+
+    assert result['message'] == ["Updating policy for group Group2"]
+    # Only the policy of the failed group is read and updated again
+    assert [call[:2] for call in console.calls if call[1].endswith("/policy")] == [
+        ("GET", f"/web/api/v2.1/groups/{failing_group_id}/policy"),
+        ("PUT", f"/web/api/v2.1/groups/{failing_group_id}/policy")]
+    assert not journal.exists()
+
+
+def test_inherit_reverts_only_groups_with_own_policy(console, get_args):
+    console.set_policy("Group3", mitigationMode="detect")
+
+    result = run_module(sentinelone_policies, get_args(inherit=True))
+
+    assert result['message'] == ["Enable inheritance from site scope in group Group3"]
+    assert console.get_policy(console.group_id("Group3"))['inheritedFrom'] == "site"
+
+
+def test_inherit_uses_group_listing_and_reports_one_summary(console, get_args):
+    for group_name in GROUP_NAMES[:5]:
+        console.set_policy(group_name, mitigationMode="detect")
+
+    result = run_module(sentinelone_policies, get_args(inherit=True))
+
+    assert result['message'] == ["Enable inheritance from site scope in 5 groups: Group0, Group1, Group2, Group3, "
+                                 "Group4"]
+    assert [diff['groupId'] for diff in result['original_message']] == [
+        console.group_id(group_name) for group_name in GROUP_NAMES[:5]]
+    # The inherits flag of the group listing is used instead of reading every policy
+    assert not [call for call in console.calls if call[0] == "GET" and call[1].endswith("/policy")]
+    assert len(console.writes("PUT")) == 5
+    assert all(console.get_policy(console.group_id(group_name))['inheritedFrom'] == "site"
+               for group_name in GROUP_NAMES)
+
+
+def test_inherit_reads_policy_if_listing_has_no_flag(console, get_args):
+    console.set_policy("Group1", mitigationMode="detect")
+    for group in console.groups:
+        del group['inherits']
+
+    result = run_module(sentinelone_policies, get_args(inherit=True))
+
+    assert result['message'] == ["Enable inheritance from site scope in group Group1"]
+    assert len([call for call in console.calls if call[0] == "GET" and call[1].endswith("/policy")]) == 12
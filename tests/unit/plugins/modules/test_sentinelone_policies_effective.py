@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_policies_effective
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.fake_console import SITE_ID
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+GROUP_NAMES = ["Inheriting", "Redundant", "Override"]
+
+
+@pytest.fixture
+def group_names():
+    return GROUP_NAMES
+
+
+@pytest.fixture
+def console(console):
+    console.set_policy("Redundant")
+    console.set_policy("Override", mitigationMode="detect")
+    return console
+
+
+def test_resolves_effective_settings_without_reading_inheriting_groups(console, get_args):
+    result = run_module(sentinelone_policies_effective, get_args(settings=["mitigationMode", "agentUi.agentUiOn",
+                                                                           "missing.key"]))
+
+    assert not result['changed']
+    site, inheriting, redundant, override = result['original_message']
+    assert site['siteId'] == SITE_ID and site['inheritedFrom'] == "account" and not site['redundant']
+    assert inheriting == {'groupId': console.group_id("Inheriting"), 'groupName': "Inheriting",
+                          'inheritedFrom': "site", 'redundant': False,
+                          'settings': {"mitigationMode": "protect", "agentUi.agentUiOn": True, "missing.key": None}}
+    assert redundant['redundant'] and redundant['inheritedFrom'] is None
+    assert override['settings']['mitigationMode'] == "detect" and not override['redundant']
+    assert result['message'] == ["Group Redundant overrides the site policy with identical settings. "
+                                 "Policy can be reverted to inheritance."]
+    policy_reads = [call[1] for call in console.calls if call[1].endswith("/policy")]
+    assert f"/groups/{console.group_id('Inheriting')}/policy" not in " ".join(policy_reads)
+    assert len(policy_reads) == 3
+
+
+def test_reverts_redundant_overrides(console, get_args):
+    console.policies[SITE_ID]['inheritedFrom'] = None
+
+    result = run_module(sentinelone_policies_effective, get_args(groups=["Redundant", "Override"],
+                                                                 revert_redundant=True))
+
+    assert result['changed']
+    assert len(result['message']) == 2
+    assert SITE_ID not in console.policies
+    assert console.group_id("Redundant") not in console.policies
+    assert console.get_policy(console.group_id("Override"))['mitigationMode'] == "detect"
+    # The complete policy is returned without the metadata
+    assert 'inheritedFrom' not in result['original_message'][1]['settings']
+
+
+def test_values_of_other_types_are_not_redundant(console, get_args):
+    console.policies[SITE_ID]['scanTimeout'] = 1
+    console.policies[console.group_id("Redundant")]['scanTimeout'] = True
+
+    result = run_module(sentinelone_policies_effective, get_args(groups=["Redundant"]))
+
+    assert not result['original_message'][1]['redundant']
+    assert result['message'] == ["No redundant policy overrides found"]
+
+
+def test_missing_groups_fail(console, get_args):
+    with pytest.raises(AnsibleFailJson) as err:
+        run_module(sentinelone_policies_effective, get_args(groups=["Redundant", "Missing"]))
+
+    assert err.value.args[0]['msg'] == "Groups not found: Missing"
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from unittest import mock
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_policies
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+SITE_NAMES = [f"site{index}" for index in range(15)]
+
+
+@pytest.fixture
+def group_names():
+    return []
+
+
+@pytest.fixture
+def console(console):
+    for site_name in SITE_NAMES:
+        console.add_site(site_name)
+    console.add_site("expired", state="expired")
+    return console
+
+
+@pytest.fixture
+def module_args():
+    return dict(policy={"mitigationMode": "detect"})
+
+
+def site_policy(console, site_name):
+    return console.get_policy(next(site['id'] for site in console.sites if site['name'] == site_name))
+
+
+def test_sites_are_updated_with_one_listing_and_one_comparison(console, get_args):
+    with mock.patch.object(sentinelone_policies.SentinelonePolicies, 'merge_compare',
+                           autospec=True, side_effect=SentineloneBase.merge_compare) as merge_compare:
+        result = run_module(sentinelone_policies, get_args(sites=SITE_NAMES[:10], parallel_requests=4))
+
+    assert result['message'] == [f"Updating policy for site {site_name}" for site_name in SITE_NAMES[:10]]
+    assert [diff['siteId'] for diff in result['original_message']] == [
+        next(site['id'] for site in console.sites if site['name'] == site_name) for site_name in SITE_NAMES[:10]]
+    assert all(site_policy(console, site_name)['mitigationMode'] == "detect" for site_name in SITE_NAMES[:10])
+    assert site_policy(console, "site10")['mitigationMode'] == "protect"
+    # All sites have the same policy
+    assert merge_compare.call_count == 1
+    site_listings = [call for call in console.calls if call[0] == "GET" and call[1].endswith("/sites")]
+    assert len(site_listings) == 1
+
+
+def test_policies_which_only_differ_in_metadata_are_compared_once(console, get_args):
+    for index, site_name in enumerate(SITE_NAMES[:5]):
+        site_policy(console, site_name).update(id=f"policy{index}", updatedAt=f"2024-01-0{index + 1}T00:00:00Z")
+
+    with mock.patch.object(sentinelone_policies.SentinelonePolicies, 'merge_compare',
+                           autospec=True, side_effect=SentineloneBase.merge_compare) as merge_compare:
+        result = run_module(sentinelone_policies, get_args(sites=SITE_NAMES[:5]))
+
+    assert len(result['message']) == 5
+    assert merge_compare.call_count == 1
+
+
+def test_all_sites_skips_inactive_and_unchanged_sites(console, get_args):
+    site_policy(console, "site3")['mitigationMode'] = "detect"
+
+    result = run_module(sentinelone_policies, get_args(all_sites=True))
+
+    assert len(result['message']) == len(SITE_NAMES)
+    assert "Updating policy for site site3" not in result['message']
+    assert "Updating policy for site expired" not in result['message']
+    assert site_policy(console, "expired")['mitigationMode'] == "protect"
+
+
+def test_missing_sites_fail_before_any_change(console, get_args):
+    with pytest.raises(AnsibleFailJson) as err:
+        run_module(sentinelone_policies, get_args(sites=["site1", "missing", "expired"]))
+
+    assert err.value.args[0]['msg'] == "Sites not found: missing, expired"
+    assert not console.writes()
+
+
+@pytest.mark.parametrize('args', [
+    dict(site_name="test", all_sites=True),
+    dict(),
+    dict(sites=["site1"], groups=["group"]),
+])
+def test_site_options_are_checked(console, args, get_args):
+    with pytest.raises(AnsibleFailJson):
+        run_module(sentinelone_policies, get_args(**args))
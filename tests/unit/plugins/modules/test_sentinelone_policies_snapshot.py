@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import gzip
+import json
+
+from unittest import mock
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_policies_snapshot
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+
+@pytest.fixture
+def group_names():
+    return ["Group1", "Group2", "Group3"]
+
+
+@pytest.fixture
+def console(console):
+    console.set_policy("Group1", mitigationMode="detect")
+    console.set_policy("Group2", mitigationMode="detect")
+    other_site = console.add_site("other")
+    console.add_group("Group1", siteId=other_site['id'])
+    return console
+
+
+@pytest.fixture
+def module_args():
+    return {}
+
+
+def policy_reads(console):
+    return [call for call in console.calls if call[0] == "GET" and call[1].endswith("/policy")]
+
+
+def test_export_stores_identical_policies_once(console, tmp_path, get_args):
+    path = tmp_path / "policies.json.gz"
+
+    result = run_module(sentinelone_policies_snapshot, get_args(path=path))
+
+    assert result['changed']
+    assert result['original_message'] == [{'sites': 2, 'groups': 4, 'documents': 1, 'changes': "Snapshot written"}]
+    with gzip.open(path, 'rt') as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    group1, group2, group3 = [scope for scope in snapshot['scopes'] if scope['siteName'] == "test"][1:]
+    assert group1['fingerprint'] == group2['fingerprint']
+    assert group3['inherits'] and group3['fingerprint'] is None
+    assert snapshot['documents'][group1['fingerprint']]['mitigationMode'] == "detect"
+    # Two sites and the two groups with own policy
+    assert len(policy_reads(console)) == 4
+
+    second_run = run_module(sentinelone_policies_snapshot, get_args(path=path))
+    assert not second_run['changed']
+    assert second_run['message'] == [f"Snapshot {path} is up-to-date"]
+
+
+def test_restore_writes_only_changed_scopes(console, tmp_path, get_args):
+    path = tmp_path / "policies.json.gz"
+    run_module(sentinelone_policies_snapshot, get_args(path=path))
+    console.policies[console.group_id("Group1")]['mitigationMode'] = "protect"
+    console.handle_revert_policy("PUT", {}, {}, console.group_id("Group2"))
+    console.set_policy("Group3")
+    console.calls = []
+
+    result = run_module(sentinelone_policies_snapshot, get_args(path=path, action="restore", sites=["test"]))
+
+    assert result['message'] == [
+        "Policy of group Group1 in site test differs from the snapshot. Restoring policy.",
+        "Policy of group Group2 in site test differs from the snapshot. Restoring policy.",
+        "Policy of group Group3 in site test is inherited in the snapshot. Enabling inheritance.",
+    ]
+    assert len(console.writes("PUT")) == 3
+    assert all(console.get_policy(console.group_id(group_name))['mitigationMode'] == "detect"
+               for group_name in ["Group1", "Group2"])
+    assert console.get_policy(console.group_id("Group3"))['inheritedFrom'] == "site"
+
+    second_run = run_module(sentinelone_policies_snapshot, get_args(path=path, action="restore"))
+    assert not second_run['changed']
+
+
+def test_restore_fails_without_snapshot(console, tmp_path, get_args):
+    with pytest.raises(AnsibleFailJson) as err:
+        run_module(sentinelone_policies_snapshot, get_args(path=tmp_path / "missing.json.gz", action="restore"))
+
+    assert "does not exist" in err.value.args[0]['msg']
+
+
+def test_failed_restores_report_the_restored_scopes(console, tmp_path, get_args):
+    path = tmp_path / "policies.json.gz"
+    run_module(sentinelone_policies_snapshot, get_args(path=path))
+    console.handle_revert_policy("PUT", {}, {}, console.group_id("Group1"))
+    console.handle_revert_policy("PUT", {}, {}, console.group_id("Group2"))
+    failing_group_id = console.group_id("Group1")
+
+    def failing_api_call(module, api_endpoint, http_method="get", **kwargs):
+        if http_method.upper() == "PUT" and f"/{failing_group_id}/" in api_endpoint:
+            module.fail_json(msg=f"Failed to update policy with group id {failing_group_id}.")
+        return console.api_call(module, api_endpoint, http_method, **kwargs)
+
+    with mock.patch.object(SentineloneBase, 'api_call', side_effect=failing_api_call):
+        with pytest.raises(AnsibleFailJson) as err:
+            run_module(sentinelone_policies_snapshot, get_args(path=path, action="restore", sites=["test"]))
+
+    result = err.value.args[0]
+    assert result['msg'].startswith("1 of 2 API calls failed.")
+    assert result['changed']
+    assert result['original_message'] == [{'siteName': "test", 'groupName': "Group2", 'changes': "Policy restored",
+                                           'fingerprint': result['original_message'][0]['fingerprint']}]
+    assert result['message'] == ["Policy of group Group2 in site test differs from the snapshot. Restoring policy."]
+
+
+@pytest.mark.parametrize("content", [b"not gzip", gzip.compress(b'{"formatVersion": 0}')])
+def test_export_replaces_unreadable_snapshot(console, tmp_path, content, get_args):
+    path = tmp_path / "policies.json.gz"
+    path.write_bytes(content)
+
+    result = run_module(sentinelone_policies_snapshot, get_args(path=path))
+
+    assert result['changed']
+    with gzip.open(path, 'rt') as snapshot_file:
+        assert json.load(snapshot_file)['formatVersion'] == 1
+
+
+def test_failed_write_removes_the_temporary_file(console, tmp_path, get_args):
+    path = tmp_path / "policies.json.gz"
+
+    with mock.patch.object(sentinelone_policies_snapshot.gzip.GzipFile, 'write', side_effect=OSError("disk full")):
+        with pytest.raises(AnsibleFailJson) as err:
+            run_module(sentinelone_policies_snapshot, get_args(path=path))
+
+    assert "disk full" in err.value.args[0]['msg']
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from unittest import mock
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_upgrade_policies
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+GROUP_NAMES = [f"Group{index}" for index in range(10)]
+
+
+@pytest.fixture
+def group_names():
+    return GROUP_NAMES
+
+
+@pytest.fixture
+def module_args():
+    return dict(site_name="test", groups=GROUP_NAMES, inherit_maintenance_windows=True,
+                max_concurrent_downloads=10)
+
+
+def test_groups_with_identical_drift_are_updated_with_one_request(console, get_args):
+    result = run_module(sentinelone_upgrade_policies, get_args())
+
+    group_ids = [console.group_id(group_name) for group_name in GROUP_NAMES]
+    assert result['changed']
+    assert result['message'] == [f"Updating upgrade policy for group {group_name}" for group_name in GROUP_NAMES]
+    assert [diff['groupId'] for diff in result['original_message']] == group_ids
+    puts = console.writes("PUT")
+    assert len(puts) == 1
+    assert puts[0][2]['filter'] == {'taskType': 'agents_upgrade', 'groupIds': group_ids}
+    assert all(console.get_upgrade_policy(group_id)['maxConcurrent'] == 10 for group_id in group_ids)
+
+    result = run_module(sentinelone_upgrade_policies, get_args())
+
+    assert not result['changed']
+    assert len(console.writes("PUT")) == 1
+
+
+def test_update_requests_are_split_by_max_filter_ids(console, get_args):
+    with mock.patch.object(sentinelone_upgrade_policies.SentineloneUpgradePolicies, 'max_filter_ids', 4):
+        run_module(sentinelone_upgrade_policies, get_args())
+
+    assert [len(call[2]['filter']['groupIds']) for call in console.writes("PUT")] == [4, 4, 2]
+
+
+def test_groups_in_desired_state_are_left_out_of_the_update_request(console, get_args):
+    for group_name in GROUP_NAMES[:2]:
+        console.upgrade_policies[console.group_id(group_name)] = {
+            "inheritParentConcurrencyConfig": False, "inheritParentMaintenanceConfig": True, "maxConcurrent": 10,
+            "timezoneGmt": "GMT+00:00", "maintenanceWindowsByDay": {}}
+
+    result = run_module(sentinelone_upgrade_policies, get_args())
+
+    assert result['message'] == [f"Updating upgrade policy for group {group_name}" for group_name in GROUP_NAMES[2:]]
+    puts = console.writes("PUT")
+    assert len(puts) == 1
+    assert puts[0][2]['filter']['groupIds'] == [console.group_id(group_name) for group_name in GROUP_NAMES[2:]]
+
+
+def test_site_update_uses_site_filter(console, get_args):
+    result = run_module(sentinelone_upgrade_policies, get_args(groups=[]))
+
+    assert result['message'] == ["Updating upgrade policy for site test"]
+    assert console.writes("PUT")[0][2]['filter'] == {'taskType': 'agents_upgrade', 'siteIds': ["2000"]}
+
+
+def test_upgrade_policies_are_read_in_parallel_and_checked_before_any_update(console, get_args):
+    console.upgrade_policies["2000"]['maxConcurrent'] = 5
+
+    with mock.patch.object(SentineloneBase, 'run_parallel', autospec=True,
+                           side_effect=SentineloneBase.run_parallel) as run_parallel:
+        with pytest.raises(AnsibleFailJson) as err:
+            run_module(sentinelone_upgrade_policies, get_args(parallel_requests=4))
+
+    assert "Please use a value lower than or equal to 5" in err.value.args[0]['msg']
+    assert run_parallel.call_count == 1
+    assert len(run_parallel.call_args[0][3]) == len(GROUP_NAMES)
+    assert not console.writes()
+
+
+def test_failed_reads_are_reported_together(console, get_args):
+    failing_group_ids = [console.group_id("Group1"), console.group_id("Group6")]
+
+    def failing_api_call(module, api_endpoint, http_method="get", **kwargs):
+        if any(api_endpoint.endswith(f"groupIds={group_id}") for group_id in failing_group_ids):
+            module.fail_json(msg=f"Failed to get current upgrade policy for group with id {api_endpoint[-4:]}.")
+        return console.api_call(module, api_endpoint, http_method, **kwargs)
+
+    with mock.patch.object(SentineloneBase, 'api_call', side_effect=failing_api_call):
+        with pytest.raises(AnsibleFailJson) as err:
+            run_module(sentinelone_upgrade_policies, get_args())
+
+    message = err.value.args[0]['msg']
+    assert message.startswith("2 of 10 API calls failed.")
+    assert all(group_id in message for group_id in failing_group_ids)
+    assert not console.writes()
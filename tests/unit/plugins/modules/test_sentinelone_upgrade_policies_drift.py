@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import copy
+from unittest import mock
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.module_utils.sentinelone.sentinelone_base import SentineloneBase
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_upgrade_policies_drift
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.fake_console import SITE_ID
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+GROUP_NAMES = [f"Group{index}" for index in range(6)]
+
+
+@pytest.fixture
+def group_names():
+    return GROUP_NAMES
+
+
+@pytest.fixture
+def module_args():
+    return {}
+
+
+def set_max_concurrent(console, group_name, max_concurrent):
+    upgrade_policy = copy.deepcopy(console.upgrade_policies[SITE_ID])
+    upgrade_policy.update(inheritParentConcurrencyConfig=False, maxConcurrent=max_concurrent)
+    console.upgrade_policies[console.group_id(group_name)] = upgrade_policy
+
+
+def test_scopes_which_differ_from_the_baseline_are_reported(console, get_args):
+    set_max_concurrent(console, "Group1", 10)
+    set_max_concurrent(console, "Group4", 10)
+
+    result = run_module(sentinelone_upgrade_policies_drift, get_args(
+        baseline={"inheritParentConcurrencyConfig": True, "timezoneGmt": "GMT+00:00"}))
+
+    assert not result['changed']
+    assert result['message'] == ["2 of 7 scopes differ from the baseline: test/Group1, test/Group4"]
+    rows = result['original_message']['scopes']
+    assert rows[0] == {"siteName": "test", "fingerprint": rows[0]['fingerprint'], "differs": []}
+    assert [row['differs'] for row in rows[1:]] == [[], ["inheritParentConcurrencyConfig"], [], [],
+                                                    ["inheritParentConcurrencyConfig"], []]
+    # Group1 and Group4 share one upgrade policy, all other scopes the site upgrade policy
+    assert len(result['original_message']['upgradePolicies']) == 2
+    assert rows[2]['fingerprint'] == rows[5]['fingerprint']
+    assert 'parentMaxConcurrent' not in result['original_message']['upgradePolicies'][rows[2]['fingerprint']]
+
+
+def test_all_sites_are_read_in_parallel(console, get_args):
+    site = console.add_site("other")
+    console.add_group("OtherGroup", siteId=site['id'])
+
+    with mock.patch.object(SentineloneBase, 'run_parallel', autospec=True,
+                           side_effect=SentineloneBase.run_parallel) as run_parallel:
+        result = run_module(sentinelone_upgrade_policies_drift, get_args(parallel_requests=3))
+
+    assert result['message'] == ["9 scopes have 1 distinct upgrade policies"]
+    assert [(row['siteName'], row.get('groupName')) for row in result['original_message']['scopes'][-2:]] == [
+        ("other", None), ("other", "OtherGroup")]
+    # Group listings and upgrade policies
+    assert run_parallel.call_count == 2
+    assert len(run_parallel.call_args[0][3]) == 9
+    assert not console.writes()
+
+
+def test_missing_sites_fail(console, get_args):
+    with pytest.raises(AnsibleFailJson) as err:
+        run_module(sentinelone_upgrade_policies_drift, get_args(sites=["test", "missing"]))
+
+    assert err.value.args[0]['msg'] == "Sites not found: missing"
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+# Copyright: (c) 2024, Marco Wester <marco.wester@sva.de>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.sva.sentinelone.plugins.modules import sentinelone_upgrade_schedule
+from ansible_collections.sva.sentinelone.tests.unit.plugins.modules.utils import AnsibleFailJson, run_module
+
+# Monday
+START_TIME = "2024-06-03T00:00:00Z"
+
+
+@pytest.fixture
+def group_names():
+    return ["Berlin", "NewYork", "Mumbai"]
+
+
+@pytest.fixture
+def module_args():
+    return dict(site_name="test", start_time=START_TIME)
+
+
+def set_upgrade_policy(console, group_name, timezone, max_concurrent, agents, **maintenance_hours):
+    group_id = console.group_id(group_name)
+    next(group for group in console.groups if group['id'] == group_id)['totalAgents'] = agents
+    console.upgrade_policies[group_id] = {
+        "inheritParentConcurrencyConfig": False, "inheritParentMaintenanceConfig": False,
+        "maxConcurrent": max_concurrent, "timezoneGmt": f"GMT{timezone}",
+        "maintenanceWindowsByDay": {day: {"isMaintenanceAllDay": False, "maintenanceHours": [
+            {"fromTime": time_from, "toTime": time_to} for time_from, time_to in hours]}
+            for day, hours in maintenance_hours.items()}}
+
+
+def get_group(result, group_name):
+    return next(group for group in result['original_message']['groups'] if group['groupName'] == group_name)
+
+
+def test_windows_are_converted_to_utc(console, get_args):
+    set_upgrade_policy(console, "Berlin", "+02:00", 10, 10, Monday=[("8:00 am", "10:00 am")])
+    # Sunday evening in New York is Monday morning in UTC of the next week
+    set_upgrade_policy(console, "NewYork", "-03:00", 10, 10, Sunday=[("10:00 pm", "11:00 pm")])
+    set_upgrade_policy(console, "Mumbai", "+05:30", 10, 10, Tuesday=[("12:00 am", "1:00 am")])
+
+    result = run_module(sentinelone_upgrade_schedule, get_args())
+
+    assert not result['changed']
+    assert get_group(result, "Berlin")['windowsUtc'] == [{"day": "Monday", "from": "06:00", "to": "08:00"}]
+    assert get_group(result, "NewYork")['windowsUtc'] == [{"day": "Monday", "from": "01:00", "to": "02:00"}]
+    assert get_group(result, "Mumbai")['windowsUtc'] == [{"day": "Monday", "from": "18:30", "to": "19:30"}]
+    assert get_group(result, "Mumbai")['openHoursPerWeek'] == 1.0
+
+
+def test_capacity_is_summed_over_open_windows(console, get_args):
+    set_upgrade_policy(console, "Berlin", "+00:00", 40, 10, Monday=[("6:00 am", "8:00 am")])
+    set_upgrade_policy(console, "NewYork", "+00:00", 20, 10, Monday=[("7:00 am", "9:00 am")])
+    # Windows which are open for a part of an hour count proportionally
+    set_upgrade_policy(console, "Mumbai", "+00:00", 10, 10, Monday=[("7:30 am", "8:30 am")])
+
+    result = run_module(sentinelone_upgrade_schedule, get_args())
+
+    capacity = result['original_message']['capacityPerHour']
+    assert capacity['Monday'][5:10] == [0, 40, 65, 25, 0]
+    assert capacity['Tuesday'] == [0] * 24
+
+
+def test_groups_which_finish_after_the_deadline_are_flagged(console, get_args):
+    # 100 batches of 30 minutes need 50 windows of one hour, one per week
+    set_upgrade_policy(console, "Berlin", "+00:00", 10, 1000, Monday=[("1:00 am", "2:00 am")])
+    # Without maintenance windows the upgrade can run at any time
+    set_upgrade_policy(console, "NewYork", "+00:00", 50, 100)
+    set_upgrade_policy(console, "Mumbai", "+00:00", 0, 10)
+
+    result = run_module(sentinelone_upgrade_schedule, get_args(deadline_hours=72))
+
+    assert get_group(result, "NewYork")['finishesAt'] == "2024-06-03T01:00:00Z"
+    assert not get_group(result, "NewYork")['late']
+    assert get_group(result, "Berlin")['late']
+    assert get_group(result, "Mumbai")['finishesAt'] is None
+    assert result['original_message']['finishesAt'] is None
+    assert result['message'] == [
+        "Upgrade of group Berlin finishes at 2025-05-12T02:00:00Z after the deadline 2024-06-06T00:00:00Z",
+        "Upgrade of group Mumbai never finishes because it has no maintenance window or its maximum concurrent "
+        "downloads is 0"]
+
+
+def test_upgrade_continues_in_the_next_window(console, get_args):
+    set_upgrade_policy(console, "Berlin", "+00:00", 10, 30, Monday=[("1:00 am", "2:00 am")],
+                       Wednesday=[("1:00 am", "2:00 am")])
+
+    result = run_module(sentinelone_upgrade_schedule, get_args(groups=["Berlin"], start_time="2024-06-03T01:30:00Z"))
+
+    # 3 batches of 30 minutes: 30 minutes on Monday and 60 minutes on Wednesday
+    assert get_group(result, "Berlin")['finishesAt'] == "2024-06-05T02:00:00Z"
+    assert result['message'] == ["Upgrade of all groups finishes before the deadline 2024-06-10T01:30:00Z"]
+
+
+def test_finish_time_of_large_groups_is_calculated_without_walking_every_week(console, get_args):
+    # 10 million batches of 30 minutes need 5 million weeks
+    set_upgrade_policy(console, "Berlin", "+00:00", 1, 10000000, Monday=[("1:00 am", "2:00 am")])
+    set_upgrade_policy(console, "NewYork", "+00:00", 1, 10000, Monday=[("1:00 am", "2:00 am")])
+
+    result = run_module(sentinelone_upgrade_schedule, get_args(groups=["Berlin", "NewYork"]))
+
+    assert get_group(result, "Berlin")['finishesAt'] is None and get_group(result, "Berlin")['late']
+    # The 5000th window
+    assert get_group(result, "NewYork")['finishesAt'] == "2120-03-25T02:00:00Z"
+    assert result['message'][0] == "Upgrade of group Berlin does not finish before the year 9999"
+
+
+def test_invalid_start_time_fails(console, get_args):
+    with pytest.raises(AnsibleFailJson) as err:
+        run_module(sentinelone_upgrade_schedule, get_args(start_time="03.06.2024"))
+
+    assert "start_time 03.06.2024 is invalid" in err.value.args[0]['msg']